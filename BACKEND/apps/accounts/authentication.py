@@ -0,0 +1,34 @@
+"""
+Authentification JWT réutilisant la résolution du tenant.
+
+Le jeton validé par ``TenantMiddleware`` n'est pas décodé une seconde fois ;
+l'utilisateur est lu en une requête et son entreprise est reprise du cache
+des entreprises (voir apps.core.tenancy) au lieu d'être relue en base.
+"""
+import copy
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.core.tenancy import get_company
+
+from .models import CustomUser
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        django_request = getattr(request, '_request', request)
+        validated_token = getattr(django_request, 'tenant_token', None)
+        if validated_token is None:
+            # Pas de jeton valide vu par le middleware : chemin standard
+            # (y compris les erreurs 401 sur jeton invalide)
+            return super().authenticate(request)
+
+        user = self.get_user(validated_token)
+        if user.company_id:
+            # Entreprise résolue par le middleware (copie propre à la requête)
+            company = getattr(django_request, 'tenant', None)
+            if company is None or company.pk != user.company_id:
+                company = copy.copy(get_company(user.company_id))
+            if company is not None:
+                CustomUser.company.field.set_cached_value(user, company)
+        return user, validated_token
@@ -1,38 +1,41 @@
 from django.http import JsonResponse
-from .models import PlatformConfig
+from .platform import get_platform_config
+
+
+# Chemins toujours accessibles : connexion et lecture de la configuration
+# (permet de se connecter et de vérifier l'état de la maintenance)
+ALLOWED_PATHS = frozenset((
+    '/api/auth/login/',
+    '/api/auth/refresh/',
+    '/api/auth/platform/config/',
+))
+ALLOWED_PREFIXES = ('/admin/', '/static/', '/media/')
+
 
 class MaintenanceModeMiddleware:
+    """
+    Bloque l'accès (503) pendant une maintenance, sauf pour le owner.
+
+    La configuration est lue dans le cache du processus (voir
+    apps.accounts.platform) : aucune requête SQL par requête HTTP. À placer
+    après TenantMiddleware, qui fournit les claims du jeton JWT : le owner
+    authentifié par JWT est reconnu sans lire l'utilisateur.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # 1. Toujours laisser passer les fichiers statiques, media et l'admin
-        if request.path.startswith('/admin/') or \
-           request.path.startswith('/static/') or \
-           request.path.startswith('/media/'):
-            return self.get_response(request)
-
-        # 2. Toujours laisser passer les endpoints d'authentification et de config
-        # Cela permet de se connecter et de vérifier l'état de la maintenance
-        allowed_paths = [
-            '/api/auth/login/',
-            '/api/auth/refresh/',
-            '/api/auth/platform/config/',
-        ]
-        
-        if request.path in allowed_paths:
+        # 1. Toujours laisser passer les fichiers statiques, media et l'admin,
+        # ainsi que les endpoints d'authentification et de config
+        if request.path in ALLOWED_PATHS or request.path.startswith(ALLOWED_PREFIXES):
             return self.get_response(request)
 
         try:
-            # 3. Vérifier le mode maintenance
-            config = PlatformConfig.get_config()
+            # 2. Vérifier le mode maintenance
+            config = get_platform_config()
             
-            if config.maintenance_mode:
-                # 4. Si l'utilisateur est connecté et est owner, on laisse passer
-                if request.user.is_authenticated and getattr(request.user, 'is_saas_owner', False):
-                    return self.get_response(request)
-
-                # 5. Sinon, on bloque avec une 503
+            if config.maintenance_mode and not self._is_owner(request):
+                # 3. Sinon, on bloque avec une 503
                 return JsonResponse({
                     'maintenance': True,
                     'message': config.maintenance_message
@@ -43,3 +46,15 @@ class MaintenanceModeMiddleware:
             pass
 
         return self.get_response(request)
+
+    @staticmethod
+    def _is_owner(request):
+        claims = getattr(request, 'tenant_claims', None)
+        if claims is not None:
+            return claims['is_owner']
+        if getattr(request, 'tenant_token', None) is not None:
+            # Jeton émis sans claims d'entreprise : lecture de l'utilisateur
+            from apps.accounts.authentication import TenantJWTAuthentication
+            user = TenantJWTAuthentication().get_user(request.tenant_token)
+            return user.is_saas_owner
+        return request.user.is_authenticated and getattr(request.user, 'is_saas_owner', False)
@@ -0,0 +1,94 @@
+"""
+Configuration de la plateforme, servie depuis un cache du processus.
+
+La configuration (singleton PlatformConfig) est lue une fois par processus.
+Chaque enregistrement incrémente une clé de version dans le cache partagé
+(Redis en production, voir ``CACHES``) ; les processus comparent leur
+version à cette clé au plus toutes les ``PLATFORM_CONFIG_CHECK_INTERVAL``
+secondes et ne relisent la base que si elle a changé. Le processus qui
+enregistre est à jour immédiatement (voir signals.py).
+
+La configuration est de plus relue au moins toutes les
+``PLATFORM_CONFIG_RELOAD_INTERVAL`` secondes : si le cache partagé est
+indisponible ou propre au processus, une modification faite par un autre
+processus est prise en compte dans ce délai.
+
+Le mode maintenance est ainsi vérifié à chaque requête sans requête SQL.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PlatformConfig
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'platform_config:version'
+
+_entry = None  # (version, prochaine vérification, fin de validité, configuration)
+_lock = threading.Lock()
+
+
+def _interval():
+    return getattr(settings, 'PLATFORM_CONFIG_CHECK_INTERVAL', 5)
+
+
+def _reload_interval():
+    return getattr(settings, 'PLATFORM_CONFIG_RELOAD_INTERVAL', 60)
+
+
+def _shared_version():
+    try:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            version = time.time_ns() // 1000
+            if not cache.add(VERSION_KEY, version, timeout=None):
+                version = cache.get(VERSION_KEY, version)
+        return version
+    except Exception:
+        logger.warning("Cache partagé indisponible pour la configuration plateforme", exc_info=True)
+        return None
+
+
+def get_platform_config():
+    """
+    Configuration de la plateforme (lecture seule : partagée entre requêtes).
+
+    Pour la modifier, utiliser ``PlatformConfig.get_config()``.
+    """
+    global _entry
+    now = time.monotonic()
+    entry = _entry
+    if entry is not None and entry[2] <= now:
+        # Relecture périodique, même si la version partagée n'a pas changé
+        entry = None
+    if entry is not None and entry[1] > now:
+        return entry[3]
+
+    version = _shared_version()
+    if entry is not None and version is not None and entry[0] == version:
+        with _lock:
+            _entry = (version, now + _interval(), entry[2], entry[3])
+        return entry[3]
+
+    config = PlatformConfig.get_config()
+    with _lock:
+        _entry = (version, now + _interval(), now + _reload_interval(), config)
+    return config
+
+
+def invalidate_platform_config():
+    """Invalide la configuration en cache dans ce processus et dans les autres."""
+    global _entry
+    with _lock:
+        _entry = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Aucune version enregistrée : la prochaine lecture en créera une nouvelle
+        pass
+    except Exception:
+        logger.warning("Invalidation de la configuration plateforme impossible", exc_info=True)
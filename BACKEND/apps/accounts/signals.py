@@ -0,0 +1,13 @@
+"""
+Invalidation de la configuration plateforme en cache à chaque modification.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PlatformConfig
+from .platform import invalidate_platform_config
+
+
+@receiver([post_save, post_delete], sender=PlatformConfig)
+def invalidate_platform_config_cache(sender, instance, **kwargs):
+    invalidate_platform_config()
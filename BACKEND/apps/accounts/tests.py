@@ -1,3 +1,167 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from apps.accounts import platform
+from apps.accounts.models import PlatformConfig
+from apps.accounts.tokens import tokens_for_user
+from apps.company.models import Company
+from apps.core.tenancy import invalidate_company, is_public_path
+
+User = get_user_model()
+
+
+class TenantJWTTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_company()
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company", email="company@test.com", plan='startup')
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=self.company, role='rh'
+        )
+        self.url = '/api/stats/stats/'
+
+    def tearDown(self):
+        cache.clear()
+        invalidate_company()
+
+    def _authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+
+    def test_login_embeds_tenant_claims(self):
+        response = self.client.post('/api/auth/login/', {'email': 'rh@test.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 200)
+
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['company_id'], str(self.company.pk))
+        self.assertEqual((token['role'], token['plan'], token['company_active']), ('rh', 'startup', True))
+        self.assertFalse(token['is_owner'])
+
+    def test_refresh_reloads_claims(self):
+        refresh = tokens_for_user(self.user)['refresh']
+        self.user.role = 'admin'
+        self.user.save()
+
+        response = self.client.post('/api/auth/refresh/', {'refresh': refresh})
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'admin')
+
+    def test_company_resolved_without_query(self):
+        self._authenticate(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        # Seul l'utilisateur est lu ; entreprise et statistiques viennent des caches
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_without_company_is_rejected(self):
+        user = User.objects.create_user(username="solo", email="solo@test.com", password="password")
+        self._authenticate(user)
+        self.assertEqual(self.client.get('/api/employees/').status_code, 403)
+
+        owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="password", role='owner'
+        )
+        self._authenticate(owner)
+        self.assertNotEqual(self.client.get('/api/auth/me/').status_code, 403)
+
+    def test_deactivated_company_is_rejected(self):
+        self._authenticate(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.company.is_active = False
+        self.company.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error'], 'Entreprise désactivée')
+
+    def test_invalid_token_is_unauthorized(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalide")
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class PublicPathTests(SimpleTestCase):
+    def test_prefixes_and_home_page(self):
+        self.assertTrue(is_public_path('/'))
+        self.assertTrue(is_public_path('/api/auth/login/'))
+        self.assertTrue(is_public_path('/admin/login/'))
+        self.assertFalse(is_public_path('/api/employees/'))
+        self.assertFalse(is_public_path('/api/auth/me/'))
+
+
+class PlatformConfigCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        platform.invalidate_platform_config()
+        self.client = APIClient()
+        self.url = '/api/auth/platform/config/'
+
+    def tearDown(self):
+        cache.clear()
+        platform.invalidate_platform_config()
+
+    def test_config_read_without_query_once_cached(self):
+        platform.get_platform_config()
+        with self.assertNumQueries(0):
+            config = platform.get_platform_config()
+        self.assertFalse(config.maintenance_mode)
+
+    def test_save_invalidates_cache(self):
+        platform.get_platform_config()
+        config = PlatformConfig.get_config()
+        config.maintenance_mode = True
+        config.save()
+        self.assertTrue(platform.get_platform_config().maintenance_mode)
+
+    @override_settings(PLATFORM_CONFIG_CHECK_INTERVAL=0)
+    def test_other_process_reloads_on_version_change(self):
+        PlatformConfig.get_config()
+        platform.get_platform_config()
+        # Modification sans signal (autre processus) : seule la version partagée change
+        PlatformConfig.objects.update(maintenance_mode=True)
+        self.assertFalse(platform.get_platform_config().maintenance_mode)
+
+        cache.incr(platform.VERSION_KEY)
+        self.assertTrue(platform.get_platform_config().maintenance_mode)
+
+    @override_settings(PLATFORM_CONFIG_CHECK_INTERVAL=0, PLATFORM_CONFIG_RELOAD_INTERVAL=0)
+    def test_reloads_after_max_age_without_version_change(self):
+        PlatformConfig.get_config()
+        platform.get_platform_config()
+        # Cache non partagé entre processus : la version ne change jamais
+        PlatformConfig.objects.update(maintenance_mode=True)
+        self.assertTrue(platform.get_platform_config().maintenance_mode)
+
+    def test_public_get_has_cache_headers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_maintenance_blocks_all_but_owner(self):
+        company = Company.objects.create(name="Test Company", email="company@test.com")
+        user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=company, role='rh'
+        )
+        owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="password", role='owner'
+        )
+        config = PlatformConfig.get_config()
+        config.maintenance_mode = True
+        config.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(response.json()['maintenance'])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(owner)['access']}")
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
@@ -0,0 +1,63 @@
+"""
+Jetons JWT portant le contexte de l'entreprise.
+
+Les jetons émis à la connexion, à l'inscription, à l'impersonation et au
+rafraîchissement embarquent l'entreprise, le rôle, le plan et l'état actif
+de l'entreprise de l'utilisateur (TENANT_CLAIMS). Le middleware en déduit
+l'entreprise de la requête sans lire l'utilisateur (voir
+apps.core.tenancy). Les claims sont recalculés à chaque rafraîchissement :
+un changement de rôle ou de plan est pris en compte au plus tard à
+l'expiration du jeton d'accès.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+TENANT_CLAIMS = ('company_id', 'role', 'plan', 'company_active', 'is_owner')
+
+
+def tenant_claims(user):
+    """Claims d'entreprise d'un utilisateur (lit ``user.company``)."""
+    company = user.company
+    return {
+        'company_id': str(company.pk) if company else None,
+        'role': user.role,
+        'plan': company.plan if company else None,
+        'company_active': company.is_active if company else None,
+        'is_owner': user.is_saas_owner,
+    }
+
+
+def add_tenant_claims(token, user):
+    for name, value in tenant_claims(user).items():
+        token[name] = value
+    return token
+
+
+def tokens_for_user(user):
+    """Jetons de rafraîchissement et d'accès d'un utilisateur, avec ses claims d'entreprise."""
+    refresh = add_tenant_claims(RefreshToken.for_user(user), user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Connexion : jetons émis avec les claims d'entreprise."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_tenant_claims(super().get_token(user), user)
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rafraîchissement : claims d'entreprise relus en base."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = get_user_model().objects.select_related('company').filter(
+            **{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is not None:
+            data['access'] = str(add_tenant_claims(access, user))
+        return data
@@ -87,24 +87,22 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='export/csv')
     def export_csv(self, request):
         """Export Users List (CSV)"""
-        users = self.get_queryset()
-        data = []
-        for user in users:
-            data.append({
-                'ID': user.id,
-                'Email': user.email,
-                'Nom': user.last_name,
-                'Prénom': user.first_name,
-                'Rôle': user.role,
-                'Actif': user.is_active,
-                'Date d\'inscription': user.date_joined,
-                'Dernière connexion': user.last_login
-            })
-            
-        from apps.core.utils.exporters import CSVExporter
-        exporter = CSVExporter(
-            data=data,
-            filename=f"utilisateurs_{datetime.now().strftime('%Y%m%d')}"
+        from apps.core.utils.advanced_exporters import StreamingCSVExporter
+        exporter = StreamingCSVExporter(
+            self.get_queryset(),
+            columns=[
+                ('ID', 'id'),
+                ('Email', 'email'),
+                ('Nom', 'last_name'),
+                ('Prénom', 'first_name'),
+                ('Rôle', 'role'),
+                ('Actif', 'is_active'),
+                ('Date d\'inscription', 'date_joined'),
+                ('Dernière connexion', 'last_login'),
+            ],
+            filename=f"utilisateurs_{datetime.now().strftime('%Y%m%d')}",
+            delimiter=',',
+            bom=False
         )
         return exporter.export()
 
@@ -191,14 +189,14 @@ class RegisterCompanyView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Generate tokens
-            from rest_framework_simplejwt.tokens import RefreshToken
-            refresh = RefreshToken.for_user(user)
+            from .tokens import tokens_for_user
+            tokens = tokens_for_user(user)
             
             return Response({
                 "message": "Entreprise et compte administrateur créés avec succès.",
                 "user": UserSerializer(user).data,
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
+                "access": tokens['access'],
+                "refresh": tokens['refresh'],
                 "subscription": {
                     "plan": plan.name,
                     "status": subscription.status,
@@ -221,12 +219,12 @@ class SaasAdminViewSet(viewsets.ViewSet):
         target_user = generics.get_object_or_404(CustomUser, pk=pk)
         
         # Génération manuelle des tokens pour l'utilisateur cible
-        from rest_framework_simplejwt.tokens import RefreshToken
-        refresh = RefreshToken.for_user(target_user)
+        from .tokens import tokens_for_user
+        tokens = tokens_for_user(target_user)
         
         return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
+            'access': tokens['access'],
+            'refresh': tokens['refresh'],
             'user': {
                 'id': target_user.id,
                 'email': target_user.email,
@@ -247,7 +245,12 @@ class SaasAdminViewSet(viewsets.ViewSet):
             'revenue_mrr': 0, # À implémenter avec Stripe
         })
 
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+from apps.core.utils.document_cache import not_modified
 from .models import PlatformConfig
+from .platform import get_platform_config
 from .serializers import PlatformConfigSerializer
 
 class PlatformConfigView(APIView):
@@ -259,10 +262,20 @@ class PlatformConfigView(APIView):
     permission_classes = [permissions.AllowAny]  # Pas d'auth requise
 
     def get(self, request):
-        """Lecture publique de la config pour vérifier le mode maintenance"""
-        config = PlatformConfig.get_config()
-        serializer = PlatformConfigSerializer(config)
-        return Response(serializer.data)
+        """
+        Lecture publique de la config pour vérifier le mode maintenance.
+
+        Servie depuis le cache du processus, avec ETag (304 si inchangée) et
+        mise en cache HTTP pendant PLATFORM_CONFIG_MAX_AGE secondes.
+        """
+        config = get_platform_config()
+        etag = quote_etag(config.updated_at.isoformat())
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(PlatformConfigSerializer(config).data)
+            response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.PLATFORM_CONFIG_MAX_AGE)
+        return response
 
     def post(self, request):
         """Modification réservée au owner"""
@@ -0,0 +1,179 @@
+"""
+Matérialisation des absences.
+
+Un employé qui ne pointe pas n'a aucune présence enregistrée : il n'apparaît
+alors ni dans les statistiques journalières ni dans les exports. Pour chaque
+jour travaillé (jours cochés de son horaire, voir schedules.py), une présence
+est créée pour les employés actifs qui n'en ont pas : 'excused' si un congé
+approuvé couvre le jour, 'absent' sinon.
+
+Employés, présences existantes et congés de la période sont lus en trois
+requêtes ; les présences manquantes sont insérées par ``bulk_create`` et
+les agrégats journaliers reçoivent une mise à jour par (département, jour).
+Relancer sur une période déjà traitée ne crée rien : les présences
+existantes (pointages, absences déjà matérialisées) sont conservées.
+
+Les congés approuvés, rejetés ou modifiés après coup sont reportés par
+``reclassify_absences`` (appelé à l'enregistrement ou à la suppression d'un
+congé, voir signals.py) : les absences sans pointage passent en 'excused'
+si un congé approuvé les couvre, en 'absent' sinon.
+"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils.stats_cache import invalidate_company_stats
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+
+from .models import Attendance
+from .rollup import RollupState, attendance_state, record_changes
+from .schedules import get_schedule_index
+from .services import AttendanceService
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _days(start, end):
+    day = start
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _leave_days(company, start, end):
+    """(employé, jour) couverts par un congé approuvé sur [start, end[."""
+    covered = set()
+    leaves = Leave.objects.filter(
+        company=company, status='approved', start_date__lt=end, end_date__gte=start,
+    ).values_list('employee_id', 'start_date', 'end_date')
+    for employee_id, leave_start, leave_end in leaves:
+        for day in _days(max(leave_start, start), min(leave_end + timedelta(days=1), end)):
+            covered.add((employee_id, day))
+    return covered
+
+
+def materialize_absences(company, start, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Crée les présences manquantes des jours travaillés de [start, end[.
+
+    Args:
+        company: Entreprise
+        start: Premier jour traité
+        end: Jour de fin exclu (défaut : lendemain de ``start``)
+        batch_size: Nombre de lignes par requête d'insertion
+
+    Returns:
+        {'days': n, 'absent': n, 'excused': n}
+    """
+    end = end or start + timedelta(days=1)
+    days = list(_days(start, end))
+    result = {'days': len(days), 'absent': 0, 'excused': 0}
+    if not days:
+        return result
+
+    employees = list(
+        Employee.objects.filter(company=company, user__is_active=True)
+        .values_list('id', 'department', 'date_hired')
+    )
+    if not employees:
+        return result
+
+    existing = set(
+        Attendance.objects.filter(company=company, date__gte=start, date__lt=end)
+        .values_list('employee_id', 'date')
+    )
+    on_leave = _leave_days(company, start, end)
+    schedules = get_schedule_index(company.pk)
+    default_schedule = schedules.default or AttendanceService.get_default_schedule(company)
+
+    attendances = []
+    for employee_id, department, date_hired in employees:
+        department = department or ''
+        for day in days:
+            if (employee_id, day) in existing or (date_hired and day < date_hired):
+                continue
+            schedule = schedules.resolve(employee_id, department, day) or default_schedule
+            if not schedule.works_on(day):
+                continue
+            attendances.append(Attendance(
+                id=uuid.uuid4(), company=company, employee_id=employee_id, date=day,
+                schedule=schedule, department=department,
+                status='excused' if (employee_id, day) in on_leave else 'absent',
+            ))
+
+    for offset in range(0, len(attendances), batch_size):
+        batch = attendances[offset:offset + batch_size]
+        with transaction.atomic():
+            # Présence créée entre-temps (pointage) pour le même (employee, date) : conservée
+            Attendance.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted = set(
+                Attendance.objects.filter(pk__in=[attendance.pk for attendance in batch])
+                .values_list('pk', flat=True)
+            )
+            batch = [attendance for attendance in batch if attendance.pk in inserted]
+            record_changes(
+                (None, RollupState(
+                    company_id=company.pk,
+                    department=attendance.department,
+                    date=attendance.date,
+                    status=attendance.status,
+                    delay_minutes=0,
+                    worked_hours=Decimal(0),
+                ))
+                for attendance in batch
+            )
+        for attendance in batch:
+            result[attendance.status] += 1
+
+    if result['absent'] or result['excused']:
+        invalidate_company_stats(company.pk)
+    return result
+
+
+def reclassify_absences(employee_id, start, end):
+    """
+    Reclasse les absences sans pointage de l'employé sur [start, end] d'après
+    ses congés approuvés : 'excused' si un congé couvre le jour, 'absent' sinon.
+
+    À appeler lorsqu'un congé est approuvé, rejeté, déplacé ou supprimé après
+    la matérialisation des absences. Une absence excusée avec une
+    justification (notes, voir AttendanceService.excuse) reste excusée.
+
+    Returns:
+        Nombre de présences reclassées
+    """
+    covered = set()
+    leaves = Leave.objects.filter(
+        employee_id=employee_id, status='approved', start_date__lte=end, end_date__gte=start,
+    ).values_list('start_date', 'end_date')
+    for leave_start, leave_end in leaves:
+        covered.update(_days(max(leave_start, start), min(leave_end, end) + timedelta(days=1)))
+
+    with transaction.atomic():
+        attendances = [
+            attendance
+            for attendance in Attendance.objects.select_for_update().filter(
+                employee_id=employee_id, date__gte=start, date__lte=end,
+                status__in=('absent', 'excused'), check_in__isnull=True,
+            ).order_by()
+            if (attendance.date in covered) != (attendance.status == 'excused')
+            and not (attendance.status == 'excused' and attendance.notes)
+        ]
+        if not attendances:
+            return 0
+        befores = [attendance_state(attendance) for attendance in attendances]
+        now = timezone.now()
+        for attendance in attendances:
+            attendance.status = 'excused' if attendance.date in covered else 'absent'
+            attendance.updated_at = now
+        Attendance.objects.bulk_update(attendances, ['status', 'updated_at'])
+        record_changes(zip(befores, (attendance_state(attendance) for attendance in attendances)))
+
+    # Après validation : appelé depuis l'enregistrement d'un congé
+    transaction.on_commit(partial(invalidate_company_stats, attendances[0].company_id))
+    return len(attendances)
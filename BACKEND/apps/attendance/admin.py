@@ -1,8 +1,43 @@
 from django.contrib import admin
-from .models import Attendance
+from django.db import transaction
+
+from .models import Attendance, AttendanceDailyRollup, WorkScheduleAssignment
+from .rollup import attendance_state, record_change, record_changes
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('employee', 'date', 'check_in', 'check_out', 'status', 'company')
     list_filter = ('status', 'company', 'date')
     search_fields = ('employee__user__first_name', 'employee__user__last_name')
+
+    # Les agrégats journaliers suivent aussi les modifications faites ici (voir rollup.py)
+    def save_model(self, request, obj, form, change):
+        before = attendance_state(Attendance.objects.get(pk=obj.pk)) if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            record_change(before, attendance_state(obj))
+
+    def delete_model(self, request, obj):
+        before = attendance_state(obj)
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            record_change(before, None)
+
+    def delete_queryset(self, request, queryset):
+        befores = [attendance_state(attendance) for attendance in queryset]
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            record_changes((before, None) for before in befores)
+
+
+@admin.register(AttendanceDailyRollup)
+class AttendanceDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('company', 'department', 'date', 'present', 'late', 'absent', 'excused')
+    list_filter = ('company', 'date')
+    readonly_fields = ('present', 'late', 'absent', 'excused', 'total_delay_minutes', 'total_worked_hours')
+
+
+@admin.register(WorkScheduleAssignment)
+class WorkScheduleAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('schedule', 'employee', 'department', 'start_date', 'end_date', 'company')
+    list_filter = ('company', 'schedule')
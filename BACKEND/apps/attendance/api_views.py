@@ -1,12 +1,17 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 
-from .models import Attendance, WorkSchedule
-from .serializers import AttendanceSerializer, WorkScheduleSerializer
+from .ingest import ingest_events, parse_events, read_csv_events
+from .models import Attendance, WorkSchedule, WorkScheduleAssignment
+from .rollup import attendance_state, record_change
+from .serializers import AttendanceSerializer, WorkScheduleAssignmentSerializer, WorkScheduleSerializer
 from .services import AttendanceService
-from apps.accounts.permissions import IsCompanyMember
+from apps.accounts.permissions import IsCompanyMember, IsRH
+from apps.core.pagination import KeysetPagination
+from apps.core.query_budget import QueryBudgetMixin
 
 class WorkScheduleViewSet(viewsets.ModelViewSet):
     """
@@ -19,7 +24,19 @@ class WorkScheduleViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return WorkSchedule.objects.filter(company=self.request.user.company)
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class WorkScheduleAssignmentViewSet(viewsets.ModelViewSet):
+    """
+    Affectation des horaires aux employés et départements.
+    """
+    serializer_class = WorkScheduleAssignmentSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyMember, IsRH]
+
+    def get_queryset(self):
+        return WorkScheduleAssignment.objects.filter(
+            company=self.request.user.company
+        ).select_related('schedule')
+
+class AttendanceViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     Gestion des présences.
     """
@@ -28,12 +45,36 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember]
     filter_backends = [filters.SearchFilter]
     search_fields = ['employee__user__first_name', 'employee__user__last_name', 'date']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date', '-id')
+    # Page (et COUNT si demandé) : employé, utilisateur et horaire viennent de la jointure
+    list_query_budget = 2
 
     def get_queryset(self):
         user = self.request.user
-        if user.role == 'employee':
-            return Attendance.objects.filter(employee__user=user).order_by('-date')
-        return Attendance.objects.filter(company=user.company).order_by('-date', '-check_in')
+        queryset = Attendance.objects.filter(company_id=user.company_id)
+        if user.role == 'employe':
+            # Filtre entreprise conservé : l'index (company, -date, -id) sert aussi ce tri
+            queryset = queryset.filter(employee__user=user)
+        return queryset.select_related('employee__user', 'schedule').order_by(*self.keyset_ordering)
+
+    # Les agrégats journaliers suivent chaque écriture (voir rollup.py)
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            attendance = serializer.save()
+            record_change(None, attendance_state(attendance))
+
+    def perform_update(self, serializer):
+        before = attendance_state(serializer.instance)
+        with transaction.atomic():
+            attendance = serializer.save()
+            record_change(before, attendance_state(attendance))
+
+    def perform_destroy(self, instance):
+        before = attendance_state(instance)
+        with transaction.atomic():
+            instance.delete()
+            record_change(before, None)
 
     @action(detail=False, methods=['post'], url_path='check-in')
     def check_in(self, request):
@@ -90,16 +131,57 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(attendance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-ingest',
+            permission_classes=[permissions.IsAuthenticated, IsCompanyMember, IsRH])
+    def bulk_ingest(self, request):
+        """
+        Ingestion en masse des pointages (badgeuses, imports CSV).
+
+        Body JSON : {"events": [{"employee", "timestamp", "direction": "in"|"out"}],
+        "device": "terminal"} ; ou multipart avec un fichier CSV ``file``
+        (colonnes employee, timestamp, direction).
+        """
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                rows = read_csv_events(upload.file)
+                events, errors = parse_events(rows)
+            except (ValueError, UnicodeDecodeError) as exc:
+                return Response({'error': f"Fichier CSV invalide : {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get('events')
+            if not isinstance(rows, list):
+                return Response({'error': "Liste 'events' requise"}, status=status.HTTP_400_BAD_REQUEST)
+            events, errors = parse_events(row if isinstance(row, dict) else {} for row in rows)
+
+        if not events:
+            return Response({'error': 'Aucun pointage valide', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        device = str(request.data.get('device') or '')[:255]
+        result = ingest_events(request.user.company, events, device_info=device or None)
+        return Response({**result, 'errors': errors})
+
     @action(detail=True, methods=['patch'], url_path='justify')
     def justify(self, request, pk=None):
         """
         Justification d'absence/retard.
+
+        Avec ``excuse: true``, un admin/RH/manager valide la justification :
+        l'absence ou le retard passe au statut 'excused'.
         """
         attendance = self.get_object()
         
-        if request.user.role == 'employee' and attendance.employee.user != request.user:
+        if request.user.role == 'employe' and attendance.employee.user != request.user:
             return Response({'error': "Vous ne pouvez justifier que vos propres présences."}, status=403)
         
+        if str(request.data.get('excuse', '')).lower() in ('1', 'true', 'yes'):
+            if request.user.role not in ('owner', 'admin', 'rh', 'manager'):
+                return Response({'error': "Seuls les RH et managers peuvent excuser une présence."}, status=403)
+            if attendance.status not in ('absent', 'late'):
+                return Response({'error': "Seuls une absence ou un retard peuvent être excusés."}, status=400)
+            AttendanceService.excuse(attendance, notes=request.data.get('notes'))
+            return Response(self.get_serializer(attendance).data)
+        
         notes = request.data.get('notes', '')
         attendance.notes = notes
         attendance.save(update_fields=['notes', 'updated_at'])
@@ -62,10 +62,10 @@ class DailyExportView(BaseExportView):
             filename = f"presences_journalieres_{report_date.strftime('%Y%m%d')}"
             
             if export_format == 'excel':
-                # Préparer les données pour Excel
-                excel_data = []
-                for att in attendances:
-                    excel_data.append({
+                # Lignes produites à la demande : le générateur Excel les écrit
+                # en flux sans charger tout le queryset en mémoire
+                excel_data = (
+                    {
                         'Employé': att.employee.user.get_full_name(),
                         'Département': att.employee.department or '-',
                         'Arrivée': att.check_in.strftime("%H:%M") if att.check_in else '-',
@@ -73,7 +73,9 @@ class DailyExportView(BaseExportView):
                         'Statut': att.get_status_display(),
                         'Retard (min)': att.delay_minutes,
                         'Heures': att.worked_hours
-                    })
+                    }
+                    for att in attendances.iterator(chunk_size=2000)
+                )
                 
                 exporter = AttendanceExcelGenerator(company=request.user.company)
                 return exporter.generate_daily_report({
@@ -136,15 +138,14 @@ class MonthlyExportView(BaseExportView):
             year = int(request.GET.get('year', date.today().year))
             export_format = self.get_format()
             
-            stats = AttendanceService.get_monthly_stats(request.user.company, year, month)
-            employee_stats = AttendanceService.get_employee_monthly_stats(request.user.company, year, month)
+            # Taux et départements lus dans les agrégats journaliers
+            summary = AttendanceService.get_monthly_report(request.user.company, year, month)
+            employee_stats = summary['employee_stats']
             
             month_name = date(year, month, 1).strftime('%B %Y')
             report_data = {
                 'month': month_name,
-                'stats': stats,
-                'employee_stats': employee_stats,
-                'department_stats': [],
+                **summary,
                 'alerts': []
             }
             
@@ -0,0 +1,20 @@
+"""
+Exports des présences exécutables en tâche de fond (voir apps.core.export_jobs).
+"""
+from apps.core.export_jobs import register_export
+
+register_export(
+    'attendance.daily',
+    view='apps.attendance.export_views.DailyExportView',
+    module='attendance',
+    label='Rapport de présence journalier',
+    format_param='format',
+)
+
+register_export(
+    'attendance.monthly',
+    view='apps.attendance.export_views.MonthlyExportView',
+    module='attendance',
+    label='Rapport de présence mensuel',
+    format_param='format',
+)
@@ -0,0 +1,47 @@
+"""
+Requêtes critiques des présences (voir apps.core.query_plans).
+"""
+from datetime import timedelta
+
+from django.db.models import Count
+
+from apps.core.query_plans import register_hot_query
+
+from .models import Attendance
+
+# Les comptages (count, aggregate) ignorent Meta.ordering : order_by() vide
+# évite ici les jointures employé / utilisateur du tri par défaut
+
+register_hot_query(
+    'attendance.list',
+    lambda ctx: Attendance.objects.filter(company=ctx.company).order_by('-date', '-id')[:50],
+    label='Liste paginée des présences',
+)
+
+register_hot_query(
+    'attendance.own_list',
+    lambda ctx: Attendance.objects.filter(
+        company=ctx.company, employee__user=ctx.user,
+    ).order_by('-date', '-id')[:50],
+    label="Liste paginée des présences d'un employé",
+)
+
+register_hot_query(
+    'attendance.day',
+    lambda ctx: Attendance.objects.filter(company=ctx.company, date=ctx.today).order_by(),
+    label='Présences du jour (tableau de bord)',
+)
+
+register_hot_query(
+    'attendance.period_status',
+    lambda ctx: Attendance.objects.filter(
+        company=ctx.company, date__gte=ctx.today - timedelta(days=30), date__lt=ctx.today,
+    ).order_by().values('status').annotate(count=Count('id')),
+    label='Répartition des statuts sur une période',
+)
+
+register_hot_query(
+    'attendance.employee',
+    lambda ctx: Attendance.objects.filter(employee=ctx.employee).order_by('-date'),
+    label="Historique d'un employé",
+)
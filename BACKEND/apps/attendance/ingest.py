@@ -0,0 +1,288 @@
+"""
+Ingestion en masse des pointages (badgeuses, imports CSV).
+
+Un lot d'événements (employé, horodatage, sens) est regroupé par employé et
+par jour : première arrivée et dernier départ, fusionnés avec la présence
+existante. Les présences manquantes sont d'abord insérées (conflits
+ignorés), puis toutes les présences du lot sont lues verrouillées en une
+requête ; l'horaire de chaque employé est résolu dans l'index en mémoire
+(voir schedules.py) ; statut, retard et heures travaillées sont calculés colonne par colonne
+(pandas) avec les règles de ``AttendanceService.process_check_in`` et
+``process_check_out``. Les présences sont écrites par ``bulk_create`` avec
+mise à jour sur conflit (employee, date) et les agrégats journaliers
+reçoivent une seule mise à jour par (département, jour).
+"""
+import csv
+import io
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.utils.stats_cache import invalidate_company_stats
+from apps.employees.models import Employee
+
+from .models import Attendance
+from .rollup import RollupState, record_changes
+from .schedules import get_schedule_index
+from .services import AttendanceService
+
+DIRECTIONS = ('in', 'out')
+
+# Colonnes attendues dans un fichier CSV de pointages
+CSV_COLUMNS = ('employee', 'timestamp', 'direction')
+
+DEFAULT_BATCH_SIZE = 1000
+
+UPSERT_FIELDS = [
+    'schedule', 'check_in', 'check_out', 'status', 'delay_minutes',
+    'worked_hours', 'device_info', 'updated_at',
+]
+
+
+def parse_events(rows):
+    """
+    Valide des événements bruts (dicts ``employee``, ``timestamp``, ``direction``).
+
+    Les horodatages sans fuseau sont interprétés dans le fuseau du projet.
+
+    Returns:
+        Tuple (événements, erreurs) : événements ``(employee_id, date, heure,
+        sens)`` et erreurs ``{'line': n, 'error': message}`` (lignes numérotées
+        à partir de 1).
+    """
+    events = []
+    errors = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            employee_id = uuid.UUID(str(row.get('employee') or '').strip())
+        except ValueError:
+            errors.append({'line': line, 'error': "Identifiant d'employé invalide"})
+            continue
+
+        timestamp = row.get('timestamp')
+        if not isinstance(timestamp, datetime):
+            try:
+                timestamp = parse_datetime(str(timestamp or '').strip())
+            except ValueError:
+                timestamp = None
+        if timestamp is None:
+            errors.append({'line': line, 'error': "Horodatage invalide"})
+            continue
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        local = timezone.localtime(timestamp)
+
+        direction = str(row.get('direction') or '').strip().lower()
+        if direction not in DIRECTIONS:
+            errors.append({'line': line, 'error': "Sens invalide (in ou out)"})
+            continue
+
+        events.append((employee_id, local.date(), local.time().replace(microsecond=0), direction))
+    return events, errors
+
+
+def read_csv_events(stream):
+    """
+    Lit un fichier CSV de pointages (colonnes employee, timestamp, direction).
+
+    Le séparateur (virgule ou point-virgule) est détecté sur l'en-tête.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    fieldnames = [name.strip().lower() for name in next(csv.reader([header], delimiter=delimiter), [])]
+    missing = [column for column in CSV_COLUMNS if column not in fieldnames]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+    return csv.DictReader(stream, fieldnames=fieldnames, delimiter=delimiter)
+
+
+def _first_and_last(events):
+    """Première arrivée et dernier départ par (employé, jour)."""
+    days = {}
+    for employee_id, day, moment, direction in events:
+        slot = days.setdefault((employee_id, day), [None, None])
+        if direction == 'in':
+            if slot[0] is None or moment < slot[0]:
+                slot[0] = moment
+        elif slot[1] is None or moment > slot[1]:
+            slot[1] = moment
+    return days
+
+
+def _seconds(moment):
+    return None if moment is None else moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def _state(attendance):
+    """État d'agrégat d'une présence, sans relire l'employé."""
+    return RollupState(
+        company_id=attendance.company_id,
+        department=attendance.department,
+        date=attendance.date,
+        status=attendance.status,
+        delay_minutes=attendance.delay_minutes or 0,
+        worked_hours=Decimal(str(attendance.worked_hours or 0)),
+    )
+
+
+def _compute(rows):
+    """
+    Statut, retard et heures travaillées de chaque ligne, en colonnes.
+
+    Args:
+        rows: Dicts check_in, check_out (secondes ou None), start (minutes),
+            grace (minutes), status, delay_minutes, worked_hours (valeurs
+            actuelles)
+
+    Returns:
+        Liste de tuples (status, delay_minutes, worked_hours)
+    """
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(rows).astype({
+        'check_in': float, 'check_out': float, 'start': float, 'grace': float,
+        'delay_minutes': float, 'worked_hours': float,
+    })
+    has_check_in = df['check_in'].notna()
+
+    # Arrivée : retard en minutes entières au-delà de la période de grâce
+    delay = ((df['check_in'] // 60) - df['start']).clip(lower=0)
+    late = delay > df['grace']
+    status = (
+        pd.Series('present', index=df.index).mask(late, 'late')
+        .where(has_check_in, df['status'])
+        # Une justification validée n'est pas remplacée par un pointage
+        .mask(df['status'] == 'excused', 'excused')
+    )
+    delay_minutes = delay.where(late, 0).where(has_check_in, df['delay_minutes'])
+
+    # Départ : durée depuis l'arrivée
+    worked = ((df['check_out'] - df['check_in']) / 3600).clip(lower=0).round(2)
+    worked = worked.where(worked.notna(), df['worked_hours'])
+
+    return list(zip(status, delay_minutes.astype(int), worked))
+
+
+def ingest_events(company, events, device_info=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Enregistre un lot de pointages validés par ``parse_events``.
+
+    Args:
+        company: Entreprise des employés pointés
+        events: Événements ``(employee_id, date, heure, sens)``
+        device_info: Terminal d'origine (enregistré sur les présences)
+        batch_size: Nombre de lignes par requête d'écriture
+
+    Returns:
+        {'events': n, 'attendances': n, 'created': n, 'updated': n,
+        'unknown_employees': [ids]}
+    """
+    days = _first_and_last(events)
+    employee_ids = {employee_id for employee_id, _ in days}
+    departments = dict(
+        Employee.objects.filter(company=company, id__in=employee_ids).values_list('id', 'department')
+    )
+    unknown = sorted(str(employee_id) for employee_id in employee_ids - set(departments))
+    days = {key: times for key, times in days.items() if key[0] in departments}
+
+    result = {
+        'events': len(events),
+        'attendances': len(days),
+        'created': 0,
+        'updated': 0,
+        'unknown_employees': unknown,
+    }
+    if not days:
+        return result
+
+    schedules = get_schedule_index(company.pk)
+    default_schedule = schedules.default or AttendanceService.get_default_schedule(company)
+
+    with transaction.atomic():
+        # Les présences manquantes sont d'abord réservées (ignorées si un
+        # pointage concurrent les a créées entre-temps), puis toutes sont lues
+        # verrouillées : l'état antérieur de chaque ligne est donc connu.
+        placeholders = [
+            Attendance(
+                id=uuid.uuid4(), company=company, employee_id=employee_id, date=day, status='absent',
+                department=departments[employee_id] or '',
+            )
+            for employee_id, day in days
+        ]
+        Attendance.objects.bulk_create(placeholders, batch_size=batch_size, ignore_conflicts=True)
+        # Une ligne déjà présente garde son identifiant : seules les lignes
+        # réellement insérées portent l'un de ces identifiants
+        claimed_ids = {attendance.id for attendance in placeholders}
+        existing = {
+            (attendance.employee_id, attendance.date): attendance
+            for attendance in Attendance.objects.select_for_update().filter(
+                employee_id__in=departments,
+                date__in={day for _, day in days},
+            )
+        }
+
+        attendances = []
+        befores = []
+        rows = []
+        for (employee_id, day), (check_in, check_out) in days.items():
+            attendance = existing[(employee_id, day)]
+            if attendance.id in claimed_ids:
+                # Réservée ci-dessus : pas encore comptée dans les agrégats
+                befores.append(None)
+                result['created'] += 1
+            else:
+                befores.append(_state(attendance))
+                result['updated'] += 1
+                # Fusion avec les pointages déjà enregistrés
+                if attendance.check_in and (check_in is None or attendance.check_in < check_in):
+                    check_in = attendance.check_in
+                if attendance.check_out and (check_out is None or attendance.check_out > check_out):
+                    check_out = attendance.check_out
+
+            # Horaire déjà enregistré sur la présence, sinon horaire applicable ce jour-là
+            if attendance.schedule_id:
+                schedule = schedules.schedules.get(attendance.schedule_id) or attendance.schedule
+            else:
+                schedule = schedules.resolve(employee_id, departments[employee_id], day) or default_schedule
+            attendance.schedule = schedule
+            attendance.check_in = check_in
+            attendance.check_out = check_out
+            if device_info:
+                attendance.device_info = device_info
+            attendances.append(attendance)
+            rows.append({
+                'check_in': _seconds(check_in),
+                'check_out': _seconds(check_out),
+                'start': schedule.start_time.hour * 60 + schedule.start_time.minute,
+                'grace': schedule.grace_period_minutes,
+                'status': attendance.status,
+                'delay_minutes': attendance.delay_minutes or 0,
+                'worked_hours': float(attendance.worked_hours or 0),
+            })
+
+        for attendance, (status, delay_minutes, worked_hours) in zip(attendances, _compute(rows)):
+            attendance.status = status
+            attendance.delay_minutes = int(delay_minutes)
+            attendance.worked_hours = Decimal(str(worked_hours)).quantize(Decimal('0.01'))
+
+        Attendance.objects.bulk_create(
+            attendances,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=UPSERT_FIELDS,
+        )
+        record_changes(
+            (before, _state(attendance))
+            for before, attendance in zip(befores, attendances)
+        )
+
+    invalidate_company_stats(company.pk)
+    return result
+
@@ -0,0 +1,58 @@
+"""
+Reconstruit ou vérifie les agrégats journaliers de présence.
+
+Exemples :
+    python manage.py attendance_rollup --backfill
+    python manage.py attendance_rollup --verify --company <uuid> --from 2024-01-01 --to 2024-02-01
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance.rollup import rebuild_rollups, verify_rollups
+from apps.company.models import Company
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Date invalide : {value} (format attendu AAAA-MM-JJ)")
+
+
+class Command(BaseCommand):
+    help = "Backfill et vérification des agrégats journaliers de présence"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help="Recalcule les agrégats depuis les présences")
+        parser.add_argument('--verify', action='store_true', help="Compare les agrégats aux présences")
+        parser.add_argument('--company', help="ID de l'entreprise (défaut : toutes)")
+        parser.add_argument('--from', dest='start', help="Date de début incluse (AAAA-MM-JJ)")
+        parser.add_argument('--to', dest='end', help="Date de fin exclue (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        if not options['backfill'] and not options['verify']:
+            raise CommandError("Préciser --backfill et/ou --verify")
+
+        company = None
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+            if company is None:
+                raise CommandError(f"Entreprise introuvable : {options['company']}")
+        start = _parse_date(options['start']) if options['start'] else None
+        end = _parse_date(options['end']) if options['end'] else None
+
+        if options['backfill']:
+            count = rebuild_rollups(company, start, end)
+            self.stdout.write(self.style.SUCCESS(f"{count} agrégat(s) journalier(s) reconstruit(s)"))
+
+        if options['verify']:
+            mismatches = verify_rollups(company, start, end)
+            for mismatch in mismatches[:50]:
+                self.stdout.write(
+                    f"{mismatch['company_id']} {mismatch['department'] or '-'} {mismatch['date']} : "
+                    f"attendu {mismatch['expected']}, stocké {mismatch['stored']}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} écart(s) détecté(s) ; relancer avec --backfill")
+            self.stdout.write(self.style.SUCCESS("Agrégats cohérents avec les présences"))
@@ -0,0 +1,62 @@
+"""
+Mesure l'export Excel journalier des présences sur un volume synthétique.
+
+Les lignes sont produites par un générateur : la mémoire mesurée est celle
+du moteur Excel, pas celle du jeu de données.
+
+Exemple :
+    python manage.py benchmark_attendance_excel --rows 100000
+"""
+import resource
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance.excel_generators import AttendanceExcelGenerator
+
+STATUSES = ['Présent', 'En retard', 'Absent', 'Excusé']
+
+
+def iter_attendances(count):
+    """Lignes au format attendu par generate_daily_report."""
+    for i in range(count):
+        yield {
+            'Employé': f"Employé {i + 1:06d}",
+            'Département': f"Département {i % 10 + 1}",
+            'Arrivée': f"08:{i % 60:02d}",
+            'Départ': '17:00',
+            'Statut': STATUSES[i % len(STATUSES)],
+            'Retard (min)': i % 45,
+            'Heures': round(7 + (i % 20) / 10, 1),
+        }
+
+
+class Command(BaseCommand):
+    help = "Benchmark de l'export Excel journalier des présences (durée, pic mémoire, taille)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        company = SimpleNamespace(name='Benchmark')
+        data = {
+            'date': 'Benchmark',
+            'summary': {'present': rows // 2, 'late': rows // 4, 'absent': rows // 4, 'excused': 0},
+            'attendances': iter_attendances(rows),
+        }
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        response = AttendanceExcelGenerator(company).generate_daily_report(data, 'benchmark')
+        size = sum(len(chunk) for chunk in response)
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # ru_maxrss est exprimé en Ko sous Linux
+        self.stdout.write(
+            f"{rows} ligne(s) : {elapsed:.2f} s, "
+            f"pic mémoire +{(rss_after - rss_before) / 1024:.0f} Mo, "
+            f"fichier {size / 1024 / 1024:.1f} Mo"
+        )
@@ -0,0 +1,72 @@
+"""
+Mesure l'ingestion d'une vague de pointages : un pointage à la fois
+(AttendanceService) contre ingestion en masse.
+
+Les employés sont créés dans une entreprise synthétique et toutes les
+écritures sont annulées en fin de mesure.
+
+Exemple :
+    python manage.py benchmark_attendance_ingest --events 5000
+"""
+import random
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.attendance.ingest import ingest_events
+from apps.attendance.services import AttendanceService
+from apps.company.models import Company
+from apps.core.benchmarking import create_employees, rolled_back
+from apps.core.query_budget import QueryCounter
+
+
+def morning_rush(employees, day, seed=0):
+    """Une arrivée par employé entre 8h00 et 9h59."""
+    rng = random.Random(seed)
+    start = datetime.combine(day, dtime(8, 0))
+    return [
+        (employee.id, day, (start + timedelta(seconds=rng.randrange(7200))).time(), 'in')
+        for employee in employees
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de l'ingestion des pointages (pointages/seconde, requêtes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['events']
+        self.stdout.write(f"{count} pointage(s) d'arrivée")
+        self.stdout.write(f"{'méthode':>16} {'durée (s)':>10} {'pointages/s':>12} {'requêtes':>9}")
+
+        with rolled_back():
+            company = Company.objects.create(
+                name="Benchmark présences", email=f"bench-{uuid.uuid4().hex[:8]}@example.com"
+            )
+            employees = create_employees(company, count)
+            AttendanceService.get_default_schedule(company)
+
+            def one_by_one():
+                day = date(2000, 1, 3)
+                for employee, (_, _, moment, _) in zip(employees, morning_rush(employees, day)):
+                    attendance = AttendanceService.get_or_create_daily_attendance(employee, day)
+                    AttendanceService.process_check_in(attendance, moment)
+
+            variants = (
+                ('un par un', one_by_one),
+                ('en masse', lambda: ingest_events(company, morning_rush(employees, date(2000, 1, 4)))),
+            )
+            for label, run in variants:
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    run()
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{label:>16} {elapsed:>10.3f} {count / elapsed:>12.0f} {queries.count:>9}"
+                )
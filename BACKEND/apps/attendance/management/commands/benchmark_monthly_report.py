@@ -0,0 +1,96 @@
+"""
+Mesure le rendu du rapport mensuel PDF avec et sans habillage de page compilé.
+
+Les données sont synthétiques : seule l'entreprise (charte PDF) est lue en base.
+
+Exemple :
+    python manage.py benchmark_monthly_report --company <uuid> --employees 500
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.company.models import Company
+from apps.pdf_templates.generators.attendance import AttendanceGenerator
+
+
+def build_monthly_data(employee_count, seed=0):
+    """Jeu de données mensuel au format attendu par generate_monthly_advanced_report."""
+    rng = random.Random(seed)
+    departments = [f"Département {i}" for i in range(1, 11)]
+    employee_stats = []
+    for i in range(employee_count):
+        present = rng.randint(10, 22)
+        late = rng.randint(0, 5)
+        absent = rng.randint(0, 4)
+        total = present + late + absent
+        employee_stats.append({
+            'employee_name': f"Employé {i + 1:04d}",
+            'department': departments[i % len(departments)],
+            'present': present,
+            'late': late,
+            'absent': absent,
+            'attendance_rate': (present + late) / total * 100,
+        })
+
+    department_stats = []
+    for name in departments:
+        rows = [e for e in employee_stats if e['department'] == name]
+        present = sum(e['present'] for e in rows)
+        late = sum(e['late'] for e in rows)
+        absent = sum(e['absent'] for e in rows)
+        total = present + late + absent or 1
+        department_stats.append({
+            'department': name,
+            'employees': len(rows),
+            'present': present,
+            'late': late,
+            'absent': absent,
+            'excused': 0,
+            'attendance_rate': (present + late) / total * 100,
+        })
+
+    return {
+        'month': 'Benchmark',
+        'stats': {'present_rate': 90.0, 'late_rate': 6.0, 'absent_rate': 4.0},
+        'alerts': [],
+        'department_stats': department_stats,
+        'employee_stats': employee_stats,
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark du rapport mensuel PDF (habillage de page par page vs Form XObject)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', help="ID de l'entreprise (défaut : la première)")
+        parser.add_argument('--employees', type=int, default=500)
+        parser.add_argument('--runs', type=int, default=3, help="Rendus par variante (meilleur temps retenu)")
+
+    def handle(self, *args, **options):
+        companies = Company.objects.all()
+        if options['company']:
+            companies = companies.filter(id=options['company'])
+        company = companies.first()
+        if company is None:
+            raise CommandError("Aucune entreprise trouvée")
+
+        data = build_monthly_data(options['employees'])
+        self.stdout.write(f"{options['employees']} employé(s), entreprise {company.name}")
+        self.stdout.write(f"{'habillage':>12} {'durée (s)':>10} {'pages':>6} {'Ko':>8}")
+
+        for label, compiled in (('par page', False), ('compilé', True)):
+            best = None
+            for _ in range(options['runs']):
+                generator = AttendanceGenerator(company)
+                generator.compile_page_chrome = compiled
+                start = time.perf_counter()
+                response = generator.generate_monthly_advanced_report(data, 'benchmark')
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            content = response.content
+            pages = content.count(b'/Type /Page\n')
+            self.stdout.write(
+                f"{label:>12} {best:>10.3f} {pages:>6} {len(content) / 1024:>8.1f}"
+            )
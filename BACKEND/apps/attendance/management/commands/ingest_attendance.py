@@ -0,0 +1,42 @@
+"""
+Importe des pointages depuis des fichiers CSV (colonnes employee, timestamp, direction).
+
+Exemple :
+    python manage.py ingest_attendance --company <uuid> badges_2024-05-02.csv --device "Badgeuse accueil"
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance.ingest import ingest_events, parse_events, read_csv_events
+from apps.company.models import Company
+
+
+class Command(BaseCommand):
+    help = "Ingestion en masse de pointages depuis des fichiers CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Fichiers CSV de pointages")
+        parser.add_argument('--company', required=True, help="ID de l'entreprise")
+        parser.add_argument('--device', help="Terminal d'origine des pointages")
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Entreprise introuvable : {options['company']}")
+
+        for path in options['files']:
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    events, errors = parse_events(read_csv_events(stream))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"{path} : {exc}")
+
+            for error in errors:
+                # Ligne 1 = en-tête du fichier
+                self.stderr.write(f"{path}:{error['line'] + 1} : {error['error']}")
+            result = ingest_events(company, events, device_info=options['device'])
+            for employee_id in result['unknown_employees']:
+                self.stderr.write(f"{path} : employé inconnu {employee_id}")
+            self.stdout.write(
+                f"{path} : {result['events']} pointage(s), {result['created']} présence(s) créée(s), "
+                f"{result['updated']} mise(s) à jour, {len(errors)} ligne(s) rejetée(s)"
+            )
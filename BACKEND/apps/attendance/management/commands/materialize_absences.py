@@ -0,0 +1,52 @@
+"""
+Crée les présences manquantes (absences, congés approuvés) des jours travaillés.
+
+Exemples :
+    python manage.py materialize_absences
+    python manage.py materialize_absences --company <uuid> --from 2024-01-01 --to 2024-02-01
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.attendance.absences import materialize_absences
+from apps.company.models import Company
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Date invalide : {value} (format attendu AAAA-MM-JJ)")
+
+
+class Command(BaseCommand):
+    help = "Matérialise les absences des jours travaillés (défaut : la veille)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', help="ID de l'entreprise (défaut : toutes les entreprises actives)")
+        parser.add_argument('--from', dest='start', help="Date de début incluse (AAAA-MM-JJ)")
+        parser.add_argument('--to', dest='end', help="Date de fin exclue (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        if options['company']:
+            companies = Company.objects.filter(pk=options['company'])
+            if not companies.exists():
+                raise CommandError(f"Entreprise introuvable : {options['company']}")
+        else:
+            companies = Company.objects.filter(is_active=True)
+
+        start = _parse_date(options['start']) if options['start'] else timezone.localdate() - timedelta(days=1)
+        end = _parse_date(options['end']) if options['end'] else start + timedelta(days=1)
+        if end <= start:
+            raise CommandError("--to doit être postérieure à --from")
+
+        absent = excused = 0
+        for company in companies:
+            result = materialize_absences(company, start, end)
+            absent += result['absent']
+            excused += result['excused']
+        self.stdout.write(self.style.SUCCESS(
+            f"{absent} absence(s) et {excused} congé(s) enregistré(s) du {start} au {end} (exclu)"
+        ))
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:12
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+STATUSES = ('present', 'late', 'absent', 'excused')
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceDailyRollup = apps.get_model('attendance', 'AttendanceDailyRollup')
+
+    rows = (
+        Attendance.objects
+        .annotate(dept=Coalesce('employee__department', Value('')))
+        .values('company_id', 'dept', 'date')
+        .annotate(
+            total_delay_minutes=Coalesce(Sum('delay_minutes'), 0),
+            total_worked_hours=Coalesce(Sum('worked_hours'), Value(Decimal('0'))),
+            **{status: Count('id', filter=Q(status=status)) for status in STATUSES}
+        )
+        .order_by()
+    )
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(
+            company_id=row['company_id'],
+            department=row['dept'],
+            date=row['date'],
+            total_delay_minutes=row['total_delay_minutes'],
+            total_worked_hours=row['total_worked_hours'],
+            **{status: row[status] for status in STATUSES}
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_attendance_options_attendance_delay_minutes_and_more'),
+        ('company', '0003_companybranding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.CharField(blank=True, default='', max_length=100, verbose_name='Département')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='Présents')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='En retard')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='Absents')),
+                ('excused', models.PositiveIntegerField(default=0, verbose_name='Excusés')),
+                ('total_delay_minutes', models.PositiveIntegerField(default=0, verbose_name='Retard cumulé (minutes)')),
+                ('total_worked_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Heures travaillées cumulées')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='company.company')),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier de présence',
+                'verbose_name_plural': 'Agrégats journaliers de présence',
+                'ordering': ['-date', 'department'],
+                'indexes': [models.Index(fields=['company', 'date'], name='attendance__company_54584c_idx')],
+                'unique_together': {('company', 'department', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:01
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_daily_rollup'),
+        ('company', '0003_companybranding'),
+        ('employees', '0002_alter_employee_date_hired'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkScheduleAssignment',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.CharField(blank=True, default='', max_length=100, verbose_name='Département')),
+                ('start_date', models.DateField(verbose_name='Début')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Fin (incluse)')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_schedule_assignments', to='company.company')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedule_assignments', to='employees.employee', verbose_name='Employé')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='attendance.workschedule')),
+            ],
+            options={
+                'verbose_name': "Affectation d'horaire",
+                'verbose_name_plural': "Affectations d'horaires",
+                'ordering': ['-start_date'],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('employee__isnull', False), ('department', '')), models.Q(('employee__isnull', True), models.Q(('department', ''), _negated=True)), _connector='OR'), name='schedule_assignment_employee_xor_department')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_work_schedule_assignment'),
+        ('company', '0003_companybranding'),
+        ('employees', '0002_alter_employee_date_hired'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['company', '-date', '-id'], name='attendance__company_d1cda8_idx'),
+        ),
+    ]
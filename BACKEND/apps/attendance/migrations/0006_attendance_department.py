@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:01
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+STATUSES = ('present', 'late', 'absent', 'excused')
+
+
+def backfill_departments(apps, schema_editor):
+    """Département actuel des employés (seule valeur connue), puis agrégats recalculés."""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceDailyRollup = apps.get_model('attendance', 'AttendanceDailyRollup')
+    Employee = apps.get_model('employees', 'Employee')
+
+    Attendance.objects.update(department=Coalesce(
+        Subquery(Employee.objects.filter(pk=OuterRef('employee_id')).values('department')[:1]),
+        Value(''),
+    ))
+
+    rows = (
+        Attendance.objects
+        .values('company_id', 'department', 'date')
+        .annotate(
+            total_delay_minutes=Coalesce(Sum('delay_minutes'), 0),
+            total_worked_hours=Coalesce(Sum('worked_hours'), Value(Decimal('0'))),
+            **{status: Count('id', filter=Q(status=status)) for status in STATUSES}
+        )
+        .order_by()
+    )
+    AttendanceDailyRollup.objects.all().delete()
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(
+            company_id=row['company_id'],
+            department=row['department'],
+            date=row['date'],
+            total_delay_minutes=row['total_delay_minutes'],
+            total_worked_hours=row['total_worked_hours'],
+            **{status: row[status] for status in STATUSES}
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendance_keyset_index'),
+        ('employees', '0002_alter_employee_date_hired'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='department',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Département'),
+        ),
+        migrations.RunPython(backfill_departments, migrations.RunPython.noop),
+    ]
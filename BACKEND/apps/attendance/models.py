@@ -31,13 +31,60 @@ class WorkSchedule(BaseModel):
     is_saturday = models.BooleanField(default=False, verbose_name=_("Samedi"))
     is_sunday = models.BooleanField(default=False, verbose_name=_("Dimanche"))
 
+    # Champs des jours travaillés, dans l'ordre de date.weekday()
+    WEEKDAY_FIELDS = (
+        'is_monday', 'is_tuesday', 'is_wednesday', 'is_thursday',
+        'is_friday', 'is_saturday', 'is_sunday',
+    )
+
     class Meta:
         verbose_name = _("Horaire de travail")
         verbose_name_plural = _("Horaires de travail")
 
+    def works_on(self, day):
+        """Indique si le jour donné est travaillé selon cet horaire."""
+        return getattr(self, self.WEEKDAY_FIELDS[day.weekday()])
+
     def __str__(self):
         return f"{self.name} ({self.start_time.strftime('%H:%M')} - {self.end_time.strftime('%H:%M')})"
 
+class WorkScheduleAssignment(BaseModel):
+    """
+    Affectation d'un horaire à un employé ou à un département sur une période.
+
+    Pour un jour donné, l'affectation individuelle l'emporte sur celle du
+    département, puis sur l'horaire par défaut de l'entreprise (voir
+    apps.attendance.schedules).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='work_schedule_assignments')
+    schedule = models.ForeignKey(WorkSchedule, on_delete=models.CASCADE, related_name='assignments')
+    employee = models.ForeignKey(
+        Employee, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='schedule_assignments', verbose_name=_("Employé")
+    )
+    department = models.CharField(max_length=100, blank=True, default='', verbose_name=_("Département"))
+    start_date = models.DateField(verbose_name=_("Début"))
+    end_date = models.DateField(null=True, blank=True, verbose_name=_("Fin (incluse)"))
+
+    class Meta:
+        verbose_name = _("Affectation d'horaire")
+        verbose_name_plural = _("Affectations d'horaires")
+        ordering = ['-start_date']
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    (models.Q(employee__isnull=False) & models.Q(department=''))
+                    | (models.Q(employee__isnull=True) & ~models.Q(department=''))
+                ),
+                name='schedule_assignment_employee_xor_department',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.employee or self.department
+        return f"{self.schedule} - {target} ({self.start_date} → {self.end_date or '...'})"
+
+
 class Attendance(BaseModel):
     """
     Enregistrement de présence quotidien.
@@ -55,6 +102,11 @@ class Attendance(BaseModel):
     
     # Snapshot de l'horaire appliqué ce jour-là (pour garder l'historique si l'horaire change)
     schedule = models.ForeignKey(WorkSchedule, on_delete=models.SET_NULL, null=True, blank=True, related_name='attendances')
+    # Département de l'employé à la création : clé de l'agrégat journalier,
+    # inchangée si l'employé change ensuite de département
+    department = models.CharField(
+        max_length=100, blank=True, default='', editable=False, verbose_name=_("Département")
+    )
     
     check_in = models.TimeField(null=True, blank=True, verbose_name=_("Arrivée"))
     check_out = models.TimeField(null=True, blank=True, verbose_name=_("Départ"))
@@ -76,6 +128,55 @@ class Attendance(BaseModel):
         verbose_name = _("Présence")
         verbose_name_plural = _("Présences")
         ordering = ['-date', 'employee__user__last_name']
+        indexes = [
+            # Pagination par clé des présences de l'entreprise
+            models.Index(fields=['company', '-date', '-id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.department:
+            self.department = self.employee.department or ''
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee} - {self.date} - {self.get_status_display()}"
+
+
+class AttendanceDailyRollup(BaseModel):
+    """
+    Agrégats journaliers de présence par entreprise et département.
+
+    Maintenus au fil des pointages (voir apps.attendance.rollup) afin que les
+    rapports mensuels et annuels lisent une ligne par jour et par département
+    au lieu de rescanner toutes les présences.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='attendance_rollups')
+    # Chaîne vide pour les employés sans département
+    department = models.CharField(max_length=100, blank=True, default='', verbose_name=_("Département"))
+    date = models.DateField(verbose_name=_("Date"))
+
+    present = models.PositiveIntegerField(default=0, verbose_name=_("Présents"))
+    late = models.PositiveIntegerField(default=0, verbose_name=_("En retard"))
+    absent = models.PositiveIntegerField(default=0, verbose_name=_("Absents"))
+    excused = models.PositiveIntegerField(default=0, verbose_name=_("Excusés"))
+
+    total_delay_minutes = models.PositiveIntegerField(default=0, verbose_name=_("Retard cumulé (minutes)"))
+    total_worked_hours = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name=_("Heures travaillées cumulées")
+    )
+
+    class Meta:
+        unique_together = ('company', 'department', 'date')
+        verbose_name = _("Agrégat journalier de présence")
+        verbose_name_plural = _("Agrégats journaliers de présence")
+        ordering = ['-date', 'department']
+        indexes = [
+            models.Index(fields=['company', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.company} - {self.department or '-'} - {self.date}"
+
+    @property
+    def total(self):
+        return self.present + self.late + self.absent + self.excused
@@ -0,0 +1,244 @@
+"""
+Agrégats journaliers de présence (AttendanceDailyRollup).
+
+Chaque modification d'une présence applique à la ligne (entreprise,
+département, date) concernée la différence entre l'état avant et après
+modification, via des mises à jour atomiques ``F()``. Le département est
+celui enregistré sur la présence à sa création (``Attendance.department``) :
+un changement de département de l'employé ne déplace pas son historique. ``rebuild_rollups``
+recalcule les agrégats depuis les présences (backfill) et
+``verify_rollups`` détecte les écarts.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Attendance, AttendanceDailyRollup
+from .stats import STATUSES, _rate
+
+COUNTERS = STATUSES + ('total_delay_minutes', 'total_worked_hours')
+
+RollupState = namedtuple('RollupState', 'company_id department date status delay_minutes worked_hours')
+
+
+def attendance_state(attendance):
+    """
+    État d'une présence tel que compté dans les agrégats.
+
+    À capturer avant toute modification, puis après, et à passer à
+    ``record_change``. Retourne None pour une présence non enregistrée.
+    """
+    if attendance is None or attendance._state.adding:
+        return None
+    return RollupState(
+        company_id=attendance.company_id,
+        department=attendance.department,
+        date=attendance.date,
+        status=attendance.status,
+        delay_minutes=attendance.delay_minutes or 0,
+        worked_hours=Decimal(str(attendance.worked_hours or 0)),
+    )
+
+
+def _contribution(state, sign):
+    values = {
+        'total_delay_minutes': sign * state.delay_minutes,
+        'total_worked_hours': sign * state.worked_hours,
+    }
+    if state.status in STATUSES:
+        values[state.status] = sign
+    return values
+
+
+def record_change(before, after):
+    """
+    Applique aux agrégats la différence entre deux états d'une présence.
+
+    ``before`` vaut None pour une création, ``after`` None pour une suppression.
+    """
+    record_changes([(before, after)])
+
+
+def record_changes(changes):
+    """
+    Applique aux agrégats un lot de changements ``(before, after)``.
+
+    Les différences sont cumulées par (entreprise, département, date) :
+    une seule mise à jour par ligne d'agrégat, quel que soit le nombre de
+    présences modifiées.
+    """
+    deltas = {}
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            key = (state.company_id, state.department, state.date)
+            bucket = deltas.setdefault(key, {})
+            for field, value in _contribution(state, sign).items():
+                bucket[field] = bucket.get(field, 0) + value
+
+    for (company_id, department, day), fields in deltas.items():
+        fields = {field: value for field, value in fields.items() if value}
+        if not fields:
+            continue
+        with transaction.atomic():
+            rollup, _ = AttendanceDailyRollup.objects.get_or_create(
+                company_id=company_id, department=department, date=day
+            )
+            AttendanceDailyRollup.objects.filter(pk=rollup.pk).update(
+                **{field: F(field) + value for field, value in fields.items()}
+            )
+
+
+def _aggregated_rows(company=None, start=None, end=None):
+    """Agrégats recalculés depuis les présences, une ligne par (entreprise, département, jour)."""
+    queryset = Attendance.objects.all()
+    if company is not None:
+        queryset = queryset.filter(company=company)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lt=end)
+
+    return (
+        queryset
+        .annotate(dept=F('department'))
+        .values('company_id', 'dept', 'date')
+        .annotate(
+            total_delay_minutes=Coalesce(Sum('delay_minutes'), 0),
+            total_worked_hours=Coalesce(Sum('worked_hours'), Value(Decimal('0'))),
+            **{status: Count('id', filter=Q(status=status)) for status in STATUSES}
+        )
+        .order_by()
+    )
+
+
+def _rollup_queryset(company=None, start=None, end=None):
+    queryset = AttendanceDailyRollup.objects.all()
+    if company is not None:
+        queryset = queryset.filter(company=company)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lt=end)
+    return queryset
+
+
+def rebuild_rollups(company=None, start=None, end=None, batch_size=1000):
+    """
+    Recalcule les agrégats sur la période [start, end[ (tout l'historique par défaut).
+
+    Returns:
+        Nombre de lignes d'agrégats créées
+    """
+    rollups = [
+        AttendanceDailyRollup(
+            company_id=row['company_id'],
+            department=row['dept'],
+            date=row['date'],
+            total_delay_minutes=row['total_delay_minutes'],
+            total_worked_hours=row['total_worked_hours'],
+            **{status: row[status] for status in STATUSES}
+        )
+        for row in _aggregated_rows(company, start, end)
+    ]
+    with transaction.atomic():
+        _rollup_queryset(company, start, end).delete()
+        AttendanceDailyRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
+
+
+def verify_rollups(company=None, start=None, end=None):
+    """
+    Compare les agrégats stockés aux présences.
+
+    Returns:
+        Liste des écarts : dicts (company_id, department, date, expected, stored)
+    """
+    expected = {
+        (row['company_id'], row['dept'], row['date']): {field: row[field] for field in COUNTERS}
+        for row in _aggregated_rows(company, start, end)
+    }
+    stored = {
+        (row['company_id'], row['department'], row['date']): {field: row[field] for field in COUNTERS}
+        for row in _rollup_queryset(company, start, end).values(
+            'company_id', 'department', 'date', *COUNTERS
+        )
+    }
+
+    empty = {field: 0 for field in COUNTERS}
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (str(k[0]), k[1], k[2])):
+        exp = expected.get(key, empty)
+        got = stored.get(key, empty)
+        if any(Decimal(str(exp[field])) != Decimal(str(got[field])) for field in COUNTERS):
+            company_id, department, day = key
+            mismatches.append({
+                'company_id': company_id, 'department': department, 'date': day,
+                'expected': exp, 'stored': got,
+            })
+    return mismatches
+
+
+def rollup_totals(company, start, end):
+    """Comptes par statut de l'entreprise sur [start, end[, lus dans les agrégats."""
+    totals = _rollup_queryset(company, start, end).aggregate(
+        **{status: Coalesce(Sum(status), 0) for status in STATUSES}
+    )
+    totals['total'] = sum(totals[status] for status in STATUSES)
+    return totals
+
+
+def rollup_rates(company, start, end):
+    """Taux globaux (présence, retard, absence) lus dans les agrégats."""
+    totals = rollup_totals(company, start, end)
+    return {
+        'present_rate': _rate(totals['present'], totals['total']),
+        'late_rate': _rate(totals['late'], totals['total']),
+        'absent_rate': _rate(totals['absent'], totals['total']),
+    }
+
+
+def rollup_department_stats(company, start, end):
+    """
+    Agrégats par département sur [start, end[, lus dans les agrégats.
+
+    Même format que ``AttendanceStats.department_stats``.
+    """
+    from apps.employees.models import Employee
+
+    headcount = {}
+    for row in (
+        Employee.objects.filter(company=company)
+        .annotate(dept=Coalesce('department', Value('')))
+        .values('dept').annotate(n=Count('id')).order_by()
+    ):
+        headcount[row['dept'] or '-'] = headcount.get(row['dept'] or '-', 0) + row['n']
+
+    departments = {
+        name: {'department': name, 'employees': count, 'total': 0, **{status: 0 for status in STATUSES}}
+        for name, count in headcount.items()
+    }
+    for row in (
+        _rollup_queryset(company, start, end)
+        .values('department')
+        .annotate(**{status: Sum(status) for status in STATUSES})
+        .order_by()
+    ):
+        name = row['department'] or '-'
+        dept = departments.setdefault(name, {
+            'department': name, 'employees': 0, 'total': 0, **{status: 0 for status in STATUSES},
+        })
+        for status in STATUSES:
+            dept[status] += row[status] or 0
+            dept['total'] += row[status] or 0
+
+    stats = []
+    for name in sorted(departments):
+        dept = departments[name]
+        dept['attendance_rate'] = _rate(dept['present'] + dept['late'], dept['total'])
+        stats.append(dept)
+    return stats
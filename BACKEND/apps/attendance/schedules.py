@@ -0,0 +1,79 @@
+"""
+Résolution des horaires de travail par employé.
+
+Un horaire s'applique à un employé ou à un département sur une période
+(WorkScheduleAssignment, date de fin incluse et facultative). Pour un jour
+donné, l'affectation individuelle l'emporte sur celle du département, puis
+sur l'horaire par défaut de l'entreprise (le premier créé).
+
+L'index des horaires d'une entreprise est construit en deux requêtes et
+partagé par tous les pointages du processus (``ProcessCache``). Une
+écriture sur un horaire ou une affectation fait reconstruire l'index au
+pointage suivant du même processus (voir signals.py) ; les autres
+processus appliquent une nouvelle affectation au plus tard
+WORK_SCHEDULE_CACHE_TTL secondes après.
+"""
+from apps.core.utils.process_cache import ProcessCache
+
+from .models import WorkSchedule, WorkScheduleAssignment
+
+
+class ScheduleIndex:
+    """
+    Horaires et affectations d'une entreprise, indexés en mémoire.
+
+    Partagé entre threads : les horaires doivent être traités en lecture seule.
+    """
+
+    def __init__(self, schedules, assignments):
+        self.schedules = {schedule.pk: schedule for schedule in schedules}
+        self.default = schedules[0] if schedules else None
+        self._by_employee = {}
+        self._by_department = {}
+        # Affectations les plus récentes en premier
+        for assignment in sorted(assignments, key=lambda a: a.start_date, reverse=True):
+            if assignment.employee_id:
+                bucket = self._by_employee.setdefault(assignment.employee_id, [])
+            else:
+                bucket = self._by_department.setdefault(assignment.department, [])
+            bucket.append((assignment.start_date, assignment.end_date, assignment.schedule_id))
+
+    @classmethod
+    def load(cls, company_id):
+        schedules = list(WorkSchedule.objects.filter(company_id=company_id).order_by('created_at', 'pk'))
+        assignments = WorkScheduleAssignment.objects.filter(company_id=company_id).only(
+            'employee_id', 'department', 'start_date', 'end_date', 'schedule_id'
+        )
+        return cls(schedules, list(assignments))
+
+    @staticmethod
+    def _match(periods, day):
+        for start, end, schedule_id in periods:
+            if start <= day and (end is None or day <= end):
+                return schedule_id
+        return None
+
+    def resolve(self, employee_id, department, day):
+        """
+        Horaire applicable à un employé un jour donné.
+
+        Returns:
+            WorkSchedule, ou None si l'entreprise n'a aucun horaire
+        """
+        schedule_id = self._match(self._by_employee.get(employee_id, ()), day)
+        if schedule_id is None and department:
+            schedule_id = self._match(self._by_department.get(department, ()), day)
+        return self.schedules.get(schedule_id, self.default)
+
+
+_cache = ProcessCache('WORK_SCHEDULE_CACHE_TTL')
+
+
+def get_schedule_index(company_id):
+    """Index des horaires de l'entreprise, depuis le cache du processus."""
+    return _cache.get(company_id, lambda: ScheduleIndex.load(company_id))
+
+
+def invalidate_schedule_index(company_id=None):
+    """Invalide l'index d'une entreprise (ou de toutes si company_id est None)."""
+    _cache.invalidate(company_id)
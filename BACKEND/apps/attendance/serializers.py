@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Attendance, WorkSchedule
+from .models import Attendance, WorkSchedule, WorkScheduleAssignment
 
 class WorkScheduleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,6 +12,36 @@ class WorkScheduleSerializer(serializers.ModelSerializer):
         validated_data['company'] = request.user.company
         return super().create(validated_data)
 
+class WorkScheduleAssignmentSerializer(serializers.ModelSerializer):
+    schedule_name = serializers.CharField(source='schedule.name', read_only=True)
+
+    class Meta:
+        model = WorkScheduleAssignment
+        fields = '__all__'
+        read_only_fields = ('id', 'company', 'created_at', 'updated_at')
+
+    def validate(self, attrs):
+        company = self.context['request'].user.company
+        employee = attrs.get('employee', getattr(self.instance, 'employee', None))
+        department = attrs.get('department', getattr(self.instance, 'department', ''))
+        schedule = attrs.get('schedule', getattr(self.instance, 'schedule', None))
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+
+        if bool(employee) == bool(department):
+            raise serializers.ValidationError("Préciser soit un employé, soit un département.")
+        if employee and employee.company_id != company.id:
+            raise serializers.ValidationError({'employee': "Employé inconnu."})
+        if schedule and schedule.company_id != company.id:
+            raise serializers.ValidationError({'schedule': "Horaire inconnu."})
+        if end_date and start_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': "La fin doit suivre le début."})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['company'] = self.context['request'].user.company
+        return super().create(validated_data)
+
 class AttendanceSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.user.get_full_name', read_only=True)
     department_name = serializers.SerializerMethodField()
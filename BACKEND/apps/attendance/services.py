@@ -1,6 +1,10 @@
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
+from django.db import transaction
 from django.db.models import Sum, Count, Avg, Q
 from .models import Attendance, WorkSchedule
+from .rollup import attendance_state, record_change, rollup_department_stats, rollup_rates
+from .schedules import get_schedule_index
+from .stats import AttendanceStats, month_bounds
 
 class AttendanceService:
     @staticmethod
@@ -8,38 +12,63 @@ class AttendanceService:
         """
         Récupère ou initialise une fiche de présence pour un employé et une date donnée.
         """
-        attendance, created = Attendance.objects.get_or_create(
-            employee=employee,
-            date=attendance_date,
-            defaults={
-                'company': employee.company,
-                'status': 'absent' # Par défaut jusqu'au check-in
-            }
-        )
+        with transaction.atomic():
+            attendance, created = Attendance.objects.get_or_create(
+                employee=employee,
+                date=attendance_date,
+                defaults={
+                    'company': employee.company,
+                    'status': 'absent' # Par défaut jusqu'au check-in
+                }
+            )
+            if created:
+                record_change(None, attendance_state(attendance))
         
-        # Assigner un horaire par défaut si non défini
-        if created or not attendance.schedule:
-            # TODO: Logique pour trouver l'horaire spécifique de l'employé si implémenté
-            # Pour l'instant, on prend le premier horaire de l'entreprise ou on en crée un par défaut
-            schedule = WorkSchedule.objects.filter(company=employee.company).first()
-            if not schedule:
-                schedule = WorkSchedule.objects.create(
-                    company=employee.company,
-                    name="Horaire Standard",
-                    start_time="09:00",
-                    end_time="17:00"
-                )
-            attendance.schedule = schedule
+        # Assigner l'horaire applicable si non défini
+        if created or attendance.schedule_id is None:
+            attendance.schedule = AttendanceService.get_schedule(employee, attendance_date)
             attendance.save(update_fields=['schedule'])
             
         return attendance
 
+    @staticmethod
+    def get_schedule(employee, attendance_date):
+        """
+        Horaire applicable à un employé un jour donné (affectation
+        individuelle, puis du département, puis horaire par défaut).
+        """
+        schedule = get_schedule_index(employee.company_id).resolve(
+            employee.pk, employee.department, attendance_date
+        )
+        return schedule or AttendanceService.get_default_schedule(employee.company)
+
+    @staticmethod
+    def get_default_schedule(company):
+        """
+        Horaire par défaut de l'entreprise (le premier créé), créé s'il n'existe pas.
+        """
+        schedule = get_schedule_index(company.pk).default
+        if not schedule:
+            schedule = WorkSchedule.objects.create(
+                company=company,
+                name="Horaire Standard",
+                start_time=time(9, 0),
+                end_time=time(17, 0)
+            )
+        return schedule
+
     @staticmethod
     def process_check_in(attendance, time_now, ip_address=None, device_info=None):
         """
         Traite le pointage d'arrivée. Calcule le retard et met à jour le statut.
         """
+        before = attendance_state(attendance)
         attendance.check_in = time_now
+        if attendance.schedule_id and not Attendance.schedule.is_cached(attendance):
+            # Horaire lu dans l'index plutôt qu'en base
+            schedule = get_schedule_index(attendance.company_id).schedules.get(attendance.schedule_id)
+            if schedule is not None:
+                attendance.schedule = schedule
         attendance.ip_address = ip_address
         attendance.device_info = device_info
         
@@ -63,7 +92,9 @@ class AttendanceService:
         else:
             attendance.status = 'present'
         
-        attendance.save()
+        with transaction.atomic():
+            attendance.save()
+            record_change(before, attendance_state(attendance))
         return attendance
 
     @staticmethod
@@ -71,6 +102,7 @@ class AttendanceService:
         """
         Traite le pointage de départ. Calcule les heures travaillées.
         """
+        before = attendance_state(attendance)
         attendance.check_out = time_now
         
         if attendance.check_in:
@@ -83,83 +115,66 @@ class AttendanceService:
             hours = duration.total_seconds() / 3600
             attendance.worked_hours = round(hours, 2)
             
-        attendance.save()
+        with transaction.atomic():
+            attendance.save()
+            record_change(before, attendance_state(attendance))
+        return attendance
+
+    @staticmethod
+    def excuse(attendance, notes=None):
+        """
+        Excuse une absence ou un retard justifié : le statut passe à 'excused'.
+        """
+        before = attendance_state(attendance)
+        attendance.status = 'excused'
+        update_fields = ['status', 'updated_at']
+        if notes is not None:
+            attendance.notes = notes
+            update_fields.append('notes')
+
+        with transaction.atomic():
+            attendance.save(update_fields=update_fields)
+            record_change(before, attendance_state(attendance))
         return attendance
 
     @staticmethod
     def get_daily_stats(company, report_date):
         """
-        Statistiques pour une journée donnée.
+        Statistiques pour une journée donnée (une seule requête).
         """
-        total_employees = company.employees.count()
-        attendances = Attendance.objects.filter(company=company, date=report_date)
-        
-        stats = {
-            'total': total_employees,
-            'present': attendances.filter(status='present').count(),
-            'late': attendances.filter(status='late').count(),
-            'absent': total_employees - attendances.filter(status__in=['present', 'late', 'excused']).count(), # Approximation
-            'excused': attendances.filter(status='excused').count(),
-        }
-        # Correction pour absent: ceux qui n'ont pas de record ou record 'absent'
-        # Mais ici on compte les records 'absent' explicitement
-        stats['absent'] = attendances.filter(status='absent').count()
-        
-        return stats
+        return AttendanceStats.daily(company, report_date)
 
     @staticmethod
     def get_monthly_stats(company, year, month):
         """
-        Statistiques globales pour le mois.
+        Statistiques globales pour le mois (lues dans les agrégats journaliers).
         """
-        attendances = Attendance.objects.filter(
-            company=company, 
-            date__year=year, 
-            date__month=month
-        )
-        
-        total_records = attendances.count()
-        if total_records == 0:
-            return {'present_rate': 0, 'late_rate': 0, 'absent_rate': 0}
-            
-        return {
-            'present_rate': (attendances.filter(status='present').count() / total_records) * 100,
-            'late_rate': (attendances.filter(status='late').count() / total_records) * 100,
-            'absent_rate': (attendances.filter(status='absent').count() / total_records) * 100,
-        }
+        return rollup_rates(company, *month_bounds(year, month))
 
     @staticmethod
     def get_employee_monthly_stats(company, year, month):
         """
         Détail par employé pour le mois.
         """
-        from apps.employees.models import Employee
-        
-        employees = Employee.objects.filter(company=company)
-        stats = []
-        
-        for emp in employees:
-            emp_attendances = Attendance.objects.filter(
-                employee=emp,
-                date__year=year,
-                date__month=month
-            )
-            
-            total = emp_attendances.count()
-            present = emp_attendances.filter(status='present').count()
-            late = emp_attendances.filter(status='late').count()
-            absent = emp_attendances.filter(status='absent').count()
-            
-            # Safe department access
-            dept_name = emp.department if emp.department else "-"
-            
-            stats.append({
-                'employee_name': emp.user.get_full_name(),
-                'department': dept_name,
-                'present': present,
-                'late': late,
-                'absent': absent,
-                'attendance_rate': ((present + late) / total * 100) if total > 0 else 0
-            })
-            
-        return stats
+        return AttendanceStats.for_month(company, year, month).employee_stats()
+
+    @staticmethod
+    def get_department_monthly_stats(company, year, month):
+        """
+        Détail par département pour le mois (lu dans les agrégats journaliers).
+        """
+        return rollup_department_stats(company, *month_bounds(year, month))
+
+    @staticmethod
+    def get_monthly_report(company, year, month):
+        """
+        Blocs du rapport mensuel : taux et répartition par département lus
+        dans les agrégats journaliers, détail par employé calculé sur les
+        présences.
+        """
+        start, end = month_bounds(year, month)
+        return {
+            'stats': rollup_rates(company, start, end),
+            'employee_stats': AttendanceStats(company, start, end).employee_stats(),
+            'department_stats': rollup_department_stats(company, start, end),
+        }
@@ -0,0 +1,70 @@
+"""
+Invalidation de l'index des horaires à chaque modification d'un horaire ou
+d'une affectation, mise à jour des agrégats journaliers lorsque les
+présences d'un employé sont supprimées en cascade, et reclassement des
+absences déjà matérialisées lorsqu'un congé approuvé est enregistré, quitte
+ce statut, change de période ou est supprimé.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.company.models import Company
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+
+from .absences import reclassify_absences
+from .models import Attendance, WorkSchedule, WorkScheduleAssignment
+from .rollup import attendance_state, record_changes
+from .schedules import invalidate_schedule_index
+
+
+@receiver([post_save, post_delete], sender=WorkSchedule)
+@receiver([post_save, post_delete], sender=WorkScheduleAssignment)
+def invalidate_schedule_cache(sender, instance, **kwargs):
+    invalidate_schedule_index(instance.company_id)
+
+
+@receiver(pre_delete, sender=Employee)
+def remove_employee_attendances_from_rollups(sender, instance, origin=None, **kwargs):
+    # Suppression de l'entreprise : ses agrégats sont supprimés avec elle
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) is Company:
+        return
+    record_changes(
+        (attendance_state(attendance), None)
+        for attendance in Attendance.objects.filter(employee=instance).order_by()
+    )
+
+
+@receiver(pre_save, sender=Leave)
+def remember_approved_leave_period(sender, instance, raw=False, **kwargs):
+    # Période approuvée avant modification : ses jours peuvent ne plus être couverts
+    instance._approved_period = None
+    if raw or instance._state.adding:
+        return
+    instance._approved_period = Leave.objects.filter(
+        pk=instance.pk, status='approved',
+    ).values_list('start_date', 'end_date').first()
+
+
+@receiver(post_save, sender=Leave)
+def reclassify_absences_on_leave_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    periods = [getattr(instance, '_approved_period', None)]
+    if instance.status == 'approved':
+        periods.append((instance.start_date, instance.end_date))
+    periods = [period for period in periods if period is not None]
+    if periods:
+        reclassify_absences(
+            instance.employee_id, min(start for start, _ in periods), max(end for _, end in periods),
+        )
+
+
+@receiver(post_delete, sender=Leave)
+def reclassify_absences_on_leave_deletion(sender, instance, origin=None, **kwargs):
+    # Suppression de l'employé ou de l'entreprise : ses présences partent avec lui
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) is not Leave:
+        return
+    if instance.status == 'approved':
+        reclassify_absences(instance.employee_id, instance.start_date, instance.end_date)
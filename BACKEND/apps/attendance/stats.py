@@ -0,0 +1,191 @@
+"""
+Moteur de statistiques de présence.
+
+Les répartitions par employé, par département et globales sont calculées à
+partir d'une seule requête groupée (agrégation conditionnelle par statut),
+quel que soit l'effectif de l'entreprise. Les lignes par employé sont
+chargées dans un ``ReportFrame`` : totaux et taux en sont dérivés colonne
+par colonne.
+
+Comme les agrégats journaliers (rollup.py), les présences sont réparties
+selon le département enregistré sur chaque présence, et non selon le
+département actuel de l'employé : la requête groupe aussi par ce
+département, un employé muté en cours de période a donc une ligne par
+département.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, FilteredRelation, Q
+
+from apps.core.utils.reports import ReportFrame
+
+STATUSES = ('present', 'late', 'absent', 'excused')
+
+
+def month_bounds(year, month):
+    """Retourne (premier jour du mois, premier jour du mois suivant)."""
+    start = date(int(year), int(month), 1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _status_counts(relation):
+    """Agrégats COUNT conditionnels par statut sur la relation filtrée."""
+    counts = {'total': Count(relation)}
+    for status in STATUSES:
+        counts[status] = Count(relation, filter=Q(**{f'{relation}__status': status}))
+    return counts
+
+
+def status_summary(queryset):
+    """Comptes par statut et total d'un queryset de présences (un seul agrégat)."""
+    return queryset.aggregate(
+        **{status: Count('id', filter=Q(status=status)) for status in STATUSES},
+        total=Count('id'),
+    )
+
+
+def _department(name):
+    return name or '-'
+
+
+def _rate(part, total):
+    return (part / total * 100) if total > 0 else 0
+
+
+def _rates(parts, totals):
+    """Version vectorisée de ``_rate`` sur deux colonnes."""
+    totals = totals.astype(float)
+    return (parts.astype(float) / totals.where(totals > 0) * 100).fillna(0.0)
+
+
+class AttendanceStats:
+    """
+    Statistiques de présence d'une entreprise sur une période [start, end[.
+
+    La requête groupée par employé est exécutée une seule fois ; les
+    agrégats par département et globaux en sont dérivés.
+    """
+
+    def __init__(self, company, start, end):
+        self.company = company
+        self.start = start
+        self.end = end
+        self._rows = None
+        self._report = None
+
+    @classmethod
+    def for_month(cls, company, year, month):
+        start, end = month_bounds(year, month)
+        return cls(company, start, end)
+
+    def _employee_rows(self):
+        if self._rows is None:
+            from apps.employees.models import Employee
+
+            self._rows = list(
+                Employee.objects.filter(company=self.company)
+                .annotate(period=FilteredRelation(
+                    'attendances',
+                    condition=Q(attendances__date__gte=self.start, attendances__date__lt=self.end),
+                ))
+                .values('id', 'department', 'period__department', 'user__first_name', 'user__last_name')
+                .annotate(**_status_counts('period'))
+                .order_by('user__last_name', 'user__first_name', 'id')
+            )
+        return self._rows
+
+    def _employee_totals(self):
+        """Une ligne par employé : lignes de ses différents départements additionnées."""
+        employees = {}
+        for row in self._employee_rows():
+            merged = employees.get(row['id'])
+            if merged is None:
+                employees[row['id']] = dict(row)
+            else:
+                for column in ('total', *STATUSES):
+                    merged[column] += row[column]
+        return list(employees.values())
+
+    def _frame(self):
+        """
+        Lignes par employé dans un DataFrame, avec département normalisé et
+        taux de présence calculés une fois pour toutes les répartitions.
+        """
+        if self._report is None:
+            frame = ReportFrame.from_records(
+                self._employee_totals(),
+                columns=['id', 'department', 'user__first_name', 'user__last_name', 'total', *STATUSES],
+            )
+            frame['department'] = frame['department'].fillna('').replace('', '-')
+            frame['employee_name'] = (frame['user__first_name'] + ' ' + frame['user__last_name']).str.strip()
+            frame['attendance_rate'] = _rates(frame['present'] + frame['late'], frame['total'])
+            self._report = frame
+        return self._report
+
+    def employee_stats(self):
+        """Détail par employé (même format que l'ancien calcul ligne à ligne)."""
+        return self._frame().records({
+            'employee_name': 'employee_name',
+            'department': 'department',
+            'present': 'present',
+            'late': 'late',
+            'absent': 'absent',
+            'attendance_rate': 'attendance_rate',
+        })
+
+    def department_stats(self):
+        """
+        Agrégats par département, triés par nom (même résultat que
+        ``rollup_department_stats``) : présences selon le département
+        enregistré sur chacune, effectif selon le département actuel.
+        """
+        departments = {}
+
+        def department(name):
+            return departments.setdefault(name, {
+                'department': name, 'employees': 0, 'total': 0, **{status: 0 for status in STATUSES},
+            })
+
+        for row in self._employee_totals():
+            department(_department(row['department']))['employees'] += 1
+        for row in self._employee_rows():
+            if not row['total']:
+                continue
+            dept = department(_department(row['period__department']))
+            for column in ('total', *STATUSES):
+                dept[column] += row[column]
+
+        stats = []
+        for name in sorted(departments):
+            dept = departments[name]
+            dept['attendance_rate'] = _rate(dept['present'] + dept['late'], dept['total'])
+            stats.append(dept)
+        return stats
+
+    def totals(self):
+        """Comptes globaux de l'entreprise sur la période."""
+        frame = self._frame()
+        return {'employees': len(frame), **frame.totals(['total', *STATUSES])}
+
+    def rates(self):
+        """Taux globaux (présence, retard, absence) sur la période."""
+        totals = self.totals()
+        total = totals['total']
+        return {
+            'present_rate': _rate(totals['present'], total),
+            'late_rate': _rate(totals['late'], total),
+            'absent_rate': _rate(totals['absent'], total),
+        }
+
+    @staticmethod
+    def daily(company, report_date):
+        """Statistiques d'une journée : effectif total et comptes par statut."""
+        from apps.employees.models import Employee
+
+        return Employee.objects.filter(company=company).annotate(
+            day=FilteredRelation('attendances', condition=Q(attendances__date=report_date)),
+        ).aggregate(
+            total=Count('id'),
+            **{status: Count('day', filter=Q(day__status=status)) for status in STATUSES}
+        )
@@ -0,0 +1,39 @@
+"""
+Tâches Celery du module présences.
+"""
+import logging
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.company.models import Company
+
+from .absences import materialize_absences
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def materialize_absences_task(start=None, end=None):
+    """
+    Crée les absences des jours travaillés pour toutes les entreprises actives
+    (planifiée par Celery beat chaque nuit, pour la veille).
+
+    Args:
+        start: Premier jour traité (AAAA-MM-JJ, défaut : la veille)
+        end: Jour de fin exclu (AAAA-MM-JJ, défaut : lendemain de ``start``)
+    """
+    start = date.fromisoformat(start) if start else timezone.localdate() - timedelta(days=1)
+    end = date.fromisoformat(end) if end else None
+
+    totals = {'absent': 0, 'excused': 0}
+    for company in Company.objects.filter(is_active=True).iterator():
+        result = materialize_absences(company, start, end)
+        totals['absent'] += result['absent']
+        totals['excused'] += result['excused']
+    logger.info(
+        "Absences du %s : %s absence(s), %s congé(s) enregistré(s)",
+        start, totals['absent'], totals['excused'],
+    )
+    return totals
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+
+from apps.employees.models import Employee
+
+
+def create_employees(company, departments, start=0, named=False):
+    """
+    Employés de test, un par département listé (utilisateurs emp<start>,
+    emp<start + 1>…).
+
+    Args:
+        named: Donner aux utilisateurs un prénom et un nom triables
+            (Prenom<i> Nom<i:03d>)
+    """
+    User = get_user_model()
+    employees = []
+    for i, department in enumerate(departments, start=start):
+        names = {'first_name': f"Prenom{i}", 'last_name': f"Nom{i:03d}"} if named else {}
+        user = User.objects.create_user(
+            username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+            company=company, role='employe', **names
+        )
+        employees.append(Employee.objects.create(
+            user=user, company=company, position="Agent",
+            department=department, date_hired=date(2020, 1, 1), base_salary=1000
+        ))
+    return employees
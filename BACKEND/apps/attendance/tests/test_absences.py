@@ -0,0 +1,157 @@
+from datetime import date, time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.attendance.absences import materialize_absences
+from apps.attendance.models import Attendance, AttendanceDailyRollup, WorkSchedule
+from apps.attendance.rollup import verify_rollups
+from apps.attendance.schedules import invalidate_schedule_index
+from apps.attendance.services import AttendanceService
+from apps.attendance.tasks import materialize_absences_task
+from apps.attendance.tests import create_employees
+from apps.company.models import Company
+from apps.leaves.models import Leave
+
+
+class MaterializeAbsencesTests(TestCase):
+    def setUp(self):
+        invalidate_schedule_index()
+        self.company = Company.objects.create(name="Test Company")
+        self.schedule = WorkSchedule.objects.create(
+            company=self.company, name="Semaine", start_time=time(9, 0), end_time=time(17, 0)
+        )
+        self.employees = create_employees(self.company, ['Finance'] * 3)
+        # Jeudi 2 mai au lundi 6 mai 2024 inclus : trois jours travaillés
+        self.start = date(2024, 5, 2)
+        self.end = date(2024, 5, 7)
+
+    def tearDown(self):
+        invalidate_schedule_index()
+
+    def test_creates_absences_on_working_days_only(self):
+        result = materialize_absences(self.company, self.start, self.end)
+
+        self.assertEqual(result, {'days': 5, 'absent': 9, 'excused': 0})
+        self.assertEqual(
+            sorted(set(Attendance.objects.values_list('date', flat=True))),
+            [date(2024, 5, 2), date(2024, 5, 3), date(2024, 5, 6)],
+        )
+        self.assertEqual(AttendanceService.get_daily_stats(self.company, self.start)['absent'], 3)
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_keeps_existing_attendance_and_is_idempotent(self):
+        attendance = AttendanceService.get_or_create_daily_attendance(self.employees[0], self.start)
+        AttendanceService.process_check_in(attendance, time(9, 0))
+
+        materialize_absences(self.company, self.start, self.end)
+        result = materialize_absences(self.company, self.start, self.end)
+
+        self.assertEqual(result['absent'], 0)
+        self.assertEqual(Attendance.objects.count(), 9)
+        attendance.refresh_from_db()
+        self.assertEqual(attendance.status, 'present')
+        rollup = AttendanceDailyRollup.objects.get(company=self.company, date=self.start)
+        self.assertEqual((rollup.present, rollup.absent), (1, 2))
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_approved_leave_is_excused(self):
+        employee = self.employees[0]
+        Leave.objects.create(
+            company=self.company, employee=employee, leave_type='vacation', status='approved',
+            start_date=date(2024, 4, 29), end_date=date(2024, 5, 3),
+        )
+        Leave.objects.create(
+            company=self.company, employee=self.employees[1], leave_type='vacation', status='pending',
+            start_date=self.start, end_date=self.end,
+        )
+
+        result = materialize_absences(self.company, self.start, self.end)
+
+        self.assertEqual((result['absent'], result['excused']), (7, 2))
+        statuses = dict(Attendance.objects.filter(employee=employee).values_list('date', 'status'))
+        self.assertEqual(statuses, {
+            date(2024, 5, 2): 'excused', date(2024, 5, 3): 'excused', date(2024, 5, 6): 'absent',
+        })
+
+    def test_leave_approved_after_materialization_excuses_absences(self):
+        employee = self.employees[0]
+        leave = Leave.objects.create(
+            company=self.company, employee=employee, leave_type='vacation', status='pending',
+            start_date=date(2024, 5, 3), end_date=date(2024, 5, 6),
+        )
+        materialize_absences(self.company, self.start, self.end)
+
+        leave.status = 'approved'
+        leave.save()
+
+        statuses = dict(Attendance.objects.filter(employee=employee).values_list('date', 'status'))
+        self.assertEqual(statuses, {
+            date(2024, 5, 2): 'absent', date(2024, 5, 3): 'excused', date(2024, 5, 6): 'excused',
+        })
+        self.assertEqual(AttendanceService.get_daily_stats(self.company, date(2024, 5, 3))['absent'], 2)
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_leave_rejected_after_approval_restores_absences(self):
+        employee = self.employees[0]
+        leave = Leave.objects.create(
+            company=self.company, employee=employee, leave_type='vacation', status='approved',
+            start_date=date(2024, 5, 2), end_date=date(2024, 5, 6),
+        )
+        materialize_absences(self.company, self.start, self.end)
+        # Absence justifiée à la main : conservée
+        AttendanceService.excuse(Attendance.objects.get(employee=employee, date=self.start), notes="Certificat")
+
+        leave.status = 'rejected'
+        leave.save()
+
+        statuses = dict(Attendance.objects.filter(employee=employee).values_list('date', 'status'))
+        self.assertEqual(statuses, {
+            date(2024, 5, 2): 'excused', date(2024, 5, 3): 'absent', date(2024, 5, 6): 'absent',
+        })
+        self.assertEqual(AttendanceService.get_daily_stats(self.company, date(2024, 5, 3))['absent'], 3)
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_shortened_leave_restores_uncovered_days(self):
+        employee = self.employees[0]
+        leave = Leave.objects.create(
+            company=self.company, employee=employee, leave_type='vacation', status='approved',
+            start_date=date(2024, 5, 2), end_date=date(2024, 5, 6),
+        )
+        materialize_absences(self.company, self.start, self.end)
+
+        leave.end_date = date(2024, 5, 3)
+        leave.save()
+
+        statuses = dict(Attendance.objects.filter(employee=employee).values_list('date', 'status'))
+        self.assertEqual(statuses, {
+            date(2024, 5, 2): 'excused', date(2024, 5, 3): 'excused', date(2024, 5, 6): 'absent',
+        })
+
+        leave.delete()
+        self.assertEqual(
+            set(Attendance.objects.filter(employee=employee).values_list('status', flat=True)), {'absent'},
+        )
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_skips_inactive_and_not_yet_hired_employees(self):
+        self.employees[0].user.is_active = False
+        self.employees[0].user.save()
+        self.employees[1].date_hired = date(2024, 5, 6)
+        self.employees[1].save()
+
+        materialize_absences(self.company, self.start, self.end)
+
+        self.assertFalse(Attendance.objects.filter(employee=self.employees[0]).exists())
+        self.assertEqual(
+            list(Attendance.objects.filter(employee=self.employees[1]).values_list('date', flat=True)),
+            [date(2024, 5, 6)],
+        )
+
+    def test_task_and_command(self):
+        materialize_absences_task(start='2024-05-03')
+        self.assertEqual(Attendance.objects.filter(date=date(2024, 5, 3), status='absent').count(), 3)
+
+        call_command('materialize_absences', '--from', '2024-05-02', '--to', '2024-05-07', stdout=StringIO())
+        self.assertEqual(Attendance.objects.count(), 9)
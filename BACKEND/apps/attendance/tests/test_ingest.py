@@ -0,0 +1,128 @@
+from datetime import date, time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.attendance.models import Attendance, AttendanceDailyRollup
+from apps.attendance.rollup import verify_rollups
+from apps.attendance.services import AttendanceService
+from apps.attendance.tests import create_employees
+from apps.company.models import Company
+
+User = get_user_model()
+
+
+class AttendanceIngestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.rh = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        self.day = date(2024, 5, 2)
+        self.employees = create_employees(self.company, ['Finance'] * 3)
+        self.client.force_authenticate(user=self.rh)
+        self.url = '/api/attendance/records/bulk-ingest/'
+
+    def _event(self, employee, moment, direction):
+        return {'employee': str(employee.id), 'timestamp': f"2024-05-02T{moment}", 'direction': direction}
+
+    def test_events_grouped_per_employee_and_day(self):
+        on_time, late, _ = self.employees
+        response = self.client.post(self.url, {'device': 'Badgeuse 1', 'events': [
+            self._event(on_time, '09:05:00', 'in'),
+            self._event(on_time, '08:55:00', 'in'),
+            self._event(on_time, '12:00:00', 'out'),
+            self._event(on_time, '17:25:00', 'out'),
+            self._event(late, '09:40:00', 'in'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (2, 0))
+
+        first = Attendance.objects.get(employee=on_time, date=self.day)
+        self.assertEqual((first.check_in, first.check_out), (time(8, 55), time(17, 25)))
+        self.assertEqual((first.status, first.delay_minutes), ('present', 0))
+        self.assertEqual(float(first.worked_hours), 8.5)
+        self.assertEqual(first.device_info, 'Badgeuse 1')
+
+        second = Attendance.objects.get(employee=late, date=self.day)
+        self.assertEqual((second.status, second.delay_minutes), ('late', 40))
+
+        rollup = AttendanceDailyRollup.objects.get(company=self.company, department='Finance', date=self.day)
+        self.assertEqual((rollup.present, rollup.late), (1, 1))
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_merges_with_existing_attendance(self):
+        checked_in, excused, absent = self.employees
+        attendance = AttendanceService.get_or_create_daily_attendance(checked_in, self.day)
+        AttendanceService.process_check_in(attendance, time(8, 30))
+        AttendanceService.excuse(AttendanceService.get_or_create_daily_attendance(excused, self.day))
+        AttendanceService.get_or_create_daily_attendance(absent, self.day)
+
+        response = self.client.post(self.url, {'events': [
+            self._event(checked_in, '09:50:00', 'in'),
+            self._event(checked_in, '16:30:00', 'out'),
+            self._event(excused, '10:00:00', 'in'),
+            self._event(absent, '09:10:00', 'in'),
+        ]}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+
+        statuses = dict(Attendance.objects.filter(date=self.day).values_list('employee', 'status'))
+        self.assertEqual(statuses[checked_in.id], 'present')
+        self.assertEqual(statuses[excused.id], 'excused')
+        self.assertEqual(statuses[absent.id], 'present')
+        merged = Attendance.objects.get(employee=checked_in, date=self.day)
+        self.assertEqual((merged.check_in, float(merged.worked_hours)), (time(8, 30), 8.0))
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_attendance_created_concurrently(self):
+        employee = self.employees[0]
+        bulk_create = Attendance.objects.bulk_create
+
+        def check_in_first(objs, *args, **kwargs):
+            # Pointage arrivé entre la lecture des employés et l'écriture du lot
+            if kwargs.get('ignore_conflicts') and not Attendance.objects.exists():
+                attendance = AttendanceService.get_or_create_daily_attendance(employee, self.day)
+                AttendanceService.process_check_in(attendance, time(8, 30))
+            return bulk_create(objs, *args, **kwargs)
+
+        with patch.object(Attendance.objects, 'bulk_create', side_effect=check_in_first):
+            response = self.client.post(self.url, {'events': [
+                self._event(employee, '09:40:00', 'in'),
+                self._event(employee, '17:30:00', 'out'),
+            ]}, format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 1))
+
+        attendance = Attendance.objects.get(employee=employee, date=self.day)
+        self.assertEqual((attendance.check_in, attendance.status), (time(8, 30), 'present'))
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_csv_upload_reports_rejected_lines(self):
+        stranger = '00000000-0000-0000-0000-000000000000'
+        content = "\n".join([
+            "employee;timestamp;direction",
+            f"{self.employees[0].id};2024-05-02 09:00:00;in",
+            f"{self.employees[0].id};pas une date;in",
+            f"{self.employees[1].id};2024-05-02 09:00:00;sideways",
+            f"{stranger};2024-05-02 09:00:00;in",
+        ]).encode('utf-8')
+        response = self.client.post(
+            self.url, {'file': SimpleUploadedFile('badges.csv', content, content_type='text/csv')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 3])
+        self.assertEqual(response.data['unknown_employees'], [stranger])
+
+    def test_requires_rh_role(self):
+        self.client.force_authenticate(user=self.employees[0].user)
+        response = self.client.post(self.url, {'events': [
+            self._event(self.employees[0], '09:00:00', 'in'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attendance.objects.exists())
@@ -0,0 +1,111 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.attendance.models import Attendance, AttendanceDailyRollup
+from apps.attendance.rollup import rebuild_rollups, verify_rollups
+from apps.attendance.services import AttendanceService
+from apps.attendance.tests import create_employees
+from apps.company.models import Company
+
+User = get_user_model()
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Company")
+        self.day = date(2024, 5, 2)
+        self.employees = create_employees(self.company, ['Finance', 'Finance', 'RH'])
+
+    def _rollup(self, department):
+        return AttendanceDailyRollup.objects.get(company=self.company, department=department, date=self.day)
+
+    def test_check_in_and_out_update_rollup(self):
+        on_time, late, absent = (
+            AttendanceService.get_or_create_daily_attendance(employee, self.day)
+            for employee in self.employees
+        )
+        self.assertEqual(self._rollup('Finance').absent, 2)
+
+        AttendanceService.process_check_in(on_time, time(9, 0))
+        AttendanceService.process_check_in(late, time(9, 45))
+        AttendanceService.process_check_out(on_time, time(17, 30))
+
+        finance = self._rollup('Finance')
+        self.assertEqual((finance.present, finance.late, finance.absent), (1, 1, 0))
+        self.assertEqual(finance.total_delay_minutes, 45)
+        self.assertEqual(float(finance.total_worked_hours), 8.5)
+        self.assertEqual(self._rollup('RH').absent, 1)
+        self.assertEqual(verify_rollups(self.company), [])
+
+        stats = AttendanceService.get_department_monthly_stats(self.company, 2024, 5)
+        self.assertEqual([(d['department'], d['employees'], d['total']) for d in stats],
+                         [('Finance', 2, 2), ('RH', 1, 1)])
+
+    def test_justify_excuse_moves_absence(self):
+        attendance = AttendanceService.get_or_create_daily_attendance(self.employees[2], self.day)
+        manager = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        client = APIClient()
+        client.force_authenticate(user=manager)
+        response = client.patch(
+            f'/api/attendance/records/{attendance.pk}/justify/',
+            {'notes': 'Certificat médical', 'excuse': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        rollup = self._rollup('RH')
+        self.assertEqual((rollup.absent, rollup.excused), (0, 1))
+
+    def test_rebuild_and_verify(self):
+        Attendance.objects.create(
+            company=self.company, employee=self.employees[0], date=self.day,
+            status='late', delay_minutes=20
+        )
+        self.assertEqual(len(verify_rollups(self.company)), 1)
+        self.assertEqual(rebuild_rollups(self.company), 1)
+        self.assertEqual(verify_rollups(self.company), [])
+        self.assertEqual(self._rollup('Finance').total_delay_minutes, 20)
+        call_command('attendance_rollup', '--verify', stdout=open('/dev/null', 'w'))
+
+    def test_reports_read_rollup(self):
+        # Écriture directe : les agrégats ne la voient qu'après recalcul
+        Attendance.objects.create(
+            company=self.company, employee=self.employees[2], date=self.day, status='present'
+        )
+        report = AttendanceService.get_monthly_report(self.company, 2024, 5)
+        self.assertEqual(report['stats']['present_rate'], 0)
+        self.assertEqual([d['total'] for d in report['department_stats']], [0, 0])
+        self.assertEqual(sum(e['present'] for e in report['employee_stats']), 1)
+
+        rebuild_rollups(self.company)
+        report = AttendanceService.get_monthly_report(self.company, 2024, 5)
+        self.assertEqual(report['stats']['present_rate'], 100)
+        self.assertEqual([(d['department'], d['total']) for d in report['department_stats']],
+                         [('Finance', 0), ('RH', 1)])
+
+    def test_department_change_keeps_history_bucket(self):
+        attendance = AttendanceService.get_or_create_daily_attendance(self.employees[0], self.day)
+        self.employees[0].department = 'RH'
+        self.employees[0].save()
+
+        AttendanceService.process_check_in(attendance, time(9, 0))
+        finance = self._rollup('Finance')
+        self.assertEqual((finance.present, finance.absent), (1, 0))
+        self.assertFalse(AttendanceDailyRollup.objects.filter(department='RH').exists())
+        self.assertEqual(verify_rollups(self.company), [])
+
+    def test_employee_deletion_updates_rollup(self):
+        for employee in self.employees[:2]:
+            AttendanceService.get_or_create_daily_attendance(employee, self.day)
+        self.employees[0].user.delete()
+
+        self.assertEqual(self._rollup('Finance').absent, 1)
+        self.assertEqual(verify_rollups(self.company), [])
+
+        self.company.delete()
+        self.assertFalse(AttendanceDailyRollup.objects.exists())
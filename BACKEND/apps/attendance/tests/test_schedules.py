@@ -0,0 +1,98 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.attendance.ingest import ingest_events
+from apps.attendance.models import Attendance, WorkSchedule, WorkScheduleAssignment
+from apps.attendance.schedules import get_schedule_index, invalidate_schedule_index
+from apps.attendance.services import AttendanceService
+from apps.attendance.tests import create_employees
+from apps.company.models import Company
+
+User = get_user_model()
+
+
+class WorkScheduleResolutionTests(TestCase):
+    def setUp(self):
+        invalidate_schedule_index()
+        self.addCleanup(invalidate_schedule_index)
+        self.company = Company.objects.create(name="Test Company")
+        self.standard = WorkSchedule.objects.create(company=self.company, name="Standard")
+        self.early = WorkSchedule.objects.create(
+            company=self.company, name="Matin", start_time=time(7, 0), end_time=time(15, 0)
+        )
+        self.night = WorkSchedule.objects.create(
+            company=self.company, name="Nuit", start_time=time(21, 0), end_time=time(5, 0)
+        )
+        self.employees = create_employees(self.company, ['Logistique', 'Logistique', 'RH'])
+        WorkScheduleAssignment.objects.create(
+            company=self.company, schedule=self.early, department='Logistique',
+            start_date=date(2024, 1, 1),
+        )
+        WorkScheduleAssignment.objects.create(
+            company=self.company, schedule=self.night, employee=self.employees[1],
+            start_date=date(2024, 5, 1), end_date=date(2024, 5, 31),
+        )
+
+    def test_employee_then_department_then_default(self):
+        logistics, night_shift, hr = self.employees
+        day = date(2024, 5, 15)
+        self.assertEqual(AttendanceService.get_schedule(logistics, day), self.early)
+        self.assertEqual(AttendanceService.get_schedule(night_shift, day), self.night)
+        self.assertEqual(AttendanceService.get_schedule(hr, day), self.standard)
+        # Hors période : retour à l'horaire du département
+        self.assertEqual(AttendanceService.get_schedule(night_shift, date(2024, 6, 1)), self.early)
+        self.assertEqual(AttendanceService.get_schedule(logistics, date(2023, 12, 31)), self.standard)
+
+    def test_index_cached_and_invalidated_on_save(self):
+        get_schedule_index(self.company.pk)
+        with self.assertNumQueries(0):
+            for employee in self.employees:
+                AttendanceService.get_schedule(employee, date(2024, 5, 15))
+
+        self.early.start_time = time(6, 0)
+        self.early.save()
+        with self.assertNumQueries(2):
+            schedule = AttendanceService.get_schedule(self.employees[0], date(2024, 5, 15))
+        self.assertEqual(schedule.start_time, time(6, 0))
+
+    def test_check_in_uses_assigned_schedule(self):
+        attendance = AttendanceService.get_or_create_daily_attendance(self.employees[0], date(2024, 5, 15))
+        self.assertEqual(attendance.schedule, self.early)
+        AttendanceService.process_check_in(attendance, time(7, 30))
+        self.assertEqual((attendance.status, attendance.delay_minutes), ('late', 30))
+
+    def test_bulk_ingestion_resolves_schedules_in_memory(self):
+        day = date(2024, 5, 15)
+        ingest_events(self.company, [
+            (employee.id, day, time(9, 0), 'in') for employee in self.employees
+        ])
+        attendances = {
+            a.employee_id: a for a in Attendance.objects.filter(date=day).select_related('schedule')
+        }
+        logistics, night_shift, hr = (attendances[employee.id] for employee in self.employees)
+        self.assertEqual((logistics.schedule, logistics.status, logistics.delay_minutes), (self.early, 'late', 120))
+        self.assertEqual((night_shift.schedule, night_shift.status), (self.night, 'present'))
+        self.assertEqual((hr.schedule, hr.status), (self.standard, 'present'))
+
+    def test_assignment_api_requires_single_target(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        ))
+        url = '/api/attendance/schedule-assignments/'
+        response = client.post(url, {
+            'schedule': str(self.early.id), 'employee': str(self.employees[2].id),
+            'department': 'RH', 'start_date': '2024-06-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(url, {
+            'schedule': str(self.early.id), 'employee': str(self.employees[2].id),
+            'start_date': '2024-06-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AttendanceService.get_schedule(self.employees[2], date(2024, 6, 2)), self.early)
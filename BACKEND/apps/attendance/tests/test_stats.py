@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.attendance.models import Attendance
+from apps.attendance.rollup import rebuild_rollups
+from apps.attendance.services import AttendanceService
+from apps.attendance.stats import AttendanceStats
+from apps.attendance.tests import create_employees
+from apps.company.models import Company
+
+
+class AttendanceStatsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Company")
+        self.employees = []
+
+    def _add_employees(self, count, department):
+        employees = create_employees(
+            self.company, [department] * count, start=len(self.employees), named=True
+        )
+        self.employees += employees
+        for employee in employees:
+            for day, status in ((2, 'present'), (3, 'late'), (4, 'absent')):
+                Attendance.objects.create(
+                    company=self.company, employee=employee,
+                    date=date(2024, 5, day), status=status
+                )
+            # Hors période : ne doit pas être compté
+            Attendance.objects.create(
+                company=self.company, employee=employee,
+                date=date(2024, 6, 1), status='present'
+            )
+
+    def test_monthly_breakdowns_in_one_query(self):
+        for count in (2, 20):
+            self._add_employees(count // 2, 'Finance')
+            self._add_employees(count // 2, 'RH')
+            stats = AttendanceStats.for_month(self.company, 2024, 5)
+            with self.assertNumQueries(1):
+                employee_stats = stats.employee_stats()
+                department_stats = stats.department_stats()
+                rates = stats.rates()
+
+        self.assertEqual(len(employee_stats), 22)
+        first = employee_stats[0]
+        self.assertEqual(first['employee_name'], 'Prenom0 Nom000')
+        self.assertEqual((first['present'], first['late'], first['absent']), (1, 1, 1))
+        self.assertAlmostEqual(first['attendance_rate'], 200 / 3)
+
+        self.assertEqual([d['department'] for d in department_stats], ['Finance', 'RH'])
+        self.assertEqual(department_stats[0]['employees'], 11)
+        self.assertEqual(department_stats[0]['total'], 33)
+        self.assertAlmostEqual(rates['present_rate'], 100 / 3)
+
+    def test_departments_follow_attendance_rows(self):
+        self._add_employees(2, 'Finance')
+        # Mutation après le 3 mai : le 4 mai est compté en RH
+        moved = self.employees[0]
+        moved.department = 'RH'
+        moved.save()
+        Attendance.objects.filter(employee=moved, date=date(2024, 5, 4)).update(department='RH')
+        rebuild_rollups(self.company)
+
+        stats = AttendanceStats.for_month(self.company, 2024, 5)
+        departments = stats.department_stats()
+        self.assertEqual(
+            [(d['department'], d['employees'], d['total'], d['absent']) for d in departments],
+            [('Finance', 1, 5, 1), ('RH', 1, 1, 1)],
+        )
+        self.assertEqual(departments, AttendanceService.get_department_monthly_stats(self.company, 2024, 5))
+        moved_stats = next(e for e in stats.employee_stats() if e['employee_name'] == 'Prenom0 Nom000')
+        self.assertEqual((moved_stats['department'], moved_stats['present'], moved_stats['absent']), ('RH', 1, 1))
+
+    def test_daily_stats_in_one_query(self):
+        self._add_employees(4, 'Finance')
+        with self.assertNumQueries(1):
+            stats = AttendanceService.get_daily_stats(self.company, date(2024, 5, 3))
+        self.assertEqual(stats, {'total': 4, 'present': 0, 'late': 4, 'absent': 0, 'excused': 0})
+
+    def test_empty_month(self):
+        self.assertEqual(
+            AttendanceService.get_monthly_stats(self.company, 2024, 1),
+            {'present_rate': 0, 'late_rate': 0, 'absent_rate': 0}
+        )
@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import AttendanceViewSet, WorkScheduleViewSet
+from .api_views import AttendanceViewSet, WorkScheduleAssignmentViewSet, WorkScheduleViewSet
 from .export_views import DailyExportView, MonthlyExportView
 
 # Router for standard API (CRUD)
 router = DefaultRouter()
 router.register(r'records', AttendanceViewSet, basename='attendance')
 router.register(r'schedules', WorkScheduleViewSet, basename='work-schedule')
+router.register(r'schedule-assignments', WorkScheduleAssignmentViewSet, basename='work-schedule-assignment')
 
 urlpatterns = [
     # 1. EXPORT ROUTES (Standard Django Views)
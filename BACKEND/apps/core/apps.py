@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        # Enregistrement des exports asynchrones déclarés dans <app>/exports.py
+        autodiscover_modules('exports')
+        from . import signals  # noqa: F401
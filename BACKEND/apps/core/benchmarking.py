@@ -0,0 +1,58 @@
+"""
+Outils communs des commandes de mesure (benchmark_*, explain_hot_queries).
+
+Les mesures s'exécutent dans une transaction annulée en fin de bloc
+(``rolled_back``), sur des employés synthétiques créés en masse
+(``create_employees``) : aucune donnée ne subsiste après la commande.
+"""
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+
+class Rollback(Exception):
+    """Annule les écritures de la mesure."""
+
+
+@contextmanager
+def rolled_back():
+    """Exécute le bloc dans une transaction annulée à sa sortie."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def create_employees(company, count, batch_size=1000, **fields):
+    """
+    Employés synthétiques (sans mot de passe utilisable), répartis sur 10
+    départements.
+
+    Args:
+        fields: Valeurs supplémentaires des employés (ex. ``date_hired``)
+
+    Returns:
+        Employés créés, leur utilisateur chargé
+    """
+    from apps.employees.models import Employee
+
+    User = get_user_model()
+    suffix = company.pk.hex[:8]
+    users = User.objects.bulk_create([
+        User(
+            id=uuid.uuid4(), username=f"bench{i}_{suffix}", email=f"bench{i}_{suffix}@example.com",
+            first_name=f"Prenom{i}", last_name=f"Nom{i}", password='!', company=company, role='employe',
+        )
+        for i in range(count)
+    ], batch_size=batch_size)
+    return Employee.objects.bulk_create([
+        Employee(
+            user=user, company=company, position="Agent", department=f"Département {i % 10}",
+            base_salary=150000 + i, **fields
+        )
+        for i, user in enumerate(users)
+    ], batch_size=batch_size)
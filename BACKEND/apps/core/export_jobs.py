@@ -0,0 +1,217 @@
+"""
+Exports asynchrones exécutés par Celery.
+
+Chaque application déclare ses exports dans un module ``exports.py``
+(découvert au démarrage par ``CoreConfig.ready``). Un export enregistré
+pointe vers une action de vue existante : le worker Celery rejoue la
+requête au nom de l'utilisateur, écrit la réponse dans un fichier sous
+``EXPORT_STORAGE_PATH`` et met à jour le ``ExportLog`` correspondant.
+"""
+import logging
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.export_models import ExportLog
+
+logger = logging.getLogger(__name__)
+
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+
+# Correspondance entre le paramètre de format des vues et ExportLog.export_type
+FORMAT_TO_EXPORT_TYPE = {
+    'pdf': 'pdf',
+    'excel': 'excel',
+    'xlsx': 'excel',
+    'csv': 'csv',
+    'zip': 'zip',
+    'json': 'json',
+}
+
+
+class ExportJobError(Exception):
+    """Erreur levée lorsqu'un export ne peut pas être produit."""
+
+
+@dataclass
+class RegisteredExport:
+    """Description d'un export exécutable en tâche de fond."""
+    name: str
+    view: str
+    module: str
+    label: str
+    action: Optional[str] = None
+    export_type: str = 'pdf'
+    format_param: Optional[str] = None
+    lookup_param: Optional[str] = None
+    required_params: Tuple[str, ...] = ()
+
+    def get_view_class(self):
+        return import_string(self.view)
+
+    def get_export_type(self, parameters):
+        if self.format_param and parameters.get(self.format_param):
+            fmt = str(parameters[self.format_param]).lower()
+            return FORMAT_TO_EXPORT_TYPE.get(fmt, self.export_type)
+        return self.export_type
+
+    def validate(self, parameters):
+        """Retourne la liste des paramètres obligatoires manquants."""
+        missing = [p for p in self.required_params if not parameters.get(p)]
+        if self.lookup_param and not parameters.get(self.lookup_param):
+            missing.append(self.lookup_param)
+        return missing
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'label': self.label,
+            'module': self.module,
+            'export_type': self.export_type,
+            'format_param': self.format_param,
+            'lookup_param': self.lookup_param,
+            'required_params': list(self.required_params),
+        }
+
+
+_registry: Dict[str, RegisteredExport] = {}
+
+
+def register_export(name, **options):
+    """Enregistre un export exécutable de façon asynchrone."""
+    _registry[name] = RegisteredExport(name=name, **options)
+    return _registry[name]
+
+
+def get_export(name):
+    return _registry.get(name)
+
+
+def get_registered_exports():
+    return dict(sorted(_registry.items()))
+
+
+def _build_request(export, export_log):
+    """Construit la requête GET rejouée par le worker au nom de l'utilisateur."""
+    parameters = dict(export_log.parameters or {})
+    if export.lookup_param:
+        parameters.pop(export.lookup_param, None)
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = f"/api/exports/{export_log.id}/"
+    query = QueryDict(mutable=True)
+    for key, value in parameters.items():
+        query[key] = str(value)
+    request.GET = query
+    request.META = {
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_AUTHORIZATION': f"Bearer {AccessToken.for_user(export_log.user)}",
+        'QUERY_STRING': query.urlencode(),
+    }
+    request.export_job_id = str(export_log.id)
+    return request
+
+
+def _call_view(export, request, parameters):
+    view_class = export.get_view_class()
+    kwargs = {}
+    if export.lookup_param:
+        kwargs['pk'] = parameters[export.lookup_param]
+
+    if export.action:
+        view = view_class.as_view({'get': export.action})
+    else:
+        view = view_class.as_view()
+
+    response = view(request, **kwargs)
+    if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+        response.render()
+    return response
+
+
+def _error_message(response):
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict):
+        return str(data.get('error') or data.get('detail') or data)
+    content = getattr(response, 'content', b'')
+    return content.decode('utf-8', errors='replace')[:1000] or f"HTTP {response.status_code}"
+
+
+def _response_filename(response, default):
+    match = _FILENAME_RE.search(response.get('Content-Disposition', ''))
+    return match.group(1) if match else default
+
+
+def run_export(export_log):
+    """
+    Exécute l'export associé à ``export_log`` et enregistre le fichier produit.
+
+    Le journal passe par les statuts processing puis completed/failed, avec
+    des horodatages, une durée et une taille de fichier réels.
+    """
+    export = get_export(export_log.export_name)
+    export_log.status = 'processing'
+    export_log.started_at = timezone.now()
+    export_log.error_message = None
+    export_log.save(update_fields=['status', 'started_at', 'error_message', 'updated_at'])
+
+    try:
+        if export is None:
+            raise ExportJobError(f"Export inconnu : {export_log.export_name}")
+        if export_log.user is None:
+            raise ExportJobError("Utilisateur de l'export introuvable")
+
+        parameters = dict(export_log.parameters or {})
+        response = _call_view(export, _build_request(export, export_log), parameters)
+        if response.status_code >= 400:
+            raise ExportJobError(_error_message(response))
+
+        filename = _response_filename(response, f"{export.name}_{export_log.id}")
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tmp:
+            size = 0
+            for chunk in response:
+                tmp.write(chunk)
+                size += len(chunk)
+            if hasattr(response, 'close'):
+                response.close()
+            tmp.seek(0)
+            export_log.file_path.save(filename, File(tmp, name=filename), save=False)
+
+        export_log.file_size = size
+        export_log.status = 'completed'
+    except Exception as exc:
+        logger.exception("Echec de l'export %s (%s)", export_log.id, export_log.export_name)
+        export_log.status = 'failed'
+        export_log.error_message = str(exc)
+
+    export_log.completed_at = timezone.now()
+    export_log.duration_seconds = (export_log.completed_at - export_log.started_at).total_seconds()
+    export_log.save()
+    return export_log
+
+
+def purge_expired_exports():
+    """Supprime les fichiers d'export dont la durée de validité est dépassée."""
+    limit = timezone.now() - timedelta(hours=settings.EXPORT_URL_EXPIRATION_HOURS)
+    expired = ExportLog.objects.filter(
+        completed_at__lt=limit,
+    ).exclude(file_path='').exclude(file_path__isnull=True)
+
+    purged = 0
+    for export_log in expired.iterator():
+        export_log.file_path.delete(save=False)
+        ExportLog.objects.filter(pk=export_log.pk).update(file_path='')
+        purged += 1
+    return purged
@@ -4,13 +4,49 @@ Modèles pour le système d'export de documents.
 Ce module contient les modèles pour gérer les exports de documents,
 leurs logs et la traçabilité complète.
 """
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils import timezone
 from apps.core.models import BaseModel
 from apps.company.models import Company
 from apps.accounts.models import CustomUser
 import uuid
 
 
+def export_storage():
+    """Stockage des fichiers d'export, sous EXPORT_STORAGE_PATH."""
+    return FileSystemStorage(
+        location=settings.EXPORT_STORAGE_PATH,
+        base_url=f"{settings.MEDIA_URL}exports/",
+    )
+
+
+class ExportLogManager(models.Manager):
+    """Manager des journaux d'export."""
+
+    def log_export(self, request, **fields):
+        """
+        Journalise un export rendu de façon synchrone dans une vue.
+
+        Si la requête est rejouée par un job d'export asynchrone, le job
+        possède déjà son propre journal : rien n'est créé.
+        """
+        if getattr(request, 'export_job_id', None):
+            return None
+        now = timezone.now()
+        fields.setdefault('status', 'completed')
+        fields.setdefault('started_at', now)
+        fields.setdefault('completed_at', now)
+        return self.create(
+            company=request.user.company,
+            user=request.user,
+            **fields
+        )
+
+
 class ExportLog(BaseModel):
     """
     Journal d'audit pour tous les exports de documents.
@@ -94,7 +130,8 @@ class ExportLog(BaseModel):
         verbose_name='Statut'
     )
     file_path = models.FileField(
-        upload_to='exports/%Y/%m/%d/',
+        upload_to='%Y/%m/%d/',
+        storage=export_storage,
         blank=True,
         null=True,
         verbose_name='Fichier'
@@ -129,6 +166,14 @@ class ExportLog(BaseModel):
         verbose_name='Message d\'erreur'
     )
     
+    # Export enregistré exécuté en tâche de fond (voir apps.core.export_jobs)
+    export_name = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Export enregistré'
+    )
+
     # Celery task ID (pour le suivi)
     celery_task_id = models.CharField(
         max_length=255,
@@ -137,13 +182,15 @@ class ExportLog(BaseModel):
         verbose_name='ID Tâche Celery'
     )
     
+    objects = ExportLogManager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Journal d\'export'
         verbose_name_plural = 'Journaux d\'export'
         indexes = [
             models.Index(fields=['company', '-created_at']),
-            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['status']),
             models.Index(fields=['celery_task_id']),
         ]
@@ -163,6 +210,17 @@ class ExportLog(BaseModel):
             return round(self.file_size / (1024 * 1024), 2)
         return 0
 
+    @property
+    def expires_at(self):
+        """Date d'expiration du fichier (EXPORT_URL_EXPIRATION_HOURS après la fin)."""
+        if not self.completed_at:
+            return None
+        return self.completed_at + timedelta(hours=settings.EXPORT_URL_EXPIRATION_HOURS)
+
+    def is_expired(self):
+        """Indique si le fichier d'export n'est plus téléchargeable."""
+        return self.expires_at is not None and timezone.now() >= self.expires_at
+
 
 class ExportTemplate(BaseModel):
     """
@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .export_views import ExportJobViewSet
+
+router = SimpleRouter()
+router.register(r'', ExportJobViewSet, basename='export-job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
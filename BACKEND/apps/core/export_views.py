@@ -0,0 +1,123 @@
+"""
+API des exports asynchrones.
+
+POST /api/exports/                 -> met en file un export enregistré
+GET  /api/exports/                 -> liste des exports de l'utilisateur
+GET  /api/exports/{id}/            -> statut d'un export (polling)
+GET  /api/exports/{id}/download/   -> téléchargement du fichier produit
+GET  /api/exports/available/       -> exports enregistrés
+"""
+import uuid
+
+from django.db import transaction
+from django.http import FileResponse
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.accounts.permissions import IsCompanyMember
+from .export_jobs import get_export, get_registered_exports
+from .export_models import ExportLog
+from .pagination import KeysetPagination
+from .query_budget import QueryBudgetMixin
+from .serializers import ExportJobCreateSerializer, ExportLogSerializer
+from .tasks import run_export_job
+
+
+class ExportJobViewSet(QueryBudgetMixin,
+                       mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Exports exécutés en tâche de fond par Celery.
+
+    Le fichier produit est conservé EXPORT_URL_EXPIRATION_HOURS heures.
+    """
+    serializer_class = ExportLogSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyMember]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    list_query_budget = 2
+
+    def get_queryset(self):
+        return ExportLog.objects.filter(
+            company=self.request.user.company,
+            user=self.request.user,
+        ).exclude(export_name='')
+
+    def create(self, request):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data['export']
+        parameters = serializer.validated_data['parameters']
+
+        export = get_export(name)
+        if export is None:
+            return Response({'error': f"Export inconnu : {name}"}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.company:
+            return Response({'error': 'Utilisateur non associé à une entreprise'}, status=status.HTTP_403_FORBIDDEN)
+
+        missing = export.validate(parameters)
+        if missing:
+            return Response(
+                {'error': f"Paramètres requis : {', '.join(missing)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Vérifier dès maintenant les permissions de la vue cible
+        view_class = export.get_view_class()
+        target_view = view_class()
+        target_view.action = export.action
+        target_view.request = request
+        for permission in getattr(target_view, 'get_permissions', lambda: [])():
+            if not permission.has_permission(request, target_view):
+                return Response(
+                    {'error': "Vous n'avez pas la permission de lancer cet export"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        task_id = str(uuid.uuid4())
+        export_log = ExportLog.objects.create(
+            company=request.user.company,
+            user=request.user,
+            export_name=export.name,
+            export_type=export.get_export_type(parameters),
+            module=export.module,
+            document_name=export.label,
+            parameters=parameters,
+            status='pending',
+            celery_task_id=task_id,
+        )
+
+        transaction.on_commit(
+            lambda: run_export_job.apply_async(args=[str(export_log.id)], task_id=task_id)
+        )
+
+        return Response(
+            self.get_serializer(export_log).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Télécharge le fichier d'un export terminé."""
+        export_log = self.get_object()
+        if export_log.status != 'completed':
+            return Response(
+                {'error': f"Export non disponible (statut : {export_log.status})"},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not export_log.file_path or export_log.is_expired():
+            return Response({'error': 'Le fichier a expiré'}, status=status.HTTP_410_GONE)
+
+        filename = export_log.file_path.name.rsplit('/', 1)[-1]
+        return FileResponse(
+            export_log.file_path.open('rb'),
+            as_attachment=True,
+            filename=filename
+        )
+
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """Liste les exports enregistrés."""
+        return Response([export.as_dict() for export in get_registered_exports().values()])
@@ -0,0 +1,57 @@
+"""
+Mesure le débit (requêtes/seconde) d'un endpoint authentifié par JWT :
+authentification, résolution de l'entreprise et middlewares compris.
+
+L'utilisateur et l'entreprise sont créés pour la mesure puis supprimés.
+
+Exemple :
+    python manage.py benchmark_tenant_requests --requests 2000 --path /api/stats/stats/
+"""
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from apps.accounts.tokens import tokens_for_user
+from apps.company.models import Company
+from apps.core.benchmarking import rolled_back
+from apps.core.query_budget import QueryCounter
+
+
+class Command(BaseCommand):
+    help = "Benchmark des requêtes authentifiées (requêtes/seconde)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--path', default='/api/stats/stats/')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        with rolled_back():
+            suffix = uuid.uuid4().hex[:8]
+            company = Company.objects.create(name="Benchmark", email=f"bench-{suffix}@example.com")
+            user = get_user_model().objects.create_user(
+                username=f"bench-{suffix}", email=f"bench-{suffix}@example.com",
+                password=None, company=company, role='rh',
+            )
+            client = Client(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+
+            # Requête de chauffe (caches du processus)
+            response = client.get(options['path'])
+            if response.status_code != 200:
+                raise CommandError(f"{options['path']} : statut {response.status_code}")
+
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                for _ in range(count):
+                    client.get(options['path'])
+                elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{options['path']} : {count} requête(s) en {elapsed:.2f} s, "
+                f"{count / elapsed:.0f} req/s, {counter.count / count:.1f} requête(s) SQL par appel"
+            )
@@ -0,0 +1,37 @@
+"""
+État et maintenance du cache disque des documents générés.
+
+Exemples :
+    python manage.py document_cache
+    python manage.py document_cache --evict
+    python manage.py document_cache --clear
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.utils.document_cache import METRICS, get_document_cache
+
+
+class Command(BaseCommand):
+    help = "Compteurs du cache de documents (hits/misses), éviction et purge"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true',
+                            help="Applique la politique d'éviction (âge puis taille)")
+        parser.add_argument('--clear', action='store_true', help="Supprime toutes les entrées")
+
+    def handle(self, *args, **options):
+        cache = get_document_cache()
+        if options['clear']:
+            self.stdout.write(f"{cache.clear()} entrée(s) supprimée(s)")
+        elif options['evict']:
+            self.stdout.write(f"{cache.evict()} entrée(s) évincée(s)")
+
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups * 100 if lookups else 0
+        self.stdout.write(f"dossier : {cache.root}")
+        for metric in METRICS:
+            self.stdout.write(f"{metric:<14} {stats[metric]:>10}")
+        self.stdout.write(f"{'taux de hit':<14} {hit_rate:>9.1f}%")
+        self.stdout.write(f"{'entrées':<14} {stats['entries']:>10}")
+        self.stdout.write(f"{'taille (Mo)':<14} {stats['bytes'] / 1024 / 1024:>10.1f}")
@@ -0,0 +1,128 @@
+"""
+Vérifie les plans d'exécution des requêtes critiques (voir apps.core.query_plans).
+
+Un jeu de données est généré (plusieurs entreprises, pour que le filtre par
+entreprise soit sélectif), les statistiques du planificateur sont
+recalculées (ANALYZE), puis chaque requête enregistrée est passée en
+EXPLAIN. La commande échoue si un plan parcourt une table entière. Toutes
+les écritures sont annulées en fin de vérification.
+
+Exemples :
+    python manage.py explain_hot_queries --companies 20 --employees 25
+    python manage.py explain_hot_queries --company <uuid>   # données existantes
+"""
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.attendance.models import Attendance
+from apps.company.models import Company
+from apps.core.benchmarking import create_employees, rolled_back
+from apps.core.query_plans import HotQueryContext, get_hot_queries, sequential_scans, supports_plan_check
+from apps.documents.models import Document
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+from apps.notifications.models import Notification
+from apps.payroll.models import Payroll
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN des requêtes critiques : échec si une table est parcourue entièrement"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=20)
+        parser.add_argument('--employees', type=int, default=25, help="Employés par entreprise")
+        parser.add_argument('--days', type=int, default=30, help="Jours de présences par employé")
+        parser.add_argument('--company', help="Vérifier sur les données existantes de cette entreprise")
+
+    def handle(self, *args, **options):
+        if not supports_plan_check():
+            raise CommandError(f"Analyse des plans non disponible pour {connection.vendor}")
+
+        with rolled_back():
+            if options['company']:
+                context = self._existing_context(options['company'])
+            else:
+                context = self._seed(options['companies'], options['employees'], options['days'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            failures = self._check(context, options['verbosity'])
+
+        if failures:
+            raise CommandError(
+                "Parcours séquentiel : " + ', '.join(f"{name} ({', '.join(tables)})" for name, tables in failures)
+            )
+        self.stdout.write(self.style.SUCCESS("Toutes les requêtes critiques utilisent un index"))
+
+    def _check(self, context, verbosity):
+        failures = []
+        for name, hot_query in get_hot_queries().items():
+            plan = hot_query.queryset(context).explain()
+            tables = sequential_scans(plan)
+            if tables:
+                failures.append((name, tables))
+                self.stdout.write(self.style.ERROR(f"{name:28} parcours de {', '.join(tables)}"))
+            else:
+                self.stdout.write(f"{name:28} ok")
+            if verbosity > 1 or tables:
+                self.stdout.write(f"    {plan}".replace('\n', '\n    '))
+        return failures
+
+    def _existing_context(self, company_id):
+        company = Company.objects.filter(pk=company_id).first()
+        if company is None:
+            raise CommandError(f"Entreprise inconnue : {company_id}")
+        employee = Employee.objects.filter(company=company).select_related('user').first()
+        if employee is None:
+            raise CommandError("L'entreprise n'a aucun employé")
+        return HotQueryContext(company=company, user=employee.user, employee=employee, today=date.today())
+
+    def _seed(self, companies, employees, days):
+        today = date.today()
+        suffix = uuid.uuid4().hex[:8]
+        context = None
+
+        for c in range(companies):
+            company = Company.objects.create(name=f"Plans {c}", email=f"plans-{suffix}-{c}@example.com")
+            staff = create_employees(company, employees, date_hired=today - timedelta(days=365))
+            users = [employee.user for employee in staff]
+            Attendance.objects.bulk_create(
+                Attendance(company=company, employee=employee, date=today - timedelta(days=d),
+                           status='present' if d % 7 else 'absent')
+                for employee in staff for d in range(days)
+            )
+            Leave.objects.bulk_create(
+                Leave(company=company, employee=employee, leave_type='vacation', status=status,
+                      start_date=today - timedelta(days=offset), end_date=today - timedelta(days=offset - 2))
+                for employee in staff
+                for offset, status in ((40, 'approved'), (10, 'rejected'), (-5, 'pending'))
+            )
+            Payroll.objects.bulk_create(
+                Payroll(company=company, employee=employee, year=year, month=month,
+                        basic_salary=Decimal('150000'), net_salary=Decimal('150000'))
+                for employee in staff
+                for year, month in _months(today, 12)
+            )
+            Document.objects.bulk_create(
+                Document(company=company, employee=employee, file='documents/plans.pdf', document_type=kind)
+                for employee in staff for kind in ('contract', 'id_card')
+            )
+            Notification.objects.bulk_create(
+                Notification(recipient=user, title="Notification", message="-", read=bool(n % 3))
+                for user in users for n in range(10)
+            )
+            if context is None:
+                context = HotQueryContext(company=company, user=users[0], employee=staff[0], today=today)
+
+        return context
+
+
+def _months(today, count):
+    """Les ``count`` derniers mois (année, mois), le mois courant compris."""
+    year, month = today.year, today.month
+    for _ in range(count):
+        yield year, month
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
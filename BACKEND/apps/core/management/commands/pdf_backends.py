@@ -0,0 +1,70 @@
+"""
+Vérifie les moteurs PDF disponibles et mesure le coût d'import au démarrage.
+
+Exemples :
+    python manage.py pdf_backends
+    python manage.py pdf_backends --startup --runs 5
+"""
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.utils import pdf_backends
+
+# Modules importés au démarrage des workers (urls -> views)
+DEFAULT_STARTUP_MODULES = 'apps.core.utils.advanced_exporters,apps.employees.views'
+
+STARTUP_SCRIPT = """
+import importlib, sys, time
+import django
+django.setup()
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+print(time.perf_counter() - start)
+"""
+
+
+class Command(BaseCommand):
+    help = "État des moteurs PDF et benchmark du temps d'import au démarrage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--startup', action='store_true',
+                            help="Mesure l'import des modules dans des interpréteurs neufs")
+        parser.add_argument('--modules', default=DEFAULT_STARTUP_MODULES,
+                            help="Modules à importer, séparés par des virgules")
+        parser.add_argument('--runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options['startup']:
+            self._benchmark_startup(options['modules'].split(','), options['runs'])
+
+        self.stdout.write(f"{'moteur':<12} {'état':<14} {'détection (s)':>14}")
+        available = 0
+        for backend in pdf_backends.registered_backends():
+            ok = backend.is_available()
+            available += ok
+            status = 'disponible' if ok else 'indisponible'
+            self.stdout.write(f"{backend.name:<12} {status:<14} {backend.probe_duration:>14.3f}")
+            if backend.error:
+                self.stdout.write(f"    {backend.error}")
+
+        if not available:
+            raise CommandError("Aucun moteur PDF disponible")
+
+    def _benchmark_startup(self, modules, runs):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings')}
+        timings = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT, *modules],
+                capture_output=True, text=True, env=env
+            )
+            if result.returncode != 0:
+                raise CommandError(f"Import impossible :\n{result.stderr}")
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(f"Import de {', '.join(modules)}")
+        self.stdout.write(f"  min {min(timings):.3f}s  max {max(timings):.3f}s ({runs} essai(s))")
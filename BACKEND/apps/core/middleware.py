@@ -1,26 +1,73 @@
 """
 Middleware pour le multi-tenant.
 Assure que chaque requête est isolée par entreprise.
+
+L'entreprise est résolue depuis les claims du jeton JWT et le cache des
+entreprises du processus (voir apps.core.tenancy), sans requête SQL.
 """
+import copy
+import logging
+
 from django.http import JsonResponse
-from apps.accounts.models import CustomUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .tenancy import get_company, is_public_path, tenant_from_claims
+
+logger = logging.getLogger(__name__)
+
+_jwt = JWTAuthentication()
+
+
+def _validated_token(request):
+    """Jeton d'accès validé de l'en-tête Authorization, ou None."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = _jwt.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return _jwt.get_validated_token(raw_token)
+    except (AuthenticationFailed, InvalidToken):
+        # Erreur renvoyée par l'authentification DRF (401)
+        return None
 
 
 class TenantMiddleware:
     """
-    Middleware qui vérifie que l'utilisateur appartient à une entreprise
-    et ajoute l'entreprise au contexte de la requête.
+    Middleware qui résout l'entreprise de la requête.
+
+    Positionne ``request.tenant`` (Company ou None), ``request.tenant_claims``
+    (claims d'entreprise du jeton, ou None) et ``request.tenant_token`` (jeton
+    validé, réutilisé par l'authentification DRF). Sans jeton JWT, l'entreprise
+    est celle de l'utilisateur de session.
     """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Ajouter l'entreprise de l'utilisateur au contexte de la requête
-        if request.user.is_authenticated and hasattr(request.user, 'company'):
-            request.tenant = request.user.company
+        token = _validated_token(request)
+        request.tenant_token = token
+        request.tenant_claims = tenant_from_claims(token) if token is not None else None
+
+        if request.tenant_claims is not None:
+            # Copie propre à la requête : l'instance en cache est partagée
+            company = get_company(request.tenant_claims['company_id'])
+            request.tenant = copy.copy(company) if company is not None else None
+        elif token is None and request.user.is_authenticated:
+            request.tenant = getattr(request.user, 'company', None)
         else:
             request.tenant = None
 
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("tenant resolved", extra={
+                'path': request.path,
+                'method': request.method,
+                'company_id': str(request.tenant.pk) if request.tenant else None,
+                'source': 'jwt' if token is not None else 'session',
+            })
+
         response = self.get_response(request)
         return response
 
@@ -28,41 +75,39 @@ class TenantMiddleware:
 class CompanyIsolationMiddleware:
     """
     Middleware de sécurité supplémentaire pour l'isolation des données.
+
+    Les endpoints protégés de l'API exigent une entreprise active, sauf pour
+    le propriétaire de la plateforme.
     """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        print(f"DEBUG MIDDLEWARE: Path={request.path}, Method={request.method}, User={request.user}, Authenticated={request.user.is_authenticated}")
-        
-        # Liste des URLs publiques qui ne nécessitent pas d'entreprise
-        public_urls = [
-            '/api/auth/login/',
-            '/api/auth/refresh/',
-            '/api/company/register/',
-            '/api/docs/',
-            '/api/redoc/',
-            '/api/schema/',
-            '/admin/',
-            '/static/',
-            '/media/',
-            '/',  # Page d'accueil
-        ]
-        
-        # Vérifier que l'utilisateur a une entreprise pour les endpoints protégés
-        if request.user.is_authenticated:
-            # Vérifier si l'URL est publique
-            is_public = any(request.path.startswith(url) for url in public_urls)
-            
-            print(f"DEBUG MIDDLEWARE: is_public={is_public}, has_company={hasattr(request.user, 'company')}, company={getattr(request.user, 'company', None)}")
-            
-            if not is_public and request.path.startswith('/api/'):
-                if not hasattr(request.user, 'company') or request.user.company is None:
-                    print("DEBUG MIDDLEWARE: Returning 403 - No company")
-                    return JsonResponse({
-                        'error': 'Utilisateur non associé à une entreprise'
-                    }, status=403)
+        if request.path.startswith('/api/') and not is_public_path(request.path):
+            error = self._check(request)
+            if error is not None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("tenant rejected", extra={'path': request.path, 'reason': error})
+                return JsonResponse({'error': error}, status=403)
 
         response = self.get_response(request)
-        print(f"DEBUG MIDDLEWARE: Response status={response.status_code}")
         return response
+
+    @staticmethod
+    def _check(request):
+        claims = getattr(request, 'tenant_claims', None)
+        if claims is not None:
+            if claims['is_owner']:
+                return None
+        elif getattr(request, 'tenant_token', None) is not None:
+            # Jeton émis sans claims d'entreprise : vérifié par les vues
+            return None
+        elif not request.user.is_authenticated or getattr(request.user, 'is_saas_owner', False):
+            return None
+
+        company = getattr(request, 'tenant', None)
+        if company is None:
+            return 'Utilisateur non associé à une entreprise'
+        if not company.is_active:
+            return 'Entreprise désactivée'
+        return None
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:05
+
+import apps.core.export_models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportlog',
+            name='export_name',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Export enregistré'),
+        ),
+        migrations.AlterField(
+            model_name='exportlog',
+            name='file_path',
+            field=models.FileField(blank=True, null=True, storage=apps.core.export_models.export_storage, upload_to='%Y/%m/%d/', verbose_name='Fichier'),
+        ),
+    ]
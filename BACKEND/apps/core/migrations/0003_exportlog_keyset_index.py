@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0003_companybranding'),
+        ('core', '0002_export_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='exportlog',
+            name='core_export_user_id_01f4ad_idx',
+        ),
+        migrations.AddIndex(
+            model_name='exportlog',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_export_user_id_b4ca34_idx'),
+        ),
+    ]
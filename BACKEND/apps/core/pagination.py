@@ -1,6 +1,179 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 1000
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par clé (keyset) pour les listes volumineuses.
+
+    Les lignes sont triées sur ``keyset_ordering`` (attribut de la vue, par
+    défaut ``('-created_at', '-id')``) et la page suivante est lue après la
+    dernière ligne reçue : ``WHERE (date, id) < (d, i) ORDER BY date DESC,
+    id DESC LIMIT n``. Le coût d'une page ne dépend pas de sa profondeur
+    (pas d'OFFSET), à condition qu'un index couvre le filtre et le tri.
+
+    Le total (COUNT(*)) n'est calculé que sur demande (``?count=true``) ou
+    si la vue fixe ``keyset_count = True``.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Curseur invalide'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.count = queryset.count() if self.count_requested(request, view) else None
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['r']
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.after(cursor['v'], reverse))
+            except (DjangoValidationError, ValueError, TypeError):
+                # Curseur bien formé mais valeurs incompatibles avec les champs
+                raise NotFound(self.invalid_cursor_message)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            # Page précédente : lue à l'envers depuis la première ligne reçue
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def count_requested(self, request, view):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return bool(getattr(view, 'keyset_count', False))
+        return value.lower() in ('1', 'true', 'yes')
+
+    def after(self, values, reverse=False):
+        """
+        Filtre des lignes situées après ``values`` dans l'ordre de tri
+        (avant si ``reverse``) : comparaison lexicographique champ par champ.
+        """
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        clauses = []
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            equal = {f.lstrip('-'): v for f, v in zip(self.ordering[:index], values)}
+            clauses.append(Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": values[index]}))
+        return reduce(lambda left, right: left | right, clauses)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {'v': list(cursor['v']), 'r': bool(cursor.get('r'))}
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = [_cursor_value(getattr(row, field.lstrip('-'))) for field in self.ordering]
+        cursor = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': "Présent avec ?count=true"},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': "Curseur de page (liens next / previous)", 'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': "Nombre de résultats par page", 'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param, 'required': False, 'in': 'query',
+                'description': "Inclure le total (COUNT)", 'schema': {'type': 'boolean'},
+            },
+        ]
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
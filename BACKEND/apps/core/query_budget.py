@@ -0,0 +1,66 @@
+"""
+Budget de requêtes SQL des listes de l'API.
+
+Chaque ViewSet de liste déclare ``list_query_budget`` : le nombre maximal de
+requêtes exécutées par ``list()`` (authentification exclue), indépendant du
+nombre de lignes renvoyées. Une liste paginée coûte normalement deux
+requêtes (COUNT et page) ; toute relation lue par le serializer doit donc
+être chargée par ``select_related`` dans ``get_queryset``.
+
+Le contrôle dépend du réglage ``QUERY_BUDGET_MODE`` :
+    - None : aucun contrôle (production) ;
+    - 'warn' : dépassement journalisé (par défaut avec DEBUG) ;
+    - 'raise' : dépassement levé en QueryBudgetExceeded (tests).
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Une liste a exécuté plus de requêtes que son budget."""
+
+
+class QueryCounter:
+    """Compte les requêtes SQL exécutées (à installer par connection.execute_wrapper)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def budget_mode():
+    return getattr(settings, 'QUERY_BUDGET_MODE', 'warn' if settings.DEBUG else None)
+
+
+def check_budget(name, budget, count):
+    """Signale (ou lève) un dépassement du budget selon QUERY_BUDGET_MODE."""
+    if count <= budget:
+        return
+    message = f"{name} : {count} requêtes SQL pour un budget de {budget}"
+    if budget_mode() == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message, extra={'view': name, 'queries': count, 'budget': budget})
+
+
+class QueryBudgetMixin:
+    """
+    Mixin de ViewSet contrôlant le nombre de requêtes de ``list()``.
+    """
+    list_query_budget = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_query_budget is None or budget_mode() is None:
+            return super().list(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().list(request, *args, **kwargs)
+        check_budget(type(self).__name__, self.list_query_budget, counter.count)
+        return response
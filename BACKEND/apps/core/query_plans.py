@@ -0,0 +1,67 @@
+"""
+Plans d'exécution des requêtes critiques (« hot queries »).
+
+Chaque application déclare ses requêtes les plus fréquentes dans un module
+``hot_queries.py`` : le filtre par entreprise suivi d'une date, d'un statut
+ou d'une période. La commande ``explain_hot_queries`` les exécute en
+EXPLAIN sur un jeu de données généré et échoue si l'une d'elles parcourt
+une table entière au lieu d'utiliser un index.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict
+
+from django.db import connection
+from django.utils.module_loading import autodiscover_modules
+
+
+@dataclass
+class HotQueryContext:
+    """Données de référence passées à chaque requête enregistrée."""
+    company: object
+    user: object
+    employee: object
+    today: date
+
+
+@dataclass
+class HotQuery:
+    name: str
+    build: Callable[[HotQueryContext], object]
+    label: str = ''
+
+    def queryset(self, context):
+        return self.build(context)
+
+
+_registry: Dict[str, HotQuery] = {}
+
+
+def register_hot_query(name, build, label=''):
+    """Enregistre une requête critique : ``build(context)`` renvoie un QuerySet."""
+    _registry[name] = HotQuery(name=name, build=build, label=label)
+    return _registry[name]
+
+
+def get_hot_queries():
+    autodiscover_modules('hot_queries')
+    return dict(sorted(_registry.items()))
+
+
+# Parcours complet d'une table dans le plan, par moteur
+_SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # « SCAN table » sans index (« SCAN table USING INDEX ... » parcourt un index)
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+
+
+def supports_plan_check(vendor=None):
+    return (vendor or connection.vendor) in _SEQUENTIAL_SCAN
+
+
+def sequential_scans(plan, vendor=None):
+    """Tables parcourues entièrement d'après le texte du plan EXPLAIN."""
+    pattern = _SEQUENTIAL_SCAN[vendor or connection.vendor]
+    return sorted({match.group(1) for match in pattern.finditer(plan)})
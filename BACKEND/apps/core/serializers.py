@@ -1,8 +1,11 @@
 """
 Serializers globaux et utilitaires pour le projet.
 """
+from django.urls import reverse
 from rest_framework import serializers
 
+from apps.core.export_models import ExportLog
+
 
 class EmptySerializer(serializers.Serializer):
     """Serializer vide pour les actions sans données"""
@@ -27,3 +30,33 @@ class StatsSerializer(serializers.Serializer):
     pending_leaves = serializers.IntegerField()
     total_payrolls = serializers.IntegerField()
     total_documents = serializers.IntegerField()
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    """Serializer pour la création d'un export asynchrone"""
+    export = serializers.CharField()
+    parameters = serializers.DictField(required=False, default=dict)
+
+
+class ExportLogSerializer(serializers.ModelSerializer):
+    """Serializer pour le suivi des exports asynchrones"""
+    file_size_mb = serializers.FloatField(source='get_file_size_mb', read_only=True)
+    expires_at = serializers.DateTimeField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportLog
+        fields = [
+            'id', 'export_name', 'export_type', 'module', 'document_name',
+            'parameters', 'status', 'file_size', 'file_size_mb',
+            'started_at', 'completed_at', 'duration_seconds', 'expires_at',
+            'error_message', 'download_url', 'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'completed' or not obj.file_path or obj.is_expired():
+            return None
+        request = self.context.get('request')
+        url = reverse('export-job-download', args=[obj.id])
+        return request.build_absolute_uri(url) if request else url
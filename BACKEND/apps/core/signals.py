@@ -0,0 +1,40 @@
+"""
+Invalidation des statistiques en cache à chaque modification des données
+comptées sur le tableau de bord, et du cache des entreprises (tenant).
+
+L'invalidation des statistiques a lieu après la validation de la
+transaction : invalidées avant, elles pourraient être recalculées (et remises
+en cache) par une autre requête à partir des données encore non validées.
+
+Les écritures en masse (bulk_create, update) n'émettent pas ces signaux et
+invalident explicitement (voir invalidate_company_stats).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.attendance.models import Attendance
+from apps.company.models import Company
+from apps.documents.models import Document
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+from apps.payroll.models import Payroll
+
+from .tenancy import invalidate_company
+from .utils.stats_cache import invalidate_company_stats
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=Leave)
+@receiver([post_save, post_delete], sender=Payroll)
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=Document)
+def invalidate_stats_cache(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_company_stats, instance.company_id))
+
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    invalidate_company(instance.pk)
@@ -0,0 +1,29 @@
+"""
+Tâches Celery du module core.
+"""
+from celery import shared_task
+
+from apps.core.export_jobs import purge_expired_exports, run_export
+from apps.core.export_models import ExportLog
+from apps.core.utils.document_cache import get_document_cache
+
+
+@shared_task(ignore_result=True)
+def run_export_job(export_log_id):
+    """Exécute un export enregistré et stocke le fichier produit."""
+    export_log = ExportLog.objects.select_related('user', 'company').filter(pk=export_log_id).first()
+    if export_log is None or export_log.status not in ('pending', 'failed'):
+        return
+    run_export(export_log)
+
+
+@shared_task(ignore_result=True)
+def purge_expired_exports_task():
+    """Supprime les fichiers d'export expirés (planifiée par Celery beat)."""
+    return purge_expired_exports()
+
+
+@shared_task(ignore_result=True)
+def evict_document_cache_task():
+    """Applique la politique d'éviction du cache de documents (planifiée par Celery beat)."""
+    return get_document_cache().evict()
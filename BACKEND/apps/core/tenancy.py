@@ -0,0 +1,86 @@
+"""
+Résolution de l'entreprise (tenant) d'une requête.
+
+Le jeton d'accès JWT porte l'entreprise, le rôle, le plan et l'état actif
+de l'entreprise de l'utilisateur (voir apps.accounts.tokens). Le middleware
+valide le jeton (signature et expiration, sans base de données) et lit
+l'entreprise dans un cache LRU du processus : une requête authentifiée ne
+coûte aucune requête SQL pour résoudre son entreprise. Le jeton validé est
+conservé sur la requête et réutilisé par l'authentification DRF
+(apps.accounts.authentication), qui ne le décode pas une seconde fois.
+
+Le cache (``ProcessCache``) garde au plus TENANT_CACHE_SIZE entreprises.
+Enregistrer ou supprimer une entreprise l'en retire (voir
+apps/core/signals.py) ; les autres processus ne voient une désactivation
+ou un changement de plan qu'après TENANT_CACHE_TTL secondes.
+"""
+import re
+
+from apps.company.models import Company
+
+from .utils.process_cache import ProcessCache
+
+# Préfixes des chemins accessibles sans entreprise ('/' seul : page d'accueil)
+PUBLIC_PREFIXES = (
+    '/api/auth/login/',
+    '/api/auth/refresh/',
+    '/api/auth/platform/config/',
+    '/api/auth/register-company/',
+    '/api/company/register/',
+    '/api/docs/',
+    '/api/redoc/',
+    '/api/schema/',
+    '/admin/',
+    '/static/',
+    '/media/',
+)
+
+_public_path = re.compile(
+    r'/\Z|(?:' + '|'.join(re.escape(prefix) for prefix in PUBLIC_PREFIXES) + ')'
+)
+
+
+def is_public_path(path):
+    """Le chemin est-il accessible sans entreprise ?"""
+    return _public_path.match(path) is not None
+
+
+_companies = ProcessCache(
+    'TENANT_CACHE_TTL', default_ttl=60, size_setting='TENANT_CACHE_SIZE', default_size=256
+)
+
+
+def get_company(company_id):
+    """
+    Entreprise depuis le cache du processus (une requête au premier accès).
+
+    Partagée entre requêtes et threads : à traiter en lecture seule.
+    """
+    if not company_id:
+        return None
+    company_id = str(company_id)
+    return _companies.get(company_id, lambda: Company.objects.filter(pk=company_id).first())
+
+
+def invalidate_company(company_id=None):
+    """Invalide une entreprise du cache (ou toutes si company_id est None)."""
+    _companies.invalidate(None if company_id is None else str(company_id))
+
+
+def tenant_from_claims(token):
+    """
+    Claims d'entreprise d'un jeton validé.
+
+    Returns:
+        Dict company_id, role, plan, company_active, is_owner, ou None si
+        le jeton a été émis sans ces claims
+    """
+    if 'role' not in token:
+        return None
+    return {
+        'company_id': token.get('company_id'),
+        'role': token.get('role'),
+        'plan': token.get('plan'),
+        'company_active': token.get('company_active'),
+        'is_owner': bool(token.get('is_owner')),
+    }
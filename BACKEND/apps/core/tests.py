@@ -1,3 +1,515 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+import base64
+import io
+import json
+import uuid
+import zipfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts import platform
+from apps.attendance.models import Attendance, WorkSchedule
+from apps.company.models import Company
+from apps.core import query_plans
+from apps.core.export_models import ExportLog
+from apps.core.query_budget import QueryBudgetExceeded
+from apps.core.tasks import run_export_job
+from apps.core.utils import pdf_backends
+from apps.core.utils.excel import ExcelReport
+from apps.core.utils.process_cache import ProcessCache
+from apps.core.utils.advanced_exporters import AdvancedExcelExporter, StreamingCSVExporter
+from apps.core.utils.streaming import stream_csv, stream_zip
+from apps.documents.models import Document
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+from apps.notifications.models import Notification
+from apps.payroll.models import Payroll
+from apps.payroll.views import PayrollViewSet
+from billing.models import Payment, Subscription, SubscriptionPlan
+
+User = get_user_model()
+
+
+def _run_now(args, task_id):
+    """Remplace apply_async : exécute la tâche dans le processus de test."""
+    run_export_job(*args)
+
+
+@patch('apps.core.tasks.run_export_job.apply_async', side_effect=_run_now)
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=self.company, role='rh'
+        )
+        employee = Employee.objects.create(
+            user=User.objects.create_user(
+                username="emp", email="emp@test.com", password="password", company=self.company,
+                first_name="Awa", last_name="Diallo"
+            ),
+            company=self.company,
+            position="Comptable",
+            date_hired=date(2020, 1, 1),
+            base_salary=300000,
+        )
+        Payroll.objects.create(
+            company=self.company, employee=employee, month=1, year=2024,
+            basic_salary=300000, bonus=20000, deductions=5000
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        for export_log in ExportLog.objects.exclude(file_path=''):
+            export_log.file_path.delete(save=False)
+
+    def _enqueue(self, export, parameters):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/exports/', {'export': export, 'parameters': parameters}, format='json'
+            )
+
+    def test_export_job_lifecycle(self, mock_apply):
+        response = self._enqueue('payroll.book', {'month': 1, 'year': 2024})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        mock_apply.assert_called_once()
+
+        status_response = self.client.get(f"/api/exports/{response.data['id']}/")
+        self.assertEqual(status_response.data['status'], 'completed')
+        self.assertEqual(status_response.data['export_type'], 'excel')
+        self.assertGreater(status_response.data['file_size'], 0)
+        self.assertIsNotNone(status_response.data['duration_seconds'])
+        self.assertIsNotNone(status_response.data['download_url'])
+
+        # La vue rejouée ne crée pas de second journal
+        self.assertEqual(ExportLog.objects.count(), 1)
+
+        download = self.client.get(f"/api/exports/{response.data['id']}/download/")
+        self.assertEqual(download.status_code, 200)
+        content = b''.join(download.streaming_content)
+        self.assertEqual(len(content), status_response.data['file_size'])
+
+    def test_failed_export_records_error(self, mock_apply):
+        response = self._enqueue('employees.complete_file', {'employee_id': str(uuid.uuid4())})
+        self.assertEqual(response.status_code, 202)
+
+        export_log = ExportLog.objects.get(pk=response.data['id'])
+        self.assertEqual(export_log.status, 'failed')
+        self.assertTrue(export_log.error_message)
+
+        download = self.client.get(f"/api/exports/{export_log.id}/download/")
+        self.assertEqual(download.status_code, 409)
+
+    def test_unknown_export_and_missing_parameters(self, mock_apply):
+        self.assertEqual(self._enqueue('unknown.export', {}).status_code, 400)
+        self.assertEqual(self._enqueue('payroll.bulk_payslips', {'month': 1}).status_code, 400)
+        mock_apply.assert_not_called()
+
+    def test_permission_checked_at_enqueue(self, mock_apply):
+        self.user.role = 'employe'
+        self.user.save()
+        response = self._enqueue('payroll.book', {'month': 1, 'year': 2024})
+        self.assertEqual(response.status_code, 403)
+        mock_apply.assert_not_called()
+
+
+class StreamZipTests(TestCase):
+    def test_entries_streamed_with_manifest(self):
+        entries = [
+            {'name': 'a/fiche.pdf', 'content': b'%PDF-1.4' + b'x' * 200000, 'type': 'payslip'},
+            {'name': 'b/notes.txt', 'content': io.BytesIO(b'bonjour ' * 10000)},
+            {'name': 'c/blocs.csv', 'content': iter([b'a;b\n', b'1;2\n'])},
+        ]
+        chunks = list(stream_zip(iter(entries), manifest=lambda written: {'files': written}))
+        self.assertGreater(len(chunks), 3)
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.getinfo('a/fiche.pdf').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo('b/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.read('c/blocs.csv'), b'a;b\n1;2\n')
+
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual([f['size'] for f in manifest['files']], [200008, 80000, 8])
+
+
+class StreamCSVTests(TestCase):
+    def test_rows_streamed_in_batches_with_single_bom(self):
+        rows = ([i, f"ligne {i}", None] for i in range(5))
+        chunks = list(stream_csv(rows, ['N', 'Texte', 'Vide'], batch_rows=2))
+        self.assertEqual(len(chunks), 3)
+        content = b''.join(chunks).decode('utf-8')
+        self.assertEqual(content.count('\ufeff'), 1)
+        self.assertTrue(content.startswith('\ufeffN;Texte;Vide\r\n0;ligne 0;\r\n'))
+
+    def test_queryset_exporter(self):
+        company = Company.objects.create(name="Test Company")
+        for i, name in enumerate(['Diallo', 'Traoré']):
+            Employee.objects.create(
+                user=User.objects.create_user(
+                    username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+                    company=company, first_name="Awa", last_name=name
+                ),
+                company=company,
+                position="Comptable",
+                date_hired=date(2020, 1, 1),
+                base_salary=300000,
+            )
+        exporter = StreamingCSVExporter(
+            Employee.objects.filter(company=company).order_by('user__last_name'),
+            columns=[
+                ('Nom', 'user__last_name'),
+                ('Identité', lambda row: f"{row['user__first_name']} {row['user__last_name']}"),
+                ('Embauche', 'date_hired'),
+            ],
+            fields=['user__first_name'],
+            filename='employes',
+        )
+        with self.assertNumQueries(1):
+            response = exporter.export()
+            content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="employes.csv"')
+        self.assertEqual(content.splitlines(), [
+            '\ufeffNom;Identité;Embauche',
+            'Diallo;Awa Diallo;2020-01-01',
+            'Traoré;Awa Traoré;2020-01-01',
+        ])
+
+
+class PDFBackendRegistryTests(SimpleTestCase):
+    def test_probe_runs_once(self):
+        backend = pdf_backends.ReportLabBackend()
+        with patch('apps.core.utils.pdf_backends.importlib.import_module') as import_module:
+            self.assertTrue(backend.is_available())
+            self.assertTrue(backend.is_available())
+        import_module.assert_called_once_with('reportlab.platypus')
+
+    def test_probe_failure_is_recorded(self):
+        backend = pdf_backends.WeasyPrintBackend()
+        with patch('apps.core.utils.pdf_backends.importlib.import_module',
+                   side_effect=OSError("cannot load library 'libpango'")):
+            self.assertFalse(backend.is_available())
+        self.assertIn('libpango', backend.error)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(KeyError):
+            pdf_backends.get_backend('unknown')
+
+    def test_render_context_reused_between_documents(self):
+        backend = pdf_backends.XHTML2PDFBackend()
+        with patch.object(backend, 'build_context', wraps=backend.build_context) as build_context:
+            first = backend.render_html('<p>Fiche 1</p>')
+            second = backend.render_html('<p>Fiche 2</p>')
+        build_context.assert_called_once()
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertTrue(second.startswith(b'%PDF'))
+
+
+class ExcelReportTests(SimpleTestCase):
+    def _load(self, response):
+        import openpyxl
+
+        return openpyxl.load_workbook(io.BytesIO(b''.join(response)))
+
+    def test_streamed_sheet_layout(self):
+        report = ExcelReport()
+        sheet = report.add_sheet("Rapport", width=3)
+        sheet.title_block("Titre", "Entreprise")
+        rows = (['Employé %d' % i, i, 'Présent'] for i in range(1, 5))
+        header_row, first_row, last_row = sheet.table(
+            ['Nom', 'Jours', 'Statut'], rows, ['cell', 'amount', 'status_success']
+        )
+        sheet.totals_row(first_row, last_row, sum_columns=[2])
+        report.add_sheet("Vide")
+
+        response = report.response('rapport')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="rapport.xlsx"')
+        workbook = self._load(response)
+        self.assertEqual(workbook.sheetnames, ["Rapport", "Vide"])
+
+        ws = workbook["Rapport"]
+        self.assertEqual((header_row, first_row, last_row), (4, 5, 8))
+        self.assertEqual(ws['A4'].value, 'Nom')
+        self.assertEqual(ws['A4'].style, 'header')
+        self.assertEqual(ws['B9'].value, '=SUM(B5:B8)')
+        self.assertEqual(ws['A6'].style, 'cell_zebra')
+        self.assertEqual(ws['C5'].font.color.rgb, '0010B981')
+        self.assertEqual(ws.freeze_panes, 'A5')
+        self.assertEqual(ws.auto_filter.ref, 'A4:C8')
+        self.assertIn('A1:C1', {str(r) for r in ws.merged_cells.ranges})
+        # Largeur : plus long contenu mesuré (« Employé 1 ») + marge ; titre fusionné ignoré
+        self.assertEqual(ws.column_dimensions['A'].width, len('Employé 1') + 3)
+
+    def test_advanced_exporter_accepts_iterables(self):
+        data = ({'Nom': 'Employé %d' % i, 'Salaire': 1000 * i} for i in range(1, 4))
+        response = AdvancedExcelExporter(
+            None, 'export',
+            sheets_data=[{'name': 'Paie', 'data': data, 'include_totals': True}],
+        ).export()
+        ws = self._load(response)['Paie']
+        self.assertEqual([c.value for c in ws[1]], ['Nom', 'Salaire'])
+        self.assertEqual(ws['B5'].value, '=SUM(B2:B4)')
+        self.assertEqual(ws['B2'].number_format, '#,##0')
+        self.assertEqual(ws.freeze_panes, 'A2')
+
+
+@override_settings(TEST_CACHE_TTL=60, TEST_CACHE_SIZE=2)
+class ProcessCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ProcessCache('TEST_CACHE_TTL', size_setting='TEST_CACHE_SIZE')
+        self.loads = []
+
+    def _load(self, key):
+        def load():
+            self.loads.append(key)
+            return key.upper()
+        return load
+
+    def test_entries_expire_after_ttl(self):
+        with patch('apps.core.utils.process_cache.time.monotonic', return_value=1000):
+            self.assertEqual(self.cache.get('a', self._load('a')), 'A')
+            self.assertEqual(self.cache.get('a', self._load('a')), 'A')
+        with patch('apps.core.utils.process_cache.time.monotonic', return_value=1061):
+            self.cache.get('a', self._load('a'))
+        self.assertEqual(self.loads, ['a', 'a'])
+
+    def test_least_recently_read_evicted(self):
+        for key in ('a', 'b', 'a', 'c', 'a', 'b'):
+            self.cache.get(key, self._load(key))
+        self.assertEqual(self.loads, ['a', 'b', 'c', 'b'])
+
+    def test_none_not_cached_and_invalidation(self):
+        self.assertIsNone(self.cache.get('x', lambda: None))
+        self.cache.get('a', self._load('a'))
+        self.cache.invalidate('a')
+        self.cache.get('a', self._load('a'))
+        self.cache.invalidate()
+        self.cache.get('a', self._load('a'))
+        self.assertEqual(self.loads, ['a', 'a', 'a'])
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetTests(TestCase):
+    """Les listes restent dans leur budget de requêtes, quel que soit le volume."""
+    ENDPOINTS = (
+        '/api/employees/',
+        '/api/attendance/records/',
+        '/api/payroll/',
+        '/api/leaves/',
+        '/api/documents/',
+    )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company", email="company@test.com")
+        plan = SubscriptionPlan.objects.create(name="Startup", slug="startup", price=Decimal('10000'))
+        self.subscription = Subscription.objects.create(company=self.company, plan=plan)
+        self.schedule = WorkSchedule.objects.create(company=self.company, name="Standard")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=self.company, role='rh'
+        )
+        self.client.force_authenticate(self.user)
+        self.rows = 0
+        # Configuration plateforme lue par le middleware : en cache pour tout le test
+        platform.invalidate_platform_config()
+        platform.get_platform_config()
+
+    def _grow(self, rows):
+        """Complète jusqu'à ``rows`` employés, chacun avec une ligne par liste."""
+        users = [
+            User(username=f"emp{i}", email=f"emp{i}@test.com", first_name="Prénom", last_name=f"Nom{i}",
+                 company=self.company, role='employe')
+            for i in range(self.rows, rows)
+        ]
+        User.objects.bulk_create(users)
+        employees = Employee.objects.bulk_create(
+            Employee(user=user, company=self.company, position="Agent", department="Opérations")
+            for user in users
+        )
+        day = date(2024, 1, 15)
+        Attendance.objects.bulk_create(
+            Attendance(company=self.company, employee=e, date=day, schedule=self.schedule, status='present')
+            for e in employees
+        )
+        Payroll.objects.bulk_create(
+            Payroll(company=self.company, employee=e, month=1, year=2024,
+                    basic_salary=Decimal('100000'), net_salary=Decimal('100000'))
+            for e in employees
+        )
+        Leave.objects.bulk_create(
+            Leave(company=self.company, employee=e, start_date=day, end_date=day + timedelta(days=2),
+                  leave_type='annual')
+            for e in employees
+        )
+        Document.objects.bulk_create(
+            Document(company=self.company, employee=e, file='documents/contrat.pdf', document_type='contract')
+            for e in employees
+        )
+        self.rows = rows
+
+    def _list(self, url):
+        response = self.client.get(url, {'page_size': 1000, 'count': 'true'})
+        self.assertEqual(response.status_code, 200, url)
+        return response.data
+
+    def test_lists_within_budget_at_10_and_1000_rows(self):
+        for rows in (10, 1000):
+            self._grow(rows)
+            for url in self.ENDPOINTS:
+                with self.subTest(url=url, rows=rows):
+                    data = self._list(url)
+                    self.assertEqual(data['count'], rows)
+                    self.assertEqual(len(data['results']), rows)
+
+        employee = self._list('/api/employees/')['results'][0]
+        self.assertEqual(employee['user']['company']['subscription_status'], 'trial')
+        self.assertTrue(employee['user']['has_employee_profile'])
+        attendance = self._list('/api/attendance/records/')['results'][0]
+        self.assertEqual(attendance['schedule_name'], "Standard")
+
+    def test_employee_sees_own_leaves_within_budget(self):
+        self._grow(10)
+        employee = Employee.objects.select_related('user').first()
+        self.client.force_authenticate(employee.user)
+        self.assertEqual(self._list('/api/leaves/')['count'], 1)
+
+    def test_employee_sees_own_attendance_within_budget(self):
+        self._grow(10)
+        employee = Employee.objects.select_related('user').first()
+        self.client.force_authenticate(employee.user)
+        data = self._list('/api/attendance/records/')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['employee'], employee.pk)
+
+    def test_user_lists_within_budget(self):
+        for rows in (10, 1000):
+            Notification.objects.bulk_create(
+                Notification(recipient=self.user, title="Notification", message="-")
+                for _ in range(Notification.objects.count(), rows)
+            )
+            ExportLog.objects.bulk_create(
+                ExportLog(company=self.company, user=self.user, export_type='csv', module='attendance',
+                          document_name="Présences", export_name='attendance_daily', status='completed')
+                for _ in range(ExportLog.objects.count(), rows)
+            )
+            for url in ('/api/notifications/notifications/', '/api/exports/'):
+                with self.subTest(url=url, rows=rows):
+                    self.assertEqual(len(self._list(url)['results']), rows)
+
+    def test_regression_exceeds_budget(self):
+        self._grow(10)
+        # Sans select_related : une requête par ligne pour employee_name
+        with patch.object(PayrollViewSet, 'get_queryset', lambda view: Payroll.objects.filter(company=self.company)):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/payroll/')
+
+    def test_transactions_in_one_query(self):
+        owner = User.objects.create_user(username="owner", email="owner@test.com", password="password", role='owner')
+        self.client.force_authenticate(owner)
+        for rows in (10, 1000):
+            Payment.objects.bulk_create(
+                Payment(subscription=self.subscription, amount=Decimal('10000'), payment_method='wave',
+                        transaction_id=f"TX-{i}")
+                for i in range(Payment.objects.count(), rows)
+            )
+            with self.subTest(rows=rows), self.assertNumQueries(1):
+                response = self.client.get('/api/billing/saas/transactions/', {'page_size': 1000})
+            results = response.data['results']
+            self.assertEqual(len(results), rows)
+            self.assertEqual(results[0]['company_name'], "Test Company")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company", email="company@test.com")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=self.company, role='rh'
+        )
+        self.client.force_authenticate(self.user)
+        self.url = '/api/notifications/notifications/'
+        # Configuration plateforme lue par le middleware : en cache pour tout le test
+        platform.invalidate_platform_config()
+        platform.get_platform_config()
+        notifications = Notification.objects.bulk_create(
+            Notification(recipient=self.user, title=f"Notification {i}", message="-") for i in range(25)
+        )
+        # Dates en double : l'id départage les lignes
+        for i, notification in enumerate(notifications):
+            Notification.objects.filter(pk=notification.pk).update(
+                created_at=notification.created_at - timedelta(hours=i // 3)
+            )
+        self.expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def _ids(self, data):
+        return [uuid.UUID(row['id']) for row in data['results']]
+
+    def test_pages_follow_keyset_without_count(self):
+        seen, pages = [], []
+        url, params = self.url, {'page_size': 10}
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url, params).data
+            self.assertNotIn('count', data)
+            pages.append(data)
+            seen += self._ids(data)
+            url, params = data['next'], None
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        self.assertIsNone(pages[0]['previous'])
+
+        # Retour en arrière : mêmes pages dans le même ordre
+        data = self.client.get(pages[2]['previous']).data
+        self.assertEqual(self._ids(data), self._ids(pages[1]))
+        data = self.client.get(data['previous']).data
+        self.assertEqual(self._ids(data), self._ids(pages[0]))
+        self.assertIsNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+
+    def test_optional_count(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url, {'page_size': 10, 'count': 'true'}).data
+        self.assertEqual(data['count'], 25)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'invalide'}).status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        for values in (['garbage', 'x'], [None, {}], ['2024-01-01T00:00:00']):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values}).encode('ascii')).decode('ascii')
+            with self.subTest(values=values):
+                self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    def test_sequential_scan_detection(self):
+        sqlite_plan = (
+            "3 0 0 SEARCH leaves_leave USING INDEX leave_approved_period_idx (company_id=?)\n"
+            "9 0 0 SCAN documents_document\n"
+            "12 0 0 SCAN payroll_payroll USING COVERING INDEX payroll_idx"
+        )
+        self.assertEqual(query_plans.sequential_scans(sqlite_plan, 'sqlite'), ['documents_document'])
+        postgres_plan = (
+            "Nested Loop\n  ->  Index Scan using leaves_leav_company_idx on leaves_leave\n"
+            "  ->  Seq Scan on documents_document"
+        )
+        self.assertEqual(query_plans.sequential_scans(postgres_plan, 'postgresql'), ['documents_document'])
+
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command('explain_hot_queries', companies=3, employees=4, days=3, stdout=out)
+        self.assertIn('leaves.approved_period', out.getvalue())
+        self.assertFalse(Company.objects.exists())
+
+    def test_unindexed_query_fails(self):
+        query_plans.get_hot_queries()
+        with patch.dict(query_plans._registry):
+            query_plans.register_hot_query('leaves.reason', lambda ctx: Leave.objects.filter(reason='x'))
+            with self.assertRaisesMessage(CommandError, 'leaves.reason (leaves_leave)'):
+                call_command('explain_hot_queries', companies=2, employees=2, days=1, stdout=io.StringIO())
@@ -9,84 +9,21 @@ Ce module contient des exporters avancés avec support pour :
 - CSV avec UTF-8 BOM
 - ZIP avec manifest.json
 """
-import csv
-import io
-import json
+import itertools
 import os
-import zipfile
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from pathlib import Path
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 
-# Vérifier la disponibilité de WeasyPrint sans l'importer
-WEASYPRINT_AVAILABLE = False
-WEASYPRINT_ERROR = None
-
-def _check_weasyprint_available():
-    """Vérifie si WeasyPrint est disponible sans l'importer."""
-    global WEASYPRINT_AVAILABLE, WEASYPRINT_ERROR
-    try:
-        import subprocess
-        import sys
-        
-        # Tenter d'importer WeasyPrint dans un sous-processus
-        result = subprocess.run(
-            [sys.executable, '-c', 'import weasyprint; print("OK")'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0 and 'OK' in result.stdout:
-            WEASYPRINT_AVAILABLE = True
-            return True
-        else:
-            WEASYPRINT_ERROR = "WeasyPrint import failed"
-            if result.stderr:
-                # Extraire juste le message d'erreur principal
-                error_lines = result.stderr.split('\n')
-                for line in error_lines:
-                    if 'cannot load library' in line or 'GTK' in line or 'OSError' in line:
-                        WEASYPRINT_ERROR = line.strip()
-                        break
-            return False
-    except Exception as e:
-        WEASYPRINT_ERROR = str(e)
-        return False
-
-# Vérifier au chargement du module
-_check_weasyprint_available()
-
-if not WEASYPRINT_AVAILABLE:
-    print(f"⚠️ WeasyPrint non disponible: {WEASYPRINT_ERROR}")
-    print("📝 Utilisation de xhtml2pdf en fallback pour la génération PDF")
-
-# Import xhtml2pdf pour fallback
-from xhtml2pdf import pisa
-
-# Import ReportLab pour fallback
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-
-# Import openpyxl pour Excel
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table as ExcelTable, TableStyleInfo
-
-# Import pandas pour manipulation de données
-import pandas as pd
-
-# Import QR generator
-from .qr_generator import generate_document_qr_code, generate_qr_code_base64
+# Les moteurs PDF, openpyxl et la génération de QR codes sont importés à la
+# première utilisation : importer ce module reste léger (démarrage des workers).
+from . import pdf_backends
+from .streaming import stream_csv, stream_zip
 
 
 class BaseExporter:
@@ -147,6 +84,8 @@ class WeasyPrintPDFExporter(BaseExporter):
         self.document_id = kwargs.get('document_id', None)
         self.document_type = kwargs.get('document_type', 'document')
         self.context = kwargs.get('context', {})
+        # Moteur de rendu : 'weasyprint', 'xhtml2pdf' ou 'reportlab'
+        self.backend = kwargs.get('backend') or pdf_backends.default_backend_name()
     
     def export(self) -> HttpResponse:
         """
@@ -156,9 +95,30 @@ class WeasyPrintPDFExporter(BaseExporter):
         Returns:
             HttpResponse avec le PDF
         """
-        # Si WeasyPrint n'est pas disponible, utiliser le template simplifié
+        pdf_bytes = self.render()
+        
+        # Créer la réponse HTTP
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.pdf"'
+        response['Content-Length'] = len(pdf_bytes)
+        
+        return response
+    
+    def render(self) -> bytes:
+        """
+        Génère le PDF et retourne son contenu brut.
+        
+        Returns:
+            bytes: Contenu du PDF
+        """
+        backend = pdf_backends.get_backend(self.backend)
+        if not (backend.supports_html and backend.is_available()):
+            # Moteur HTML indisponible : contenu construit directement avec ReportLab
+            backend = pdf_backends.get_backend('reportlab')
+        
+        # Hors WeasyPrint, utiliser le template simplifié
         template_name = self.template_name
-        if not WEASYPRINT_AVAILABLE:
+        if backend.name != 'weasyprint':
             # Convertir le template vers sa version simplifiée
             if template_name.endswith('.html'):
                 base_name = template_name.rsplit('.html', 1)[0]
@@ -194,8 +154,10 @@ class WeasyPrintPDFExporter(BaseExporter):
         }
         
         # Ajouter le QR code si document_id fourni (seulement si WeasyPrint disponible)
-        if self.document_id and WEASYPRINT_AVAILABLE:
+        if self.document_id and backend.name == 'weasyprint':
             try:
+                from .qr_generator import generate_qr_code_base64
+                
                 qr_verification_url = getattr(
                     settings, 
                     'EXPORT_QR_VERIFICATION_BASE_URL', 
@@ -213,53 +175,19 @@ class WeasyPrintPDFExporter(BaseExporter):
         # Rendre le template HTML
         html_string = render_to_string(template_name, context)
         
-        if WEASYPRINT_AVAILABLE:
-            # Utiliser WeasyPrint (meilleure qualité)
+        if backend.supports_html:
             try:
-                # Import lazy de WeasyPrint
-                from weasyprint import HTML, CSS
-                from weasyprint.text.fonts import FontConfiguration
-                
-                # Configuration des polices
-                font_config = FontConfiguration()
-                
-                # CSS de base pour le PDF
-                base_css = CSS(string='''
-                    @page {
-                        size: A4;
-                        margin: 2cm;
-                        @top-center {
-                            content: string(header);
-                        }
-                        @bottom-center {
-                            content: "Page " counter(page) " / " counter(pages);
-                        }
-                    }
-                    body {
-                        font-family: 'Inter', 'Roboto', sans-serif;
-                        font-size: 11pt;
-                        line-height: 1.6;
-                    }
-                ''', font_config=font_config)
-                
-                # Générer le PDF
-                html = HTML(string=html_string, base_url=str(settings.BASE_DIR))
-                pdf_bytes = html.write_pdf(stylesheets=[base_css], font_config=font_config)
+                # Contexte du moteur (polices, CSS compilées) réutilisé d'un document à l'autre
+                pdf_bytes = backend.render_html(html_string, base_url=str(settings.BASE_DIR))
             except Exception as e:
-                # Erreur WeasyPrint, utiliser fallback
-                print(f"⚠️ Erreur WeasyPrint: {e}, fallback vers xhtml2pdf")
+                # Erreur du moteur HTML, utiliser le fallback ReportLab
+                print(f"⚠️ Erreur {backend.name}: {e}, fallback vers ReportLab")
                 pdf_bytes = self._generate_with_xhtml2pdf(html_string)
         else:
-            # Utiliser xhtml2pdf en fallback
-            print("ℹ️ Utilisation de xhtml2pdf pour la génération PDF")
+            print("ℹ️ Utilisation de ReportLab pour la génération PDF")
             pdf_bytes = self._generate_with_xhtml2pdf(html_string)
         
-        # Créer la réponse HTTP
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{self.filename}.pdf"'
-        response['Content-Length'] = len(pdf_bytes)
-        
-        return response
+        return pdf_bytes
     
     def _generate_with_xhtml2pdf(self, html_string: str) -> bytes:
         """
@@ -273,11 +201,9 @@ class WeasyPrintPDFExporter(BaseExporter):
         """
         from io import BytesIO
         from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import cm
         from reportlab.lib import colors
         from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
         import logging
         
         logger = logging.getLogger(__name__)
@@ -287,25 +213,11 @@ class WeasyPrintPDFExporter(BaseExporter):
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm,
                                 topMargin=2*cm, bottomMargin=2*cm)
         
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#4472C4'),
-            spaceAfter=12,
-            alignment=TA_CENTER
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#4472C4'),
-            spaceAfter=6,
-            spaceBefore=12
-        )
+        # Styles (construits une fois par thread par le moteur ReportLab)
+        reportlab_context = pdf_backends.get_backend('reportlab').get_context()
+        styles = reportlab_context['styles']
+        title_style = reportlab_context['title']
+        heading_style = reportlab_context['heading']
         
         normal_style = styles['Normal']
         
@@ -442,16 +354,16 @@ class AdvancedExcelExporter(BaseExporter):
         Returns:
             HttpResponse avec le fichier Excel
         """
-        workbook = openpyxl.Workbook()
-        
+        from .excel import ExcelReport
+
+        report = ExcelReport()
+        self._define_styles(report)
+
         # Si multi-sheets fourni, traiter chaque sheet
         if self.sheets_data:
-            # Supprimer la sheet par défaut
-            workbook.remove(workbook.active)
-            
             for sheet_config in self.sheets_data:
                 self._create_sheet(
-                    workbook,
+                    report,
                     sheet_config['name'],
                     sheet_config['data'],
                     sheet_config.get('headers'),
@@ -459,109 +371,91 @@ class AdvancedExcelExporter(BaseExporter):
                 )
         else:
             # Single sheet
-            worksheet = workbook.active
-            worksheet.title = self.sheet_name
-            self._populate_sheet(worksheet, self.data, self.headers)
-        
-        # Sauvegarder dans un buffer
-        output = io.BytesIO()
-        workbook.save(output)
-        output.seek(0)
-        
-        # Créer la réponse
-        response = HttpResponse(
-            output.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            self._create_sheet(report, self.sheet_name, self.data, self.headers)
+
+        return report.response(self.filename)
+
+    @staticmethod
+    def _define_styles(report):
+        """Styles nommés propres à cet exporter (en-tête bleu, bordures noires)."""
+        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+
+        border_side = Side(style='thin', color='000000')
+        border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+        left = Alignment(horizontal='left', vertical='center')
+
+        report.define_style(
+            'xl_header',
+            font=Font(bold=True, color='FFFFFF', size=12),
+            fill=PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+            alignment=Alignment(horizontal='center', vertical='center'),
+            border=border,
         )
-        response['Content-Disposition'] = f'attachment; filename="{self.filename}.xlsx"'
-        
-        return response
-    
-    def _create_sheet(self, workbook, name, data, headers=None, include_totals=False):
-        """Crée et formate une sheet."""
-        worksheet = workbook.create_sheet(title=name)
-        self._populate_sheet(worksheet, data, headers, include_totals)
-    
-    def _populate_sheet(self, worksheet, data, headers=None, include_totals=False):
-        """Remplit une sheet avec les données et le formatage."""
-        if not data:
-            return
-        
+        report.define_style('xl_text', alignment=left, border=border)
+        report.define_style('xl_int', alignment=left, border=border, number_format='#,##0')
+        report.define_style('xl_float', alignment=left, border=border, number_format='#,##0.00')
+        report.define_style('xl_date', alignment=left, border=border, number_format='DD/MM/YYYY')
+        report.define_style('xl_total', font=Font(bold=True))
+        report.define_style('xl_total_amount', font=Font(bold=True), number_format='#,##0.00')
+
+    @staticmethod
+    def _cell_style(value):
+        """Style de cellule selon le type de la valeur."""
+        if isinstance(value, float):
+            return 'xl_float'
+        if isinstance(value, int):
+            return 'xl_int'
+        if isinstance(value, datetime):
+            return 'xl_date'
+        return 'xl_text'
+
+    def _create_sheet(self, report, name, data, headers=None, include_totals=False):
+        """
+        Crée et remplit une sheet.
+
+        ``data`` peut être un itérable de dictionnaires (générateur,
+        ``queryset.values().iterator()``...) : les lignes sont écrites en flux.
+        """
+        sheet = report.add_sheet(name, column_padding=2)
+
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            return sheet
+
         # Headers
         if not headers:
-            headers = list(data[0].keys())
-        
-        # Style pour les headers
-        header_font = Font(bold=True, color='FFFFFF', size=12)
-        header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-        header_alignment = Alignment(horizontal='center', vertical='center')
-        
-        border_side = Side(style='thin', color='000000')
-        border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
-        
-        # Écrire les headers
-        for col_num, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        # Écrire les données
-        for row_num, row_data in enumerate(data, 2):
-            for col_num, header in enumerate(headers, 1):
-                cell = worksheet.cell(row=row_num, column=col_num)
-                value = row_data.get(header, '')
-                
-                # Détecter le type de données
-                if isinstance(value, (int, float)):
-                    cell.value = value
-                    cell.number_format = '#,##0.00' if isinstance(value, float) else '#,##0'
-                elif isinstance(value, datetime):
-                    cell.value = value
-                    cell.number_format = 'DD/MM/YYYY'
-                else:
-                    cell.value = str(value)
-                
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-                cell.border = border
-        
+            headers = list(first.keys())
+        sheet.width = len(headers)
+
+        def values():
+            for row_data in itertools.chain([first], rows):
+                row = []
+                for header in headers:
+                    value = row_data.get(header, '')
+                    # Détecter le type de données
+                    if not isinstance(value, (int, float, datetime)):
+                        value = str(value)
+                    row.append(value)
+                yield row
+
+        header_row, first_row, last_row = sheet.table(
+            headers,
+            values(),
+            lambda row: [self._cell_style(value) for value in row],
+            zebra=False,
+        )
+
         # Ajouter une ligne de totaux si demandé
         if include_totals and self.include_formulas:
-            total_row = len(data) + 2
-            worksheet.cell(row=total_row, column=1).value = "TOTAL"
-            worksheet.cell(row=total_row, column=1).font = Font(bold=True)
-            
-            # Ajouter des formules SUM pour les colonnes numériques
-            for col_num, header in enumerate(headers, 1):
-                first_value = data[0].get(header) if data else None
-                if isinstance(first_value, (int, float)):
-                    cell = worksheet.cell(row=total_row, column=col_num)
-                    cell.value = f"=SUM({get_column_letter(col_num)}2:{get_column_letter(col_num)}{total_row-1})"
-                    cell.font = Font(bold=True)
-                    cell.number_format = '#,##0.00'
-        
-        # Freeze panes (figer la première ligne)
-        worksheet.freeze_panes = 'A2'
-        
-        # Activer les filtres automatiques
-        worksheet.auto_filter.ref = worksheet.dimensions
-        
-        # Ajuster la largeur des colonnes
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+            # Formules SUM pour les colonnes numériques (d'après la première ligne)
+            sum_columns = [
+                col_num for col_num, header in enumerate(headers, 1)
+                if isinstance(first.get(header), (int, float))
+            ]
+            sheet.totals_row(first_row, last_row, sum_columns, style='xl_total', amount_style='xl_total_amount')
+
+        return sheet
 
 
 class UTF8CSVExporter(BaseExporter):
@@ -578,10 +472,10 @@ class UTF8CSVExporter(BaseExporter):
     
     def export(self) -> HttpResponse:
         """
-        Génère un fichier CSV avec UTF-8 BOM.
+        Génère un fichier CSV avec UTF-8 BOM, en flux.
         
         Returns:
-            HttpResponse avec le CSV
+            StreamingHttpResponse avec le CSV
         """
         if not self.data:
             return HttpResponse('Aucune donnée à exporter', status=400)
@@ -590,26 +484,84 @@ class UTF8CSVExporter(BaseExporter):
         if not self.headers:
             self.headers = list(self.data[0].keys())
         
-        # Créer le CSV en mémoire
-        output = io.StringIO()
-        
-        # Ajouter le BOM UTF-8 pour Excel
-        output.write('\ufeff')
-        
-        writer = csv.DictWriter(
-            output,
-            fieldnames=self.headers,
-            delimiter=self.delimiter,
-            quoting=csv.QUOTE_MINIMAL,
-            escapechar='\\'
+        rows = ([row.get(key, '') for key in self.headers] for row in self.data)
+        response = StreamingHttpResponse(
+            stream_csv(rows, self.headers, delimiter=self.delimiter, escapechar='\\'),
+            content_type='text/csv; charset=utf-8'
         )
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.csv"'
         
-        writer.writeheader()
-        for row in self.data:
-            writer.writerow({key: row.get(key, '') for key in self.headers})
+        return response
+
+
+class StreamingCSVExporter(BaseExporter):
+    """
+    Exporter CSV en flux à partir d'un queryset.
+    
+    Les lignes sont lues par lots via ``.values().iterator()`` et envoyées
+    au client au fil de l'eau : la mémoire utilisée est constante quelle
+    que soit la taille de l'entreprise.
+    
+    Exemple :
+        StreamingCSVExporter(
+            Leave.objects.filter(company=company),
+            columns=[
+                ('Début', 'start_date'),
+                ('Statut', lambda row: STATUS_LABELS[row['status']]),
+            ],
+            fields=['status'],
+            filename='conges',
+        ).export()
+    """
+    
+    def __init__(self, queryset, columns: List[tuple], filename: str, **kwargs):
+        """
+        Args:
+            queryset: QuerySet source (non évalué)
+            columns: Liste de tuples (en-tête, source) où source est un nom
+                de champ pour ``.values()`` ou une fonction recevant la
+                ligne (dict) et retournant la valeur
+            filename: Nom du fichier (sans extension)
+            fields: Champs supplémentaires lus pour les colonnes calculées
+            delimiter: Séparateur (défaut ';')
+            bom: Préfixer le BOM UTF-8 (défaut True)
+            escapechar: Caractère d'échappement (défaut : aucun)
+            chunk_size: Taille des lots lus en base (défaut 2000)
+        """
+        super().__init__([], filename, **kwargs)
+        self.queryset = queryset
+        self.columns = columns
+        self.fields = kwargs.get('fields', ())
+        self.delimiter = kwargs.get('delimiter', ';')
+        self.bom = kwargs.get('bom', True)
+        self.escapechar = kwargs.get('escapechar')
+        self.chunk_size = kwargs.get('chunk_size', 2000)
+    
+    def iter_rows(self):
+        """Itère sur les lignes du CSV (listes de valeurs) sans tout charger."""
+        fields = [source for _, source in self.columns if isinstance(source, str)]
+        fields = list(dict.fromkeys([*fields, *self.fields]))
+        for row in self.queryset.values(*fields).iterator(chunk_size=self.chunk_size):
+            yield [
+                source(row) if callable(source) else row[source]
+                for _, source in self.columns
+            ]
+    
+    def export(self) -> StreamingHttpResponse:
+        """
+        Génère le CSV en flux.
         
-        # Créer la réponse
-        response = HttpResponse(output.getvalue(), content_type='text/csv; charset=utf-8')
+        Returns:
+            StreamingHttpResponse avec le CSV
+        """
+        headers = [header for header, _ in self.columns]
+        response = StreamingHttpResponse(
+            stream_csv(
+                self.iter_rows(), headers,
+                delimiter=self.delimiter, bom=self.bom, escapechar=self.escapechar
+            ),
+            content_type='text/csv; charset=utf-8'
+        )
         response['Content-Disposition'] = f'attachment; filename="{self.filename}.csv"'
         
         return response
@@ -622,54 +574,44 @@ class ZIPExporter(BaseExporter):
     Permet de créer des archives structurées avec métadonnées.
     """
     
-    def __init__(self, files: List[Dict[str, Any]], filename: str, **kwargs):
+    def __init__(self, files: Iterable[Dict[str, Any]], filename: str, **kwargs):
         """
         Args:
-            files: Liste de dicts avec 'name' et 'content' (bytes)
+            files: Itérable de dicts avec 'name' et 'content' (bytes,
+                fichier ou itérable de blocs). Un générateur est consommé
+                au fil de l'écriture : chaque fichier est ajouté à
+                l'archive dès qu'il est produit.
             filename: Nom du fichier ZIP
         """
         super().__init__([], filename, **kwargs)
         self.files = files
         self.structure = kwargs.get('structure', {})
     
-    def export(self) -> HttpResponse:
+    def export(self) -> StreamingHttpResponse:
         """
-        Génère une archive ZIP avec manifest.
+        Génère une archive ZIP avec manifest, en flux.
+        
+        Les entrées (y compris manifest.json) sont écrites au fur et à
+        mesure ; les PDF et images sont stockés sans recompression.
         
         Returns:
-            HttpResponse avec le ZIP
+            StreamingHttpResponse avec le ZIP
         """
-        buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Ajouter les fichiers
-            for file_info in self.files:
-                zip_file.writestr(file_info['name'], file_info['content'])
-            
-            # Créer le manifest.json
-            manifest = {
+        def build_manifest(entries):
+            return {
                 'created_at': timezone.now().isoformat(),
                 'company': self.company.name if self.company else 'Unknown',
                 'exported_by': self.user.get_full_name() if self.user else 'System',
-                'file_count': len(self.files),
-                'files': [
-                    {
-                        'name': f['name'],
-                        'size': len(f['content']),
-                        'type': f.get('type', 'unknown')
-                    }
-                    for f in self.files
-                ],
+                'file_count': len(entries),
+                'files': entries,
                 'structure': self.structure,
                 **self.metadata
             }
-            
-            zip_file.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
-        
-        buffer.seek(0)
         
-        # Créer la réponse
-        response = HttpResponse(buffer.getvalue(), content_type='application/zip')
+        response = StreamingHttpResponse(
+            stream_zip(self.files, manifest=build_manifest),
+            content_type='application/zip'
+        )
         response['Content-Disposition'] = f'attachment; filename="{self.filename}.zip"'
         
         return response
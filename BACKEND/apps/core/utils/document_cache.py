@@ -0,0 +1,292 @@
+"""
+Cache disque des documents générés, adressé par contenu.
+
+La clé d'un document est l'empreinte SHA-256 du nom du générateur, des
+données sources et de la version de la charte de l'entreprise (dates de
+mise à jour de Company, CompanyPDFSettings, CompanyBranding et des
+PDFTemplate). Tant qu'aucune de ces entrées ne change, un téléchargement
+répété est servi depuis le disque sans rendu ; la clé sert aussi d'ETag
+(réponse 304 si le client possède déjà le document).
+
+Les fichiers sont stockés sous ``DOCUMENT_CACHE_DIR`` (par défaut
+``MEDIA_ROOT/exports/cache``). La date de modification d'un fichier est
+mise à jour à chaque lecture : l'éviction supprime les documents non lus
+depuis ``DOCUMENT_CACHE_MAX_AGE`` secondes, puis les moins récemment lus
+tant que le total dépasse ``DOCUMENT_CACHE_MAX_BYTES``.
+
+Les compteurs (hits, misses, stores, not_modified, evictions) sont tenus
+dans le cache Django, partagé entre processus quand un backend commun est
+configuré. Une indisponibilité de ce cache ne fait pas échouer le
+téléchargement : les compteurs ne sont alors pas tenus.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache as metrics_cache
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.http.response import HttpResponseBase
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('hits', 'misses', 'stores', 'not_modified', 'evictions')
+METRICS_PREFIX = 'document_cache:'
+
+# Intervalle minimal (secondes) entre deux évictions déclenchées par un ajout
+EVICT_INTERVAL = 300
+
+# Champs d'un utilisateur imprimés sur les documents (le mot de passe et la
+# dernière connexion ne doivent pas invalider le cache)
+USER_FIELDS = ('id', 'first_name', 'last_name', 'email')
+
+
+def record(metric, count=1):
+    """Incrémente un compteur du cache de documents."""
+    if not count:
+        return
+    key = METRICS_PREFIX + metric
+    try:
+        try:
+            metrics_cache.incr(key, count)
+        except ValueError:
+            if not metrics_cache.add(key, count, timeout=None):
+                metrics_cache.incr(key, count)
+    except Exception:
+        logger.warning("Compteurs du cache de documents indisponibles", exc_info=True)
+
+
+def _metrics():
+    """Valeurs des compteurs (zéro si le cache est indisponible)."""
+    try:
+        values = metrics_cache.get_many([METRICS_PREFIX + metric for metric in METRICS])
+    except Exception:
+        logger.warning("Compteurs du cache de documents indisponibles", exc_info=True)
+        values = {}
+    return {metric: values.get(METRICS_PREFIX + metric, 0) for metric in METRICS}
+
+
+def model_state(instance, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Valeurs des champs d'une instance (tous les champs concrets par défaut)."""
+    if fields is None:
+        fields = [field.attname for field in instance._meta.concrete_fields]
+    return {name: getattr(instance, name) for name in fields}
+
+
+def branding_version(company) -> Dict[str, Any]:
+    """Dates de mise à jour de l'entreprise et de sa charte, en une requête."""
+    from apps.company.models import Company
+
+    return Company.objects.filter(pk=company.pk).aggregate(
+        company=Max('updated_at'),
+        pdf_settings=Max('pdf_settings__updated_at'),
+        branding=Max('branding__updated_at'),
+        templates=Max('pdf_templates__updated_at'),
+        template_count=Count('pdf_templates', distinct=True),
+    )
+
+
+class DocumentCache:
+    """Stockage disque des documents, avec éviction par âge et par taille."""
+
+    def __init__(self, root=None, max_bytes=None, max_age=None):
+        self.root = Path(root or settings.DOCUMENT_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.DOCUMENT_CACHE_MAX_BYTES
+        self.max_age = max_age if max_age is not None else settings.DOCUMENT_CACHE_MAX_AGE
+        self._last_eviction = time.monotonic()
+        self._lock = threading.Lock()
+
+    def make_key(self, generator: str, data: Any, company=None) -> str:
+        """Empreinte du document (générateur, données sources, version de la charte)."""
+        payload = {
+            'generator': generator,
+            'data': data,
+            'branding': branding_version(company) if company is not None else None,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f'{key}.bin'
+
+    def open(self, key: str):
+        """Fichier binaire ouvert du document en cache (ou None) ; marque l'entrée comme lue."""
+        path = self.path(key)
+        try:
+            stream = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(stream.fileno())
+        return stream
+
+    def put(self, key: str, content: bytes) -> Path:
+        """Enregistre un document (écriture atomique) et retourne son chemin."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        record('stores')
+        self._maybe_evict()
+        return path
+
+    def _entries(self):
+        for path in self.root.glob('*/*.bin'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def evict(self) -> int:
+        """Supprime les entrées expirées puis les moins récemment lues au-delà de la taille max."""
+        now = time.time()
+        kept = []
+        removed = 0
+        for mtime, size, path in self._entries():
+            if now - mtime > self.max_age:
+                removed += self._unlink(path)
+            else:
+                kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        for mtime, size, path in sorted(kept, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            removed += self._unlink(path)
+            total -= size
+
+        record('evictions', removed)
+        if removed:
+            logger.info("Cache de documents : %s entrée(s) supprimée(s)", removed)
+        return removed
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_eviction < EVICT_INTERVAL:
+                return
+            self._last_eviction = now
+        self.evict()
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    def clear(self) -> int:
+        """Vide le cache."""
+        return sum(self._unlink(path) for _, _, path in self._entries())
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs, nombre d'entrées et taille totale."""
+        entries = list(self._entries())
+        return {
+            **_metrics(),
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+
+_document_cache = None
+
+
+def get_document_cache() -> DocumentCache:
+    """Cache de documents du processus."""
+    global _document_cache
+    if _document_cache is None:
+        _document_cache = DocumentCache()
+    return _document_cache
+
+
+def serve_document(
+    request,
+    generator: str,
+    data: Any,
+    render: Callable[[], Union[bytes, HttpResponse]],
+    filename: str,
+    company=None,
+    content_type: str = 'application/pdf',
+):
+    """
+    Sert un document depuis le cache, ou le génère et le met en cache.
+
+    Args:
+        request: Requête (en-tête If-None-Match)
+        generator: Nom du générateur (fait partie de la clé)
+        data: Données sources du document (sérialisables en JSON, dates
+            et décimaux acceptés)
+        render: Fonction produisant le document (octets ou HttpResponse) ;
+            une réponse autre que 200 est retournée telle quelle
+        filename: Nom du fichier téléchargé (avec extension)
+        company: Entreprise dont la charte est appliquée
+
+    Returns:
+        FileResponse avec ETag, ou 304 si le client a déjà ce document.
+    """
+    if not settings.DOCUMENT_CACHE_ENABLED:
+        result = render()
+        if isinstance(result, HttpResponseBase):
+            return result
+        response = HttpResponse(result, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    cache = get_document_cache()
+    key = cache.make_key(generator, data, company)
+    etag = f'"{key}"'
+
+    not_modified_response = not_modified(request, etag)
+    if not_modified_response is not None:
+        record('not_modified')
+        return not_modified_response
+
+    stream = cache.open(key)
+    if stream is not None:
+        record('hits')
+    else:
+        record('misses')
+        result = render()
+        if isinstance(result, HttpResponseBase):
+            if result.status_code != 200 or result.streaming:
+                return result
+            result = result.content
+        stream = open(cache.put(key, result), 'rb')
+
+    return file_response(stream, etag, filename, content_type)
+
+
+def not_modified(request, etag: str):
+    """Réponse 304 si le client possède déjà la version ``etag``, sinon None."""
+    if etag not in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        return None
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+def file_response(stream, etag: str, filename: str, content_type: str = 'application/pdf'):
+    """Téléchargement d'un document identifié par ``etag``."""
+    response = FileResponse(stream, as_attachment=True, filename=filename, content_type=content_type)
+    response['ETag'] = etag
+    # Le navigateur revalide à chaque téléchargement (304 si inchangé)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
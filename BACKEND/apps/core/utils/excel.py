@@ -0,0 +1,424 @@
+"""
+Moteur Excel en écriture seule partagé par les générateurs de rapports.
+
+Les lignes d'une feuille sont sérialisées au fil de l'eau dans un fichier
+temporaire (en mémoire jusqu'à ``SPOOL_MAX_SIZE``, puis sur disque) pendant
+que la largeur des colonnes est calculée incrémentalement. À l'enregistrement,
+chaque feuille est écrite par openpyxl en mode ``write_only`` : colonnes,
+volets figés et hauteurs de lignes sont déclarés avant les lignes, qui sont
+ensuite rejouées depuis le fichier temporaire. La mémoire utilisée ne dépend
+donc pas du nombre de lignes.
+
+Les styles sont des ``NamedStyle`` enregistrés une seule fois par classeur et
+référencés par leur nom ; une variante ``<nom>_zebra`` (fond clair) est
+dérivée automatiquement pour les lignes alternées.
+"""
+import pickle
+import tempfile
+from copy import copy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from django.http import FileResponse
+
+# Taille au-delà de laquelle les lignes en attente sont écrites sur disque
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# Largeur de colonne : longueur du plus long contenu + marge, plafonnée
+COLUMN_PADDING = 3
+COLUMN_MAX_WIDTH = 50
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Palette de couleurs épurée (minimaliste)
+PALETTE = {
+    'primary': '2563EB',    # Bleu
+    'success': '10B981',    # Vert
+    'warning': 'F59E0B',    # Orange
+    'danger': 'EF4444',     # Rouge
+    'neutral': '6B7280',    # Gris
+    'text': '1F2937',       # Gris foncé
+    'muted': '666666',      # Texte secondaire
+    'border': 'E5E7EB',     # Bordure
+    'bg_light': 'F9FAFB',   # Fond clair
+}
+
+ZEBRA_SUFFIX = '_zebra'
+
+
+def _default_styles(palette):
+    """Définitions (kwargs de NamedStyle) des styles communs aux rapports."""
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    thin = Side(style='thin', color=palette['border'])
+    medium = Side(style='medium', color=palette['primary'])
+    border_thin = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    left = Alignment(horizontal='left', vertical='center')
+    light_fill = PatternFill(start_color=palette['bg_light'], end_color=palette['bg_light'], fill_type='solid')
+    total_border = Border(left=thin, right=thin, top=medium, bottom=medium)
+
+    styles = {
+        'title': dict(font=Font(size=16, bold=True, color=palette['primary']),
+                      alignment=Alignment(horizontal='center', vertical='center')),
+        'subtitle': dict(font=Font(size=11, color=palette['muted']),
+                         alignment=Alignment(horizontal='center', vertical='center')),
+        'section': dict(font=Font(size=12, bold=True, color=palette['primary']), alignment=left),
+        'kpi_label': dict(font=Font(size=9, color=palette['muted']), alignment=center),
+        'header': dict(font=Font(bold=True, color='FFFFFF', size=11),
+                       fill=PatternFill(start_color=palette['primary'], end_color=palette['primary'], fill_type='solid'),
+                       alignment=center, border=border_thin),
+        'cell': dict(alignment=left, border=border_thin),
+        'cell_center': dict(alignment=center, border=border_thin),
+        'amount': dict(alignment=center, border=border_thin, number_format='#,##0'),
+        'total': dict(font=Font(bold=True, size=11), fill=light_fill, alignment=left, border=total_border),
+        'total_center': dict(font=Font(bold=True, size=11), fill=light_fill, alignment=center, border=total_border),
+        'total_amount': dict(font=Font(bold=True, size=11), fill=light_fill, alignment=center,
+                             border=total_border, number_format='#,##0'),
+        'note': dict(font=Font(size=9, italic=True, color=palette['muted']),
+                     alignment=Alignment(horizontal='center')),
+    }
+    # Statuts colorés (texte gras dans une cellule centrée)
+    for name in ('success', 'warning', 'danger', 'neutral'):
+        styles[f'status_{name}'] = dict(font=Font(bold=True, color=palette[name]),
+                                        alignment=center, border=border_thin)
+    return styles
+
+
+def kpi_style_name(color, size=18):
+    """Nom du style de valeur KPI (défini à la demande)."""
+    return f'kpi_{size}_{color}'
+
+
+class ExcelReport:
+    """
+    Classeur Excel produit en flux.
+
+    Exemple :
+        report = ExcelReport()
+        sheet = report.add_sheet("Rapport", width=7)
+        sheet.title_block("Rapport Journalier", company.name)
+        sheet.table(headers, rows, styles=['cell', 'cell_center', ...])
+        return report.response("rapport")
+    """
+
+    def __init__(self, palette: Optional[Dict[str, str]] = None):
+        self.palette = {**PALETTE, **(palette or {})}
+        self._definitions = _default_styles(self.palette)
+        self._registered = set()
+        self.sheets: List['ExcelSheet'] = []
+
+    def define_style(self, name: str, **attrs):
+        """Déclare un style nommé supplémentaire (font, fill, alignment, border, number_format)."""
+        self._definitions[name] = attrs
+
+    def add_sheet(self, title: str, width: int = 8, column_padding: int = COLUMN_PADDING) -> 'ExcelSheet':
+        """Ajoute une feuille ; ``width`` est le nombre de colonnes des lignes fusionnées."""
+        sheet = ExcelSheet(self, title, width, column_padding)
+        self.sheets.append(sheet)
+        return sheet
+
+    def _register(self, workbook, name):
+        """Enregistre le style ``name`` dans le classeur (une seule fois)."""
+        if name in self._registered:
+            return
+        from openpyxl.styles import Font, NamedStyle, PatternFill
+
+        if name.endswith(ZEBRA_SUFFIX):
+            base = self._attrs(name[:-len(ZEBRA_SUFFIX)])
+            attrs = {**base, 'fill': PatternFill(
+                start_color=self.palette['bg_light'], end_color=self.palette['bg_light'], fill_type='solid'
+            )}
+        else:
+            attrs = self._attrs(name)
+
+        style = NamedStyle(name=name)
+        for attr, value in attrs.items():
+            setattr(style, attr, copy(value))
+        if 'font' not in attrs:
+            style.font = Font()
+        workbook.add_named_style(style)
+        self._registered.add(name)
+
+    def _attrs(self, name):
+        if name in self._definitions:
+            return self._definitions[name]
+        if name.startswith('kpi_'):
+            from openpyxl.styles import Alignment, Font
+
+            _, size, color = name.split('_', 2)
+            return dict(font=Font(size=int(size), bold=True, color=color),
+                        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True))
+        raise KeyError(f"Style Excel inconnu : {name}")
+
+    def save(self, fileobj):
+        """Écrit le classeur dans ``fileobj`` (fichier binaire ouvert en écriture)."""
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        self._registered = set()
+        for sheet in self.sheets:
+            sheet._write(workbook)
+        workbook.save(fileobj)
+
+    def response(self, filename: str) -> FileResponse:
+        """Réponse HTTP en flux avec le fichier .xlsx."""
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.save(output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+
+StyleSpec = Union[None, str, Sequence[Optional[str]]]
+
+
+class ExcelSheet:
+    """
+    Feuille d'un ``ExcelReport``.
+
+    Les lignes sont ajoutées séquentiellement ; ``row`` est le numéro de la
+    prochaine ligne (1-indexé, comme dans Excel).
+    """
+
+    def __init__(self, report: ExcelReport, title: str, width: int, column_padding: int = COLUMN_PADDING):
+        self.report = report
+        self.title = title
+        self.width = width
+        self.column_padding = column_padding
+        self.row = 1
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._widths: Dict[int, int] = {}
+        self._heights: Dict[int, float] = {}
+        self._merged: List[str] = []
+        self._conditional: List[tuple] = []
+        self._styles = set()
+        self.freeze_panes: Optional[str] = None
+        self.auto_filter: Optional[str] = None
+        self.column_widths: Dict[str, float] = {}
+
+    @property
+    def last_column(self) -> str:
+        from openpyxl.utils import get_column_letter
+
+        return get_column_letter(self.width)
+
+    # --- Écriture des lignes ---------------------------------------------
+
+    def append(self, values: Sequence[Any], styles: StyleSpec = None, measure: bool = True) -> int:
+        """
+        Ajoute une ligne et retourne son numéro.
+
+        Args:
+            values: Valeurs des cellules (None = cellule vide)
+            styles: Nom de style commun ou liste de noms par colonne
+            measure: Prendre la ligne en compte dans la largeur des colonnes
+        """
+        values = list(values)
+        if isinstance(styles, str) or styles is None:
+            styles = [styles] * len(values)
+        else:
+            styles = list(styles)
+        self._styles.update(s for s in styles if s)
+
+        if measure:
+            widths = self._widths
+            for col, value in enumerate(values, 1):
+                if value is None or value == '':
+                    continue
+                length = len(str(value))
+                if length > widths.get(col, 0):
+                    widths[col] = length
+
+        pickle.dump((values, styles), self._spool, pickle.HIGHEST_PROTOCOL)
+        row = self.row
+        self.row += 1
+        return row
+
+    def spacer(self, height: Optional[float] = None) -> int:
+        """Ligne vide (éventuellement de hauteur réduite)."""
+        row = self.append([])
+        if height is not None:
+            self._heights[row] = height
+        return row
+
+    def merged_row(self, text: Any, style: Optional[str] = None, columns: Optional[int] = None) -> int:
+        """Ligne dont la première cellule est fusionnée sur ``columns`` colonnes."""
+        from openpyxl.utils import get_column_letter
+
+        row = self.append([text], style, measure=False)
+        last = get_column_letter(columns or self.width)
+        self._merged.append(f'A{row}:{last}{row}')
+        return row
+
+    def title_block(self, title: str, subtitle: str = '', title_style: str = 'title'):
+        """En-tête de rapport : titre, sous-titre (entreprise) et respiration."""
+        self.merged_row(title, title_style)
+        self.merged_row(subtitle, 'subtitle')
+        self.spacer(height=5)
+
+    def section(self, text: str, style: str = 'section', columns: Optional[int] = None) -> int:
+        """Titre de section sur une ligne fusionnée."""
+        return self.merged_row(text, style, columns)
+
+    def note(self, text: str) -> int:
+        """Note discrète sur une ligne fusionnée."""
+        return self.merged_row(text, 'note')
+
+    def kpis(self, items: Iterable[tuple], size: int = 18, step: int = 2, gap: int = 1):
+        """
+        Cartes KPI : une ligne de libellés et une ligne de valeurs.
+
+        Args:
+            items: Tuples (libellé, valeur, couleur hex)
+            size: Taille de police des valeurs
+            step: Nombre de colonnes entre deux cartes
+            gap: Lignes vides ajoutées après les cartes
+        """
+        labels, values, label_styles, value_styles = [], [], [], []
+        for label, value, color in items:
+            padding = [None] * (step - 1)
+            labels += [label, *padding]
+            values += [value, *padding]
+            label_styles += ['kpi_label', *padding]
+            value_styles += [kpi_style_name(color, size), *padding]
+        self.append(labels, label_styles, measure=False)
+        self.append(values, value_styles, measure=False)
+        for _ in range(gap):
+            self.spacer()
+
+    def table(
+        self,
+        headers: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        styles: Union[Sequence[Optional[str]], Callable[[Sequence[Any]], Sequence[Optional[str]]]],
+        zebra: bool = True,
+        freeze: bool = True,
+        autofilter: bool = True,
+    ) -> tuple:
+        """
+        Tableau : ligne d'en-tête puis lignes de données, écrites en flux.
+
+        Args:
+            headers: En-têtes de colonnes
+            rows: Itérable de lignes (consommé une seule fois)
+            styles: Styles par colonne, ou fonction recevant la ligne et
+                retournant ses styles
+            zebra: Alterner le fond des lignes paires
+            freeze: Figer les volets sous l'en-tête
+            autofilter: Activer les filtres automatiques sur le tableau
+
+        Returns:
+            Tuple (ligne d'en-tête, première ligne de données, dernière ligne
+            de données) ; la dernière vaut l'en-tête si le tableau est vide.
+        """
+        from openpyxl.utils import get_column_letter
+
+        header_row = self.append(headers, 'header')
+        style_for = styles if callable(styles) else (lambda row, _styles=list(styles): _styles)
+
+        for values in rows:
+            row_styles = style_for(values)
+            if zebra and self.row % 2 == 0:
+                row_styles = [f'{s}{ZEBRA_SUFFIX}' if s else s for s in row_styles]
+            self.append(values, row_styles)
+
+        last_row = self.row - 1
+        if freeze:
+            self.freeze_panes = f'A{header_row + 1}'
+        if autofilter:
+            self.auto_filter = f'A{header_row}:{get_column_letter(len(headers))}{last_row}'
+        return header_row, header_row + 1, last_row
+
+    def totals_row(
+        self,
+        first_row: int,
+        last_row: int,
+        sum_columns: Iterable[int],
+        label: str = 'TOTAL',
+        columns: Optional[int] = None,
+        values: Optional[Dict[int, Any]] = None,
+        style: str = 'total',
+        amount_style: str = 'total_amount',
+    ) -> int:
+        """
+        Ligne de total avec des formules ``=SUM()`` sur les colonnes demandées.
+
+        Args:
+            first_row, last_row: Lignes de données couvertes par les totaux
+            sum_columns: Numéros (1-indexés) des colonnes à additionner
+            label: Libellé de la première cellule
+            columns: Nombre de cellules de la ligne (par défaut la largeur de la feuille)
+            values: Valeurs fixes par numéro de colonne (moyennes, taux...)
+        """
+        from openpyxl.utils import get_column_letter
+
+        width = columns or self.width
+        values_row = [label] + [None] * (width - 1)
+        styles = [style] * width
+        for col in sum_columns:
+            letter = get_column_letter(col)
+            values_row[col - 1] = f'=SUM({letter}{first_row}:{letter}{last_row})' if last_row >= first_row else 0
+            styles[col - 1] = amount_style
+        for col, value in (values or {}).items():
+            values_row[col - 1] = value
+            styles[col - 1] = amount_style
+        # Les formules ne sont pas représentatives de la largeur affichée
+        return self.append(values_row, styles, measure=False)
+
+    def conditional_format(self, cell_range: str, rule):
+        """Ajoute une règle de mise en forme conditionnelle."""
+        self._conditional.append((cell_range, rule))
+
+    # --- Enregistrement --------------------------------------------------
+
+    def _write(self, workbook):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        ws = workbook.create_sheet(title=self.title)
+        # Chaque style nommé est résolu une seule fois en tableau d'indices de
+        # style ; les cellules en reçoivent ensuite une copie.
+        style_arrays = {}
+        for name in sorted(self._styles):
+            self.report._register(workbook, name)
+            template = WriteOnlyCell(ws)
+            template.style = name
+            style_arrays[name] = template._style
+
+        # Déclarations à faire avant la première ligne en mode write_only
+        for col, length in self._widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = min(length + self.column_padding, COLUMN_MAX_WIDTH)
+        for letter, width in self.column_widths.items():
+            ws.column_dimensions[letter].width = width
+        for row, height in self._heights.items():
+            ws.row_dimensions[row].height = height
+        if self.freeze_panes:
+            ws.freeze_panes = self.freeze_panes
+
+        self._spool.seek(0)
+        while True:
+            try:
+                values, styles = pickle.load(self._spool)
+            except EOFError:
+                break
+            cells = []
+            for value, style in zip(values, styles):
+                if style:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell._style = copy(style_arrays[style])
+                    cells.append(cell)
+                else:
+                    cells.append(value)
+            ws.append(cells)
+        self._spool.close()
+
+        for cell_range in self._merged:
+            ws.merged_cells.add(cell_range)
+        if self.auto_filter:
+            ws.auto_filter.ref = self.auto_filter
+        for cell_range, rule in self._conditional:
+            ws.conditional_formatting.add(cell_range, rule)
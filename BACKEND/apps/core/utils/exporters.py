@@ -1,10 +1,9 @@
 """
 Export utilities for generating PDF, Excel, and CSV files
 """
-import csv
 import io
 from typing import List, Dict, Any
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -13,7 +12,8 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.pdfgen import canvas
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
-import pandas as pd
+
+from .streaming import stream_csv
 
 
 class BaseExporter:
@@ -219,15 +219,11 @@ class CSVExporter(BaseExporter):
         if not self.headers:
             self.headers = list(self.data[0].keys())
         
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=self.headers)
-        
-        writer.writeheader()
-        for row in self.data:
-            writer.writerow({key: row.get(key, '-') for key in self.headers})
-        
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
+        rows = ([row.get(key, '-') for key in self.headers] for row in self.data)
+        response = StreamingHttpResponse(
+            stream_csv(rows, self.headers, delimiter=',', bom=False),
+            content_type='text/csv'
+        )
         response['Content-Disposition'] = f'attachment; filename="{self.filename}.csv"'
         
         return response
@@ -0,0 +1,212 @@
+"""
+Registre paresseux des moteurs de rendu PDF.
+
+Aucun moteur n'est importé au chargement du module : la disponibilité de
+chaque moteur est détectée dans le processus courant au premier appel de
+``is_available()`` puis mémorisée. Les imports lourds (WeasyPrint et ses
+bibliothèques natives, xhtml2pdf, ReportLab) ne sont donc payés que par
+les processus qui génèrent effectivement des PDF.
+
+Chaque moteur garde un contexte de rendu « chaud » par thread (configuration
+des polices, feuilles CSS compilées, styles ReportLab), construit au premier
+document puis réutilisé par les suivants.
+"""
+import importlib
+import io
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PDFBackend:
+    """
+    Moteur de rendu PDF détecté à la demande.
+
+    Les sous-classes déclarent ``name`` et les ``modules`` à importer pour
+    vérifier que le moteur est utilisable.
+    """
+
+    name = None
+    modules = ()
+    # Le moteur sait-il convertir du HTML (sinon : contenu construit en Python)
+    supports_html = True
+
+    def __init__(self):
+        self._available = None
+        self.error = None
+        self.probe_duration = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def is_available(self):
+        """Indique si le moteur est utilisable (détection au premier appel)."""
+        if self._available is None:
+            with self._lock:
+                if self._available is None:
+                    self._available = self._probe()
+        return self._available
+
+    def _probe(self):
+        start = time.perf_counter()
+        try:
+            for module in self.modules:
+                importlib.import_module(module)
+        except Exception as exc:
+            # WeasyPrint lève OSError quand les bibliothèques GTK/Pango manquent
+            self.error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Moteur PDF %s non disponible : %s", self.name, self.error)
+            return False
+        finally:
+            self.probe_duration = time.perf_counter() - start
+        return True
+
+    def get_context(self):
+        """Contexte de rendu du thread courant, construit au premier appel."""
+        context = getattr(self._local, 'context', None)
+        if context is None:
+            context = self._local.context = self.build_context()
+        return context
+
+    def build_context(self):
+        """Construit le contexte de rendu réutilisable (à surcharger)."""
+        return {}
+
+    def render_html(self, html_string, base_url=None):
+        """Convertit un document HTML en PDF et retourne ses octets."""
+        raise NotImplementedError(f"Le moteur {self.name} ne convertit pas de HTML")
+
+
+_backends = {}
+
+
+def register_backend(backend_class):
+    """Enregistre un moteur PDF (utilisable comme décorateur de classe)."""
+    _backends[backend_class.name] = backend_class()
+    return backend_class
+
+
+def get_backend(name):
+    """Retourne le moteur enregistré sous ``name``."""
+    try:
+        return _backends[name]
+    except KeyError:
+        raise KeyError(f"Moteur PDF inconnu : {name}") from None
+
+
+def is_available(name):
+    """Indique si le moteur ``name`` est utilisable dans ce processus."""
+    return get_backend(name).is_available()
+
+
+def registered_backends():
+    """Liste des moteurs enregistrés, par ordre de préférence."""
+    return list(_backends.values())
+
+
+def default_backend_name():
+    """Moteur utilisé par les exporters quand aucun n'est précisé."""
+    return getattr(settings, 'PDF_RENDER_BACKEND', 'weasyprint')
+
+
+# CSS de base appliquée à tous les documents WeasyPrint
+WEASYPRINT_BASE_CSS = '''
+    @page {
+        size: A4;
+        margin: 2cm;
+        @top-center {
+            content: string(header);
+        }
+        @bottom-center {
+            content: "Page " counter(page) " / " counter(pages);
+        }
+    }
+    body {
+        font-family: 'Inter', 'Roboto', sans-serif;
+        font-size: 11pt;
+        line-height: 1.6;
+    }
+'''
+
+
+@register_backend
+class WeasyPrintBackend(PDFBackend):
+    name = 'weasyprint'
+    modules = ('weasyprint',)
+
+    def build_context(self):
+        # La découverte des polices est l'étape la plus lente de WeasyPrint :
+        # une seule FontConfiguration et une CSS de base compilée par thread.
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        return {
+            'font_config': font_config,
+            'base_css': CSS(string=WEASYPRINT_BASE_CSS, font_config=font_config),
+        }
+
+    def render_html(self, html_string, base_url=None):
+        from weasyprint import HTML
+
+        context = self.get_context()
+        html = HTML(string=html_string, base_url=base_url or str(settings.BASE_DIR))
+        return html.write_pdf(stylesheets=[context['base_css']], font_config=context['font_config'])
+
+
+@register_backend
+class XHTML2PDFBackend(PDFBackend):
+    name = 'xhtml2pdf'
+    modules = ('xhtml2pdf.pisa',)
+
+    def build_context(self):
+        from xhtml2pdf import pisa
+
+        return {'pisa': pisa}
+
+    def render_html(self, html_string, base_url=None):
+        pisa = self.get_context()['pisa']
+        result = io.BytesIO()
+        status = pisa.pisaDocument(
+            io.BytesIO(html_string.encode('UTF-8')), result,
+            path=base_url or str(settings.BASE_DIR)
+        )
+        if status.err:
+            raise RuntimeError(f"Erreur xhtml2pdf : {status.err}")
+        return result.getvalue()
+
+
+@register_backend
+class ReportLabBackend(PDFBackend):
+    name = 'reportlab'
+    modules = ('reportlab.platypus',)
+    supports_html = False
+
+    def build_context(self):
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+        styles = getSampleStyleSheet()
+        return {
+            'styles': styles,
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=18,
+                textColor=colors.HexColor('#4472C4'),
+                spaceAfter=12,
+                alignment=TA_CENTER
+            ),
+            'heading': ParagraphStyle(
+                'CustomHeading',
+                parent=styles['Heading2'],
+                fontSize=14,
+                textColor=colors.HexColor('#4472C4'),
+                spaceAfter=6,
+                spaceBefore=12
+            ),
+        }
@@ -0,0 +1,78 @@
+"""
+Cache mémoire du processus, par clé (en pratique : par entreprise).
+
+Les valeurs construites à partir de la base (charte PDF, index des horaires,
+entreprises du middleware) sont conservées dans le processus avec une date
+d'expiration. L'invalidation explicite (signaux) ne touche que le processus
+qui a fait l'écriture : la durée de vie, lue dans le réglage indiqué à
+chaque enregistrement, borne le temps pendant lequel les autres processus
+servent une valeur périmée.
+
+Les valeurs sont partagées entre threads et doivent être traitées en
+lecture seule.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ProcessCache:
+    """
+    Cache clé → valeur avec expiration et, si ``size_setting`` est fourni,
+    éviction des entrées les moins récemment lues.
+
+    Args:
+        ttl_setting: Réglage donnant la durée de vie en secondes
+        default_ttl: Durée de vie si le réglage est absent
+        size_setting: Réglage donnant le nombre maximal d'entrées (illimité sinon)
+        default_size: Nombre maximal d'entrées si le réglage est absent
+    """
+
+    def __init__(self, ttl_setting, default_ttl=300, size_setting=None, default_size=None):
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+        self.size_setting = size_setting
+        self.default_size = default_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ttl(self):
+        return getattr(settings, self.ttl_setting, self.default_ttl)
+
+    def _maxsize(self):
+        if self.size_setting is None:
+            return None
+        return getattr(settings, self.size_setting, self.default_size)
+
+    def get(self, key, load):
+        """
+        Valeur en cache pour ``key``, sinon ``load()`` (hors verrou).
+
+        Un résultat None n'est pas mis en cache.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = load()
+        if value is not None:
+            maxsize = self._maxsize()
+            with self._lock:
+                self._entries[key] = (now + self._ttl(), value)
+                self._entries.move_to_end(key)
+                while maxsize is not None and len(self._entries) > maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        """Invalide une entrée (ou toutes si key est None)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,131 @@
+"""
+Construction de rapports tabulaires à partir d'un DataFrame pandas.
+
+Un ``ReportFrame`` charge les colonnes utiles d'un queryset en une seule
+requête (``values_list``) ; totaux, extrêmes, moyennes, regroupements et
+mises en forme sont ensuite calculés colonne par colonne au lieu de boucles
+Python sur les instances. Le même frame alimente les writers PDF, Excel et
+CSV (``records()`` / ``rows()``), qui reçoivent des types Python natifs.
+
+pandas n'est importé qu'à la construction du premier frame.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Taille des lots lus depuis la base lors du chargement d'un queryset
+QUERYSET_CHUNK_SIZE = 2000
+
+SUMMARY_STATS = ('sum', 'min', 'max', 'mean')
+
+
+class ReportFrame:
+    """
+    Données d'un rapport sous forme de DataFrame.
+
+    Exemple :
+        frame = ReportFrame.from_queryset(payrolls, {
+            'employee_name': 'employee__user__last_name',
+            'net_salary': 'net_salary',
+        }, decimals=['net_salary'])
+        summary = frame.summary(['net_salary'])
+        summary['net_salary']['sum']
+    """
+
+    def __init__(self, df):
+        self.df = df
+
+    @classmethod
+    def from_queryset(cls, queryset, columns: Dict[str, str], decimals: Iterable[str] = ()) -> 'ReportFrame':
+        """
+        Charge un queryset colonne par colonne.
+
+        Args:
+            queryset: Queryset source (ordre conservé)
+            columns: Nom de colonne -> lookup ORM (``'employee__user__last_name'``)
+            decimals: Colonnes DecimalField converties en float
+        """
+        import pandas as pd
+
+        records = queryset.values_list(*columns.values()).iterator(chunk_size=QUERYSET_CHUNK_SIZE)
+        df = pd.DataFrame.from_records(records, columns=list(columns))
+        for column in decimals:
+            df[column] = df[column].astype(float)
+        return cls(df)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], columns: Optional[Sequence[str]] = None) -> 'ReportFrame':
+        """Construit un frame depuis des dictionnaires (résultats ``.values()``)."""
+        import pandas as pd
+
+        return cls(pd.DataFrame.from_records(list(records), columns=columns))
+
+    def __len__(self):
+        return len(self.df)
+
+    def __getitem__(self, column):
+        return self.df[column]
+
+    def __setitem__(self, column, values):
+        self.df[column] = values
+
+    # --- Agrégats ---------------------------------------------------------
+
+    def summary(self, columns: Sequence[str], stats: Sequence[str] = SUMMARY_STATS) -> Dict[str, Dict[str, float]]:
+        """
+        Statistiques des colonnes numériques, calculées en un seul passage.
+
+        Returns:
+            ``{colonne: {'sum': ..., 'min': ..., 'max': ..., 'mean': ...}}`` ;
+            les statistiques d'un frame vide valent 0.
+        """
+        table = self.df[list(columns)].astype(float).agg(list(stats))
+        return {
+            column: {stat: (0 if value != value else float(value)) for stat, value in values.items()}
+            for column, values in table.to_dict().items()
+        }
+
+    def group(self, by: str, sums: Sequence[str], size: Optional[str] = None) -> 'ReportFrame':
+        """
+        Regroupe par ``by`` (trié) en additionnant ``sums``.
+
+        Args:
+            size: Nom d'une colonne recevant le nombre de lignes par groupe
+        """
+        grouped = self.df.groupby(by, sort=True)
+        df = grouped[list(sums)].sum()
+        if size:
+            df.insert(0, size, grouped.size())
+        return ReportFrame(df.reset_index())
+
+    def totals(self, columns: Sequence[str]) -> Dict[str, int]:
+        """Sommes des colonnes (types natifs)."""
+        return {column: value.item() if hasattr(value, 'item') else value
+                for column, value in self.df[list(columns)].sum().items()}
+
+    # --- Mise en forme ----------------------------------------------------
+
+    def format_dates(self, column: str, fmt: str = '%d/%m/%Y', empty: str = '-'):
+        """Formate une colonne de dates (``NaT``/None -> ``empty``)."""
+        import pandas as pd
+
+        self.df[column] = pd.to_datetime(self.df[column]).dt.strftime(fmt).fillna(empty)
+
+    def map_values(self, column: str, mapping: dict, target: Optional[str] = None):
+        """Remplace les valeurs d'une colonne via ``mapping``."""
+        self.df[target or column] = self.df[column].map(mapping)
+
+    # --- Sorties ----------------------------------------------------------
+
+    def records(self, columns: Optional[Dict[str, str]] = None) -> List[dict]:
+        """
+        Lignes sous forme de dictionnaires.
+
+        Args:
+            columns: Colonne -> libellé de sortie (ordre conservé) ;
+                toutes les colonnes par défaut
+        """
+        df = self.df if columns is None else self.df[list(columns)].rename(columns=columns)
+        return df.to_dict('records')
+
+    def rows(self, columns: Sequence[str]) -> Iterator[tuple]:
+        """Lignes sous forme de tuples (writers CSV / Excel en flux)."""
+        return self.df[list(columns)].itertuples(index=False, name=None)
@@ -0,0 +1,80 @@
+"""
+Cache des statistiques du tableau de bord, par entreprise.
+
+Les valeurs sont stockées dans le cache Django (Redis en production, voir
+``CACHES``) sous une clé préfixée par l'entreprise et par sa version de
+statistiques. Toute modification d'un employé, congé, paie, présence ou
+document de l'entreprise incrémente cette version (voir apps/core/signals.py
+et les écritures en masse) : les entrées précédentes ne sont plus lues et
+expirent d'elles-mêmes après ``STATS_CACHE_TTL`` secondes.
+
+Une indisponibilité du cache ne fait pas échouer la requête : les
+statistiques sont alors calculées directement.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'stats:'
+
+
+def _ttl():
+    return getattr(settings, 'STATS_CACHE_TTL', 60)
+
+
+def _version_key(company_id):
+    return f"{KEY_PREFIX}{company_id}:version"
+
+
+def _version(company_id):
+    key = _version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        # Version initialisée à l'horloge : si la clé a été évincée, les
+        # entrées des versions précédentes ne sont pas relues
+        version = time.time_ns() // 1000
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def cached_stats(company_id, name, compute):
+    """
+    Statistiques ``name`` de l'entreprise, depuis le cache ou calculées.
+
+    Args:
+        company_id: ID de l'entreprise
+        name: Nom des statistiques (inclure les paramètres, ex. la date)
+        compute: Fonction sans argument retournant des données sérialisables
+    """
+    if _ttl() <= 0:
+        return compute()
+    try:
+        key = f"{KEY_PREFIX}{company_id}:{_version(company_id)}:{name}"
+        data = cache.get(key)
+    except Exception:
+        logger.warning("Cache des statistiques indisponible", exc_info=True)
+        return compute()
+    if data is None:
+        data = compute()
+        try:
+            cache.set(key, data, timeout=_ttl())
+        except Exception:
+            logger.warning("Cache des statistiques indisponible", exc_info=True)
+    return data
+
+
+def invalidate_company_stats(company_id):
+    """Invalide toutes les statistiques en cache d'une entreprise."""
+    key = _version_key(company_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Aucune version enregistrée : la prochaine lecture en créera une nouvelle
+        pass
+    except Exception:
+        logger.warning("Invalidation des statistiques impossible (%s)", company_id, exc_info=True)
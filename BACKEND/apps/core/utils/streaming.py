@@ -0,0 +1,171 @@
+"""
+Écriture d'archives ZIP et de fichiers CSV en flux.
+
+L'archive est produite morceau par morceau pour une ``StreamingHttpResponse`` :
+aucun fichier n'est conservé entièrement en mémoire, ni avant ni après
+compression. Les formats déjà compressés (PDF, JPEG, PNG, bureautique...)
+sont stockés sans deflate.
+
+Les CSV sont écrits par lots de lignes : la mémoire utilisée ne dépend pas
+du nombre de lignes exportées.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Taille des blocs lus depuis les fichiers sources
+CHUNK_SIZE = 64 * 1024
+
+# Nombre de lignes CSV encodées par bloc envoyé au client
+CSV_BATCH_ROWS = 500
+
+# Extensions déjà compressées : les recompresser coûte du CPU pour rien
+STORED_EXTENSIONS = {
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp',
+    '.zip', '.gz', '.7z', '.rar',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods',
+    '.mp3', '.mp4',
+}
+
+
+class _StreamBuffer:
+    """Tampon en écriture seule, vidé après chaque écriture dans l'archive."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compression_for(name: str) -> int:
+    """Méthode de compression adaptée au type de fichier."""
+    ext = os.path.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def _iter_content(content, chunk_size=CHUNK_SIZE) -> Iterator[bytes]:
+    """Itère sur le contenu d'une entrée : bytes, fichier ou itérable de blocs."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        for start in range(0, len(content), chunk_size):
+            yield bytes(content[start:start + chunk_size])
+    elif hasattr(content, 'chunks'):
+        yield from content.chunks(chunk_size)
+    elif hasattr(content, 'read'):
+        while True:
+            block = content.read(chunk_size)
+            if not block:
+                break
+            yield block
+    else:
+        yield from content
+
+
+def stream_zip(
+    entries: Iterable[Dict[str, Any]],
+    manifest: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]] = None,
+) -> Iterator[bytes]:
+    """
+    Produit une archive ZIP en flux.
+
+    Args:
+        entries: Itérable de dicts avec 'name', 'content' (bytes, fichier
+            ou itérable de blocs) et optionnellement 'type'.
+        manifest: Fonction recevant la liste des entrées écrites
+            (name, size, type) et retournant le contenu de manifest.json,
+            ajouté en dernière entrée.
+
+    Yields:
+        Blocs d'octets de l'archive.
+    """
+    buffer = _StreamBuffer()
+    written = []
+
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for entry in entries:
+            name = entry['name']
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compression_for(name)
+            info.external_attr = 0o644 << 16
+
+            size = 0
+            with zip_file.open(info, 'w') as dest:
+                for block in _iter_content(entry['content']):
+                    dest.write(block)
+                    size += len(block)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            written.append({'name': name, 'size': size, 'type': entry.get('type', 'unknown')})
+            data = buffer.drain()
+            if data:
+                yield data
+
+        if manifest is not None:
+            zip_file.writestr(
+                'manifest.json',
+                json.dumps(manifest(written), indent=2, ensure_ascii=False, default=str)
+            )
+
+    yield buffer.drain()
+
+
+def stream_csv(
+    rows: Iterable[Sequence[Any]],
+    headers: Sequence[str],
+    delimiter: str = ';',
+    bom: bool = True,
+    escapechar: Optional[str] = None,
+    batch_rows: int = CSV_BATCH_ROWS,
+) -> Iterator[bytes]:
+    """
+    Produit un fichier CSV UTF-8 en flux.
+
+    Args:
+        rows: Itérable de lignes (séquences de valeurs, None -> vide)
+        headers: Ligne d'en-tête
+        delimiter: Séparateur (';' pour Excel en français)
+        bom: Préfixer le BOM UTF-8 (ouverture correcte dans Excel)
+        escapechar: Caractère d'échappement passé au writer csv
+        batch_rows: Nombre de lignes par bloc produit
+
+    Yields:
+        Blocs d'octets du fichier.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, quoting=csv.QUOTE_MINIMAL, escapechar=escapechar)
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    if bom:
+        buffer.write('\ufeff')
+    writer.writerow(headers)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_rows:
+            yield drain()
+            pending = 0
+
+    yield drain()
@@ -1,12 +1,14 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
+from django.db.models import Count, Q
 from apps.employees.models import Employee
 from apps.leaves.models import Leave
 from apps.payroll.models import Payroll
 from apps.documents.models import Document
-from apps.attendance.models import Attendance
+from apps.attendance.rollup import rollup_totals
 from .serializers import StatsSerializer
+from .utils.stats_cache import cached_stats
 
 
 class DashboardStatsView(APIView):
@@ -21,14 +23,22 @@ class DashboardStatsView(APIView):
         if not company:
             return Response({'error': 'Utilisateur non associé à une entreprise'}, status=403)
 
-        stats = {
+        stats = cached_stats(company.pk, 'totals', lambda: self.compute_stats(company))
+        serializer = StatsSerializer(stats)
+        return Response(serializer.data)
+
+    @staticmethod
+    def compute_stats(company):
+        """Totaux de l'entreprise (les deux comptes de congés en un seul agrégat)."""
+        leaves = Leave.objects.filter(company=company).aggregate(
+            total_leaves=Count('id'),
+            pending_leaves=Count('id', filter=Q(status='pending')),
+        )
+        return {
             'total_employees': Employee.objects.filter(company=company).count(),
-            'total_leaves': Leave.objects.filter(company=company).count(),
-            'pending_leaves': Leave.objects.filter(company=company, status='pending').count(),
+            **leaves,
             'total_payrolls': Payroll.objects.filter(company=company).count(),
             'total_documents': Document.objects.filter(company=company).count(),
-            'total_attendances': Attendance.objects.filter(company=company).count(),
+            # Total lu dans les agrégats journaliers plutôt que sur les présences
+            'total_attendances': rollup_totals(company, None, None)['total'],
         }
-
-        serializer = StatsSerializer(stats)
-        return Response(serializer.data)
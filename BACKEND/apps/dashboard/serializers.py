@@ -0,0 +1,27 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.employees.headcount import GRANULARITIES, months_back, period_count
+
+# Nombre maximal de points d'une série d'effectif
+MAX_HEADCOUNT_POINTS = 400
+
+
+class HeadcountQuerySerializer(serializers.Serializer):
+    """Paramètres de la série d'effectif (défaut : les douze derniers mois)."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='month')
+    department = serializers.CharField(required=False)
+    by_department = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        end = attrs.setdefault('end', timezone.now().date())
+        start = attrs.setdefault('start', months_back(end, 11))
+        if start > end:
+            raise serializers.ValidationError("La date de début doit précéder la date de fin")
+        if period_count(start, end, attrs['granularity']) > MAX_HEADCOUNT_POINTS:
+            raise serializers.ValidationError(
+                f"Période trop longue pour cette granularité ({MAX_HEADCOUNT_POINTS} points maximum)"
+            )
+        return attrs
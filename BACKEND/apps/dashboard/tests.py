@@ -1,3 +1,131 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts import platform
+from apps.company.models import Company
+from apps.core.utils.stats_cache import cached_stats, invalidate_company_stats
+from apps.employees.models import Employee
+from apps.leaves.models import Leave
+
+User = get_user_model()
+
+
+class DashboardStatsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Configuration plateforme lue par le middleware : en cache pour tout le test
+        platform.invalidate_platform_config()
+        platform.get_platform_config()
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=self.company, role='rh'
+        )
+        self.today = timezone.now().date()
+        self.employees = [
+            self._employee(i, self.today - timedelta(days=days_ago))
+            for i, days_ago in enumerate((400, 100, 10))
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _employee(self, i, date_hired, company=None):
+        company = company or self.company
+        user = User.objects.create_user(
+            username=f"emp{i}-{company.pk.hex[:6]}", email=f"emp{i}-{company.pk.hex[:6]}@test.com",
+            password="password", company=company
+        )
+        return Employee.objects.create(
+            user=user, company=company, position="Agent", date_hired=date_hired, base_salary=1000
+        )
+
+    def test_dashboard_chart_and_cache(self):
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_employees'], 3)
+        self.assertEqual(len(response.data['chart_data']), 6)
+        self.assertEqual(response.data['chart_data'][-1]['value'], 3)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/dashboard/')
+        self.assertEqual(cached.data, response.data)
+
+    def test_headcount_endpoint(self):
+        self._employee(5, date(2024, 2, 10))
+        response = self.client.get('/api/dashboard/headcount/', {
+            'start': '2024-01-01', 'end': '2024-06-30', 'granularity': 'quarter',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(point['label'], point['headcount']) for point in response.data['series']],
+            [('T1 2024', 1), ('T2 2024', 1)],
+        )
+
+        response = self.client.get('/api/dashboard/headcount/', {
+            'start': '2000-01-01', 'end': '2024-06-30', 'granularity': 'day',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_headcount_extreme_dates(self):
+        response = self.client.get('/api/dashboard/headcount/', {
+            'start': '0001-01-01', 'end': '9999-12-31', 'granularity': 'day',
+        })
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/dashboard/headcount/', {'end': '0001-03-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['start'], date(1, 1, 1))
+        self.assertEqual(len(response.data['series']), 3)
+
+        response = self.client.get('/api/dashboard/headcount/', {
+            'start': '9999-01-01', 'end': '9999-12-31', 'granularity': 'year',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['series']), 1)
+
+    def test_owner_without_company(self):
+        owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="password", role='owner'
+        )
+        self.client.force_authenticate(user=owner)
+        for url in ('/api/dashboard/', '/api/dashboard/headcount/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_changes_invalidate_company_stats_only(self):
+        other = Company.objects.create(name="Other Company", email="other@test.com")
+        self.client.get('/api/stats/stats/')
+        cached_stats(other.pk, 'totals', lambda: {'total_leaves': 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Leave.objects.create(
+                company=self.company, employee=self.employees[0], leave_type='vacation',
+                start_date=date(2024, 5, 2), end_date=date(2024, 5, 3),
+            )
+
+        response = self.client.get('/api/stats/stats/')
+        self.assertEqual((response.data['total_leaves'], response.data['pending_leaves']), (1, 1))
+        self.assertEqual(cached_stats(other.pk, 'totals', lambda: {'total_leaves': 1}), {'total_leaves': 0})
+
+    def test_stats_cached_until_invalidated(self):
+        self.client.get('/api/stats/stats/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/stats/stats/')
+
+        invalidate_company_stats(self.company.pk)
+        with self.assertNumQueries(5):
+            self.client.get('/api/stats/stats/')
+
+    @override_settings(STATS_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get('/api/stats/stats/')
+        with self.assertNumQueries(5):
+            self.client.get('/api/stats/stats/')
@@ -3,12 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Count, Sum
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
+from apps.employees.headcount import headcount_series, months_back
 from apps.employees.models import Employee
 from apps.leaves.models import Leave
 from apps.payroll.models import Payroll
-from apps.attendance.models import Attendance
-from apps.core.utils.exporters import PDFExporter, ExcelExporter, CSVExporter
+from apps.attendance.rollup import rollup_totals
+from apps.core.utils.exporters import PDFExporter, ExcelExporter
+from apps.core.utils.advanced_exporters import StreamingCSVExporter
+from apps.core.utils.stats_cache import cached_stats
+from .serializers import HeadcountQuerySerializer
 
 class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -16,51 +20,65 @@ class DashboardViewSet(viewsets.ViewSet):
     def list(self, request):
         """Get dashboard stats"""
         company = request.user.company
+        if not company:
+            return Response({'error': 'Utilisateur non associé à une entreprise'}, status=403)
         today = timezone.now().date()
-        current_month = today.month
-        current_year = today.year
-        
-        # Calculate statistics
+        data = cached_stats(
+            company.pk, f"dashboard:{today.isoformat()}", lambda: self.compute_stats(company, today)
+        )
+        return Response(data)
+
+    @staticmethod
+    def compute_stats(company, today):
+        """
+        Indicateurs du tableau de bord (cinq requêtes).
+
+        Le graphique donne l'effectif à la fin de chacun des six derniers
+        mois calendaires (le mois en cours jusqu'à aujourd'hui).
+        """
         total_employees = Employee.objects.filter(company=company).count()
         pending_leaves = Leave.objects.filter(company=company, status='pending').count()
-        total_attendances = Attendance.objects.filter(
-            company=company,
-            date=today
-        ).count()
-        total_payrolls = Payroll.objects.filter(
+        total_attendances = rollup_totals(company, today, today + timedelta(days=1))['total']
+        payrolls = Payroll.objects.filter(
             company=company,
-            month=current_month,
-            year=current_year
-        ).count()
-        
-        payroll_mass = Payroll.objects.filter(
-            company=company,
-            month=current_month,
-            year=current_year
-        ).aggregate(Sum('net_salary'))['net_salary__sum'] or 0
-        
-        # Calculate chart data (last 6 months)
-        chart_data = []
-        for i in range(5, -1, -1):
-            date = today - timedelta(days=i*30)
-            month_name = date.strftime('%b')
-            # Count employees hired before or on this month
-            count = Employee.objects.filter(
-                company=company,
-                date_hired__lte=date
-            ).count()
-            chart_data.append({
-                "name": month_name,
-                "value": count
-            })
-        
-        return Response({
+            month=today.month,
+            year=today.year
+        ).aggregate(count=Count('id'), mass=Sum('net_salary'))
+        series = headcount_series(company, months_back(today, 5), today)
+
+        return {
             "total_employees": total_employees,
             "pending_leaves": pending_leaves,
             "total_attendances": total_attendances,
-            "total_payrolls": total_payrolls,
-            "payroll_mass": payroll_mass,
-            "chart_data": chart_data
+            "total_payrolls": payrolls['count'],
+            "payroll_mass": payrolls['mass'] or 0,
+            "chart_data": [
+                {"name": point['period'].strftime('%b'), "value": point['headcount']}
+                for point in series
+            ]
+        }
+
+    @action(detail=False, methods=['get'])
+    def headcount(self, request):
+        """
+        Évolution de l'effectif.
+
+        Paramètres : start, end (AAAA-MM-JJ), granularity (day, week, month,
+        quarter, year), department, by_department (true/false).
+        """
+        company = request.user.company
+        if not company:
+            return Response({'error': 'Utilisateur non associé à une entreprise'}, status=403)
+        params = HeadcountQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        name = "headcount:" + ":".join(f"{key}={options.get(key)}" for key in sorted(params.fields))
+        series = cached_stats(company.pk, name, lambda: headcount_series(company, **options))
+        return Response({
+            'start': options['start'],
+            'end': options['end'],
+            'granularity': options['granularity'],
+            'series': series,
         })
 
     @action(detail=False, methods=['get'], url_path='export/pdf')
@@ -120,22 +138,21 @@ class DashboardViewSet(viewsets.ViewSet):
     def export_csv(self, request):
         """Export Raw Monthly Data (CSV)"""
         # Example: List of all active employees with basic info
-        employees = Employee.objects.filter(company=request.user.company).select_related('user')
-        
-        data = []
-        for emp in employees:
-            data.append({
-                'ID': emp.id,
-                'Nom': emp.user.last_name,
-                'Prénom': emp.user.first_name,
-                'Poste': emp.position,
-                'Département': emp.department,
-                'Date d\'embauche': emp.date_hired,
-                'Salaire Base': emp.base_salary
-            })
+        employees = Employee.objects.filter(company=request.user.company)
 
-        exporter = CSVExporter(
-            data=data,
-            filename=f"donnees_brutes_{timezone.now().strftime('%Y%m%d')}"
+        exporter = StreamingCSVExporter(
+            employees,
+            columns=[
+                ('ID', 'id'),
+                ('Nom', 'user__last_name'),
+                ('Prénom', 'user__first_name'),
+                ('Poste', 'position'),
+                ('Département', 'department'),
+                ('Date d\'embauche', 'date_hired'),
+                ('Salaire Base', 'base_salary'),
+            ],
+            filename=f"donnees_brutes_{timezone.now().strftime('%Y%m%d')}",
+            delimiter=',',
+            bom=False
         )
         return exporter.export()
@@ -0,0 +1,12 @@
+"""
+Requêtes critiques des documents (voir apps.core.query_plans).
+"""
+from apps.core.query_plans import register_hot_query
+
+from .models import Document
+
+register_hot_query(
+    'documents.employee',
+    lambda ctx: Document.objects.filter(company=ctx.company, employee=ctx.employee),
+    label="Dossier documentaire d'un employé",
+)
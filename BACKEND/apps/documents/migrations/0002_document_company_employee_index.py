@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0003_companybranding'),
+        ('documents', '0001_initial'),
+        ('employees', '0002_alter_employee_date_hired'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['company', 'employee'], name='documents_d_company_fdaa2f_idx'),
+        ),
+    ]
@@ -17,5 +17,11 @@ class Document(BaseModel):
     document_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Dossier documentaire d'un employé
+            models.Index(fields=['company', 'employee']),
+        ]
+
     def __str__(self):
         return f"{self.document_type} - {self.file.name}"
@@ -1,20 +1,26 @@
 from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from datetime import datetime
+import logging
 from .models import Document
 from .serializers import DocumentSerializer
 from apps.accounts.permissions import IsCompanyMember
+from apps.core.query_budget import QueryBudgetMixin
+from apps.core.utils.streaming import stream_zip
 
-class DocumentViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class DocumentViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = DocumentSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember]
     filter_backends = [filters.SearchFilter]
     search_fields = ['employee__user__first_name', 'employee__user__last_name', 'document_type', 'description']
+    list_query_budget = 2
 
     def get_queryset(self):
-        return Document.objects.filter(company=self.request.user.company)
+        return Document.objects.filter(company=self.request.user.company).select_related('employee__user')
 
     def perform_create(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -33,23 +39,25 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not documents.exists():
             return Response({'error': 'Aucun document trouvé pour cet employé'}, status=404)
             
-        import zipfile
-        import io
-        
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, 'w') as zip_file:
-            for doc in documents:
-                if doc.file:
-                    try:
-                        # Add file to zip with a nice name
-                        ext = doc.file.name.split('.')[-1]
-                        filename = f"{doc.document_type}_{doc.description[:20] if doc.description else 'doc'}.{ext}"
-                        zip_file.writestr(filename, doc.file.read())
-                    except Exception as e:
-                        print(f"Error adding file to zip: {e}")
-                        
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/zip')
+        def entries():
+            for doc in documents.iterator():
+                if not doc.file:
+                    continue
+                try:
+                    doc.file.open('rb')
+                except Exception as e:
+                    logger.warning("Document %s ignoré dans l'archive : %s", doc.id, e)
+                    continue
+                try:
+                    # Add file to zip with a nice name
+                    ext = doc.file.name.split('.')[-1]
+                    filename = f"{doc.document_type}_{doc.description[:20] if doc.description else 'doc'}.{ext}"
+                    # Lecture par blocs : le fichier n'est jamais chargé en entier
+                    yield {'name': filename, 'content': doc.file, 'type': doc.document_type}
+                finally:
+                    doc.file.close()
+
+        response = StreamingHttpResponse(stream_zip(entries()), content_type='application/zip')
         response['Content-Disposition'] = f'attachment; filename="dossier_employe_{employee_id}.zip"'
         return response
 
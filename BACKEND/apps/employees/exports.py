@@ -0,0 +1,24 @@
+"""
+Exports des employés exécutables en tâche de fond (voir apps.core.export_jobs).
+"""
+from apps.core.export_jobs import register_export
+
+register_export(
+    'employees.complete_file',
+    view='apps.employees.views.EmployeeViewSet',
+    action='export_complete_file',
+    module='employees',
+    label='Dossier complet employé',
+    format_param='export_format',
+    lookup_param='employee_id',
+)
+
+register_export(
+    'employees.list',
+    view='apps.employees.views.EmployeeViewSet',
+    action='export_list_advanced',
+    module='employees',
+    label='Liste des employés',
+    export_type='excel',
+    format_param='format',
+)
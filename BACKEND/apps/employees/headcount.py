@@ -0,0 +1,170 @@
+"""
+Évolution de l'effectif d'une entreprise.
+
+L'effectif à la fin de chaque période (jour, semaine, mois, trimestre, année)
+est calculé à partir d'une seule requête groupée : les embauches sont
+comptées par période d'embauche (``Trunc`` sur ``date_hired``, et par
+département si demandé), puis cumulées période par période. Les embauches
+antérieures au début de la série constituent l'effectif initial.
+
+Les employés sans date d'embauche ne sont pas comptés, faute de date à
+laquelle les rattacher. Aucune date de départ n'est enregistrée sur
+``Employee`` : l'effectif ne fait donc que croître.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count
+from django.db.models.functions import Trunc
+
+from .models import Employee
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+
+def period_start(day, granularity):
+    """Premier jour de la période contenant ``day`` (comme ``Trunc``)."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    if granularity == 'year':
+        return date(day.year, 1, 1)
+    raise ValueError(f"Granularité inconnue : {granularity}")
+
+
+def next_period(start, granularity):
+    """Premier jour de la période suivante."""
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    months = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+    month = start.month - 1 + months
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def months_back(day, count):
+    """
+    Premier jour du mois situé ``count`` mois avant celui de ``day``
+    (au plus tôt janvier de l'an 1).
+    """
+    year, month = divmod(max(_month_index(day) - count, 12), 12)
+    return date(year, month + 1, 1)
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def period_count(start, end, granularity):
+    """Nombre de périodes couvrant [start, end], sans les énumérer."""
+    if start > end:
+        return 0
+    first, last = period_start(start, granularity), period_start(end, granularity)
+    if granularity == 'day':
+        return (last - first).days + 1
+    if granularity == 'week':
+        return (last - first).days // 7 + 1
+    months = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+    return (_month_index(last) - _month_index(first)) // months + 1
+
+
+def periods(start, end, granularity):
+    """Débuts des périodes couvrant [start, end] (bornes incluses)."""
+    result = []
+    current = period_start(start, granularity)
+    last = period_start(end, granularity)
+    while current <= last:
+        result.append(current)
+        if current == last:
+            # Pas de période suivante à calculer (date.max n'en a pas)
+            break
+        current = next_period(current, granularity)
+    return result
+
+
+def period_label(start, granularity):
+    if granularity == 'day':
+        return start.strftime('%d/%m/%Y')
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f"S{week:02d} {year}"
+    if granularity == 'month':
+        return start.strftime('%m/%Y')
+    if granularity == 'quarter':
+        return f"T{(start.month - 1) // 3 + 1} {start.year}"
+    return str(start.year)
+
+
+def headcount_series(company, start, end, granularity='month', by_department=False, department=None):
+    """
+    Effectif en fin de période sur [start, end] (une requête).
+
+    Args:
+        company: Entreprise
+        start: Premier jour de la série
+        end: Dernier jour de la série (les embauches postérieures sont ignorées)
+        granularity: 'day', 'week', 'month', 'quarter' ou 'year'
+        by_department: Détailler l'effectif par département
+        department: Limiter la série à un département
+
+    Returns:
+        Liste de points {'period': date de début, 'label': str,
+        'headcount': n, 'hires': n} ; avec ``by_department``, chaque point
+        porte aussi 'departments' : {département: effectif}.
+    """
+    starts = periods(start, end, granularity)
+    if not starts:
+        return []
+
+    employees = Employee.objects.filter(company=company, date_hired__lte=end)
+    if department is not None:
+        employees = employees.filter(department=department)
+    fields = ['period', 'department'] if by_department else ['period']
+    rows = (
+        employees.annotate(period=Trunc('date_hired', granularity))
+        .values(*fields)
+        .annotate(hires=Count('id'))
+        .order_by()
+    )
+
+    first = starts[0]
+    # Embauches par période, et par département si demandé
+    hires = {}
+    departments = {}
+    headcount = 0
+    for row in rows:
+        period = row['period']
+        if by_department:
+            name = row['department'] or ''
+            departments.setdefault(name, 0)
+        if period < first:
+            headcount += row['hires']
+            if by_department:
+                departments[name] += row['hires']
+            continue
+        bucket = hires.setdefault(period, {})
+        key = name if by_department else None
+        bucket[key] = bucket.get(key, 0) + row['hires']
+
+    series = []
+    for period in starts:
+        bucket = hires.get(period, {})
+        period_hires = sum(bucket.values())
+        headcount += period_hires
+        point = {
+            'period': period,
+            'label': period_label(period, granularity),
+            'headcount': headcount,
+            'hires': period_hires,
+        }
+        if by_department:
+            for name, count in bucket.items():
+                departments[name] += count
+            point['departments'] = dict(departments)
+        series.append(point)
+    return series
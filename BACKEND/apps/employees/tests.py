@@ -1,3 +1,87 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.attendance.models import Attendance
+from apps.company.models import Company
+from apps.employees.headcount import headcount_series
+from apps.employees.models import Employee
+
+User = get_user_model()
+
+
+class HeadcountSeriesTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Company")
+        hires = [
+            (date(2023, 6, 1), 'Finance'),
+            (date(2024, 1, 15), 'Finance'),
+            (date(2024, 1, 31), 'IT'),
+            (date(2024, 3, 2), 'IT'),
+            (date(2024, 7, 1), 'IT'),
+            (None, 'IT'),
+        ]
+        for i, (date_hired, department) in enumerate(hires):
+            user = User.objects.create_user(
+                username=f"emp{i}", email=f"emp{i}@test.com", password="password", company=self.company
+            )
+            Employee.objects.create(
+                user=user, company=self.company, position="Agent", department=department,
+                date_hired=date_hired, base_salary=1000
+            )
+
+    def test_monthly_series_in_one_query(self):
+        with self.assertNumQueries(1):
+            series = headcount_series(self.company, date(2024, 1, 10), date(2024, 4, 30))
+
+        self.assertEqual(
+            [(point['label'], point['headcount'], point['hires']) for point in series],
+            [('01/2024', 3, 2), ('02/2024', 3, 0), ('03/2024', 4, 1), ('04/2024', 4, 0)],
+        )
+
+    def test_end_date_excludes_later_hires(self):
+        series = headcount_series(self.company, date(2024, 1, 1), date(2024, 7, 15), granularity='quarter')
+        self.assertEqual([point['headcount'] for point in series], [4, 4, 5])
+
+        series = headcount_series(self.company, date(2024, 1, 1), date(2024, 1, 20), granularity='week')
+        self.assertEqual([point['headcount'] for point in series], [1, 1, 2])
+
+    def test_by_department(self):
+        series = headcount_series(
+            self.company, date(2024, 1, 1), date(2024, 12, 31), granularity='year', by_department=True
+        )
+        self.assertEqual(series[0]['departments'], {'Finance': 2, 'IT': 3})
+
+        series = headcount_series(
+            self.company, date(2024, 1, 1), date(2024, 2, 29), department='IT'
+        )
+        self.assertEqual([point['headcount'] for point in series], [1, 1])
+
+
+class AttendanceHistoryExportTests(TestCase):
+    def test_csv_is_streamed(self):
+        company = Company.objects.create(name="Test Company")
+        rh = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password", company=company, role='rh'
+        )
+        user = User.objects.create_user(
+            username="emp", email="emp@test.com", password="password", company=company,
+            first_name="Awa", last_name="Diallo"
+        )
+        employee = Employee.objects.create(user=user, company=company, position="Agent", department="IT")
+        Attendance.objects.create(company=company, employee=employee, date=date(2024, 5, 2), status='late')
 
-# Create your tests here.
+        client = APIClient()
+        client.force_authenticate(rh)
+        response = client.get(
+            f'/api/employees/{employee.pk}/export/attendance-history/',
+            {'export_format': 'csv', 'month': 5, 'year': 2024}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'Date;Arrivée;Départ;Statut;Notes')
+        self.assertEqual(lines[1], '02/05/2024;;;En retard;')
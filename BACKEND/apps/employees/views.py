@@ -10,26 +10,37 @@ from .models import Employee
 from .serializers import EmployeeSerializer
 from apps.leaves.models import Leave
 from apps.attendance.models import Attendance
+from apps.attendance.stats import month_bounds, status_summary
 from apps.payroll.models import Payroll
 from apps.accounts.permissions import IsCompanyMember, IsRH
 from apps.payroll.utils import generate_pdf
-from apps.core.utils import PDFExporter, ExcelExporter, CSVExporter
+from apps.core.utils import PDFExporter, ExcelExporter
 from apps.core.utils.advanced_exporters import (
     WeasyPrintPDFExporter,
     AdvancedExcelExporter,
-    UTF8CSVExporter
+    UTF8CSVExporter,
+    StreamingCSVExporter
 )
 from apps.core.export_models import ExportLog
+from apps.core.query_budget import QueryBudgetMixin
+from apps.core.utils.document_cache import USER_FIELDS, model_state, serve_document
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember, IsRH]
     filter_backends = [filters.SearchFilter]
     search_fields = ['user__first_name', 'user__last_name', 'position', 'department']
+    list_query_budget = 2
 
     def get_queryset(self):
-        return Employee.objects.filter(company=self.request.user.company).order_by('user__last_name', 'user__first_name')
+        # UserSerializer lit l'entreprise de l'utilisateur et son abonnement ;
+        # le profil employé (has_employee_profile) est renseigné par la jointure
+        return Employee.objects.filter(
+            company=self.request.user.company
+        ).select_related(
+            'user__company__subscription'
+        ).order_by('user__last_name', 'user__first_name')
 
     def perform_create(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -46,12 +57,25 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             'employee': employee,
             'current_date': date.today(),
         }
-        pdf_content = generate_pdf('documents/work_certificate.html', context)
-        if pdf_content:
-            response = HttpResponse(pdf_content.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="attestation_{employee.user.last_name}.pdf"'
-            return response
-        return Response({'error': 'Erreur lors de la génération du PDF'}, status=500)
+
+        def render():
+            pdf_content = generate_pdf('documents/work_certificate.html', context)
+            if pdf_content:
+                return pdf_content.read()
+            return Response({'error': 'Erreur lors de la génération du PDF'}, status=500)
+
+        return serve_document(
+            request,
+            'work_certificate',
+            {
+                'employee': model_state(employee),
+                'user': model_state(employee.user, USER_FIELDS),
+                'issued': context['current_date'],
+            },
+            render=render,
+            filename=f"attestation_{employee.user.last_name}.pdf",
+            company=employee.company,
+        )
 
     @action(detail=True, methods=['get'])
     def contract_pdf(self, request, pk=None):
@@ -134,28 +158,25 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='export/csv')
     def export_csv(self, request):
         """Export employees list as CSV"""
-        # Get all employees without pagination, ordered
+        # Get all employees without pagination, ordered, streamed row by row
         employees = Employee.objects.filter(
             company=request.user.company
-        ).select_related('user').order_by('user__last_name', 'user__first_name').values(
-            'user__first_name', 'user__last_name', 'position', 'department',
-            'user__email', 'phone', 'date_hired', 'base_salary'
-        )
-        data = []
-        for emp in employees:
-            data.append({
-                'Prénom': emp['user__first_name'],
-                'Nom': emp['user__last_name'],
-                'Poste': emp['position'],
-                'Département': emp.get('department', '-'),
-                'Email': emp['user__email'],
-                'Téléphone': emp.get('phone', '-'),
-                'Date d\'embauche': str(emp.get('date_hired', '-')),
-                'Salaire': str(emp.get('base_salary', '-'))
-            })
-        exporter = CSVExporter(
-            data=data,
-            filename=f'employes_{datetime.now().strftime("%Y%m%d")}'
+        ).order_by('user__last_name', 'user__first_name')
+        exporter = StreamingCSVExporter(
+            employees,
+            columns=[
+                ('Prénom', 'user__first_name'),
+                ('Nom', 'user__last_name'),
+                ('Poste', 'position'),
+                ('Département', 'department'),
+                ('Email', 'user__email'),
+                ('Téléphone', 'phone'),
+                ('Date d\'embauche', 'date_hired'),
+                ('Salaire', 'base_salary'),
+            ],
+            filename=f'employes_{datetime.now().strftime("%Y%m%d")}',
+            delimiter=',',
+            bom=False
         )
         return exporter.export()
     @action(detail=False, methods=['get'], url_path='export/staff-state')
@@ -225,12 +246,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             date__gte=thirty_days_ago
         )
         
-        attendance_summary = {
-            'present': attendance_records.filter(status='present').count(),
-            'late': attendance_records.filter(status='late').count(),
-            'absent': attendance_records.filter(status='absent').count(),
-            'excused': attendance_records.filter(status='excused').count()
-        }
+        attendance_summary = status_summary(attendance_records)
         
         # Historique paie (6 derniers mois)
         from apps.payroll.models import Payroll
@@ -322,16 +338,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
             
             # Logger l'export
-            ExportLog.objects.create(
-                company=request.user.company,
-                user=request.user,
+            ExportLog.objects.log_export(
+                request,
                 export_type='excel',
                 module='employees',
                 document_name=f"Dossier complet {employee.user.get_full_name()}",
-                parameters={'employee_id': str(employee.id), 'format': 'excel'},
-                status='completed',
-                started_at=timezone.now(),
-                completed_at=timezone.now()
+                parameters={'employee_id': str(employee.id), 'format': 'excel'}
             )
             
             return exporter.export()
@@ -419,16 +431,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
             
             # Logger l'export
-            ExportLog.objects.create(
-                company=request.user.company,
-                user=request.user,
+            ExportLog.objects.log_export(
+                request,
                 export_type='csv',
                 module='employees',
                 document_name=f"Dossier complet {employee.user.get_full_name()}",
-                parameters={'employee_id': str(employee.id), 'format': 'csv'},
-                status='completed',
-                started_at=timezone.now(),
-                completed_at=timezone.now()
+                parameters={'employee_id': str(employee.id), 'format': 'csv'}
             )
             
             return exporter.export()
@@ -470,16 +478,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             generator = EmployeeFileGenerator(company=request.user.company)
             
             # Logger l'export
-            ExportLog.objects.create(
-                company=request.user.company,
-                user=request.user,
+            ExportLog.objects.log_export(
+                request,
                 export_type='pdf',
                 module='employees',
                 document_name=f"Dossier complet {employee.user.get_full_name()}",
-                parameters={'employee_id': str(employee.id), 'format': 'pdf'},
-                status='completed',
-                started_at=timezone.now(),
-                completed_at=timezone.now()
+                parameters={'employee_id': str(employee.id), 'format': 'pdf'}
             )
             
             filename = f"dossier_complet_{employee.user.last_name}_{employee.user.first_name}"
@@ -508,20 +512,23 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='employees',
             document_name=f"Attestation de travail {employee.user.get_full_name()}",
-            parameters={'employee_id': str(employee.id)},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'employee_id': str(employee.id)}
         )
         
         filename = f"attestation_travail_{employee.user.last_name}_{employee.user.first_name}"
-        return generator.generate(data, filename)
+        return serve_document(
+            request,
+            'work_certificate_advanced',
+            {**data, 'issued': date.today()},
+            render=lambda: generator.generate(data, filename),
+            filename=f"{filename}.pdf",
+            company=request.user.company,
+        )
     
     @action(detail=False, methods=['get'], url_path='export/list-advanced')
     def export_list_advanced(self, request):
@@ -580,16 +587,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type=export_format,
             module='employees',
             document_name=f"Liste des employés",
-            parameters={'department': department, 'count': len(data)},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'department': department, 'count': len(data)}
         )
         
         return exporter.export()
@@ -645,16 +648,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='employees',
             document_name=f"Lettre de mutation {employee.user.get_full_name()}",
-            parameters={'employee_id': str(employee.id), 'new_position': new_position},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'employee_id': str(employee.id), 'new_position': new_position}
         )
         
         filename = f"lettre_mutation_{employee.user.last_name}_{employee.user.first_name}"
@@ -705,16 +704,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='employees',
             document_name=f"Lettre de fin de contrat {employee.user.get_full_name()}",
-            parameters={'employee_id': str(employee.id), 'termination_type': termination_type},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'employee_id': str(employee.id), 'termination_type': termination_type}
         )
         
         filename = f"lettre_fin_contrat_{employee.user.last_name}_{employee.user.first_name}"
@@ -774,16 +769,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='employees',
             document_name=f"Contrat de travail {employee.user.get_full_name()}",
-            parameters={'employee_id': str(employee.id), 'contract_type': contract_type},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'employee_id': str(employee.id), 'contract_type': contract_type}
         )
         
         filename = f"contrat_travail_{employee.user.last_name}_{employee.user.first_name}"
@@ -964,10 +955,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         # Récupérer les présences
         if month and year:
+            month_start, month_end = month_bounds(year, month)
             attendance_records = Attendance.objects.filter(
                 employee=employee,
-                date__month=month,
-                date__year=year
+                date__gte=month_start,
+                date__lt=month_end
             ).order_by('-date')
         else:
             start_date = date.today() - timedelta(days=days)
@@ -978,7 +970,27 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         branding = self._get_employee_branding(employee)
         
-        if export_format in ['excel', 'csv']:
+        if export_format == 'csv':
+            # Lecture par lots (.values().iterator()) : mémoire constante
+            status_labels = dict(Attendance.STATUS_CHOICES)
+            exporter = StreamingCSVExporter(
+                attendance_records,
+                columns=[
+                    ('Date', lambda row: row['date'].strftime('%d/%m/%Y')),
+                    ('Arrivée', lambda row: row['check_in'].strftime('%H:%M') if row['check_in'] else ''),
+                    ('Départ', lambda row: row['check_out'].strftime('%H:%M') if row['check_out'] else ''),
+                    ('Statut', lambda row: status_labels.get(row['status'], row['status'])),
+                    ('Notes', lambda row: row['notes'] or ''),
+                ],
+                fields=['date', 'check_in', 'check_out', 'status', 'notes'],
+                filename=f"presence_{employee.user.last_name}_{employee.user.first_name}",
+                escapechar='\\',
+                company=request.user.company,
+                user=request.user
+            )
+            return exporter.export()
+
+        if export_format == 'excel':
             data = []
             for record in attendance_records:
                 data.append({
@@ -988,33 +1000,18 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                     'Statut': record.get_status_display(),
                     'Notes': record.notes or '',
                 })
-            
-            if export_format == 'csv':
-                exporter = UTF8CSVExporter(
-                    data=data,
-                    filename=f"presence_{employee.user.last_name}_{employee.user.first_name}",
-                    company=request.user.company,
-                    user=request.user
-                )
-            else:
-                exporter = AdvancedExcelExporter(
-                    data=data,
-                    filename=f"presence_{employee.user.last_name}_{employee.user.first_name}",
-                    sheet_name="Historique Présence",
-                    company=request.user.company,
-                    user=request.user
-                )
+            exporter = AdvancedExcelExporter(
+                data=data,
+                filename=f"presence_{employee.user.last_name}_{employee.user.first_name}",
+                sheet_name="Historique Présence",
+                company=request.user.company,
+                user=request.user
+            )
             return exporter.export()
         
         else:  # PDF
             # Calculer les statistiques
-            attendance_summary = {
-                'present': attendance_records.filter(status='present').count(),
-                'late': attendance_records.filter(status='late').count(),
-                'absent': attendance_records.filter(status='absent').count(),
-                'excused': attendance_records.filter(status='excused').count(),
-                'total': attendance_records.count()
-            }
+            attendance_summary = status_summary(attendance_records)
             
             context = {
                 'employee': employee,
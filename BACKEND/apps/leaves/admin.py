@@ -1,4 +1,6 @@
 from django.contrib import admin
+from apps.attendance.absences import reclassify_absences
+from apps.core.utils.stats_cache import invalidate_company_stats
 from .models import Leave
 
 @admin.register(Leave)
@@ -9,9 +11,21 @@ class LeaveAdmin(admin.ModelAdmin):
     actions = ['approve_leaves', 'reject_leaves']
     
     def approve_leaves(self, request, queryset):
-        queryset.update(status='approved')
+        self._update_status(queryset, 'approved')
     approve_leaves.short_description = "Approuver les congés sélectionnés"
     
     def reject_leaves(self, request, queryset):
-        queryset.update(status='rejected')
+        self._update_status(queryset, 'rejected')
     reject_leaves.short_description = "Rejeter les congés sélectionnés"
+
+    @staticmethod
+    def _update_status(queryset, status):
+        # update() n'émet pas post_save : invalidation explicite des statistiques
+        # et reclassement des absences couvertes par ces congés
+        leaves = list(queryset.values_list('company_id', 'employee_id', 'start_date', 'end_date'))
+        company_ids = {company_id for company_id, *_ in leaves}
+        queryset.update(status=status)
+        for _, employee_id, start, end in leaves:
+            reclassify_absences(employee_id, start, end)
+        for company_id in company_ids:
+            invalidate_company_stats(company_id)
@@ -0,0 +1,23 @@
+"""
+Requêtes critiques des congés (voir apps.core.query_plans).
+"""
+from datetime import timedelta
+
+from apps.core.query_plans import register_hot_query
+
+from .models import Leave
+
+register_hot_query(
+    'leaves.pending',
+    lambda ctx: Leave.objects.filter(company=ctx.company, status='pending'),
+    label='Congés en attente',
+)
+
+register_hot_query(
+    'leaves.approved_period',
+    lambda ctx: Leave.objects.filter(
+        company=ctx.company, status='approved',
+        start_date__lt=ctx.today, end_date__gte=ctx.today - timedelta(days=1),
+    ).values_list('employee_id', 'start_date', 'end_date'),
+    label='Congés approuvés couvrant une période (absences)',
+)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0003_companybranding'),
+        ('employees', '0002_alter_employee_date_hired'),
+        ('leaves', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['company', 'status'], name='leaves_leav_company_67417f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['company', 'start_date', 'end_date'], name='leave_approved_period_idx'),
+        ),
+    ]
@@ -27,5 +27,17 @@ class Leave(BaseModel):
     reason = models.TextField(blank=True, null=True)
     attachment = models.FileField(upload_to='leave_attachments/', blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Congés en attente (tableau de bord, validation)
+            models.Index(fields=['company', 'status']),
+            # Congés approuvés couvrant une période (absences, planning)
+            models.Index(
+                fields=['company', 'start_date', 'end_date'],
+                condition=models.Q(status='approved'),
+                name='leave_approved_period_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.employee} - {self.leave_type} ({self.status})"
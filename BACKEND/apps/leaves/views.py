@@ -6,21 +6,26 @@ from datetime import datetime, date
 from .models import Leave
 from .serializers import LeaveSerializer, LeaveActionSerializer
 from apps.accounts.permissions import IsCompanyMember, IsManager, IsRH
+from apps.core.query_budget import QueryBudgetMixin
 
-class LeaveViewSet(viewsets.ModelViewSet):
+class LeaveViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = LeaveSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember]
     filter_backends = [filters.SearchFilter]
     search_fields = ['employee__user__first_name', 'employee__user__last_name', 'leave_type', 'status']
+    # Profil de l'employé connecté, COUNT et page
+    list_query_budget = 3
 
     def get_queryset(self):
         user = self.request.user
         if user.role in ['admin', 'rh', 'manager']:
-            return Leave.objects.filter(company=user.company)
+            queryset = Leave.objects.filter(company=user.company)
         # Employees see only their own leaves
-        if hasattr(user, 'employee_profile'):
-            return Leave.objects.filter(employee=user.employee_profile)
-        return Leave.objects.none()
+        elif hasattr(user, 'employee_profile'):
+            queryset = Leave.objects.filter(employee=user.employee_profile)
+        else:
+            return Leave.objects.none()
+        return queryset.select_related('employee__user')
 
     def perform_create(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -95,22 +100,22 @@ class LeaveViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='export/csv')
     def export_csv(self, request):
         """Export Leaves List (CSV)"""
-        leaves = self.get_queryset().select_related('employee__user').order_by('-start_date')
+        leaves = self.get_queryset().order_by('-start_date')
         
-        data = []
-        for leave in leaves:
-            data.append({
-                'Employé': f"{leave.employee.user.last_name} {leave.employee.user.first_name}",
-                'Type': leave.leave_type,
-                'Début': leave.start_date,
-                'Fin': leave.end_date,
-                'Statut': leave.status
-            })
-            
-        from apps.core.utils.exporters import CSVExporter
-        exporter = CSVExporter(
-            data=data,
-            filename=f"conges_{datetime.now().strftime('%Y%m%d')}"
+        from apps.core.utils.advanced_exporters import StreamingCSVExporter
+        exporter = StreamingCSVExporter(
+            leaves,
+            columns=[
+                ('Employé', lambda row: f"{row['employee__user__last_name']} {row['employee__user__first_name']}"),
+                ('Type', 'leave_type'),
+                ('Début', 'start_date'),
+                ('Fin', 'end_date'),
+                ('Statut', 'status'),
+            ],
+            fields=['employee__user__last_name', 'employee__user__first_name'],
+            filename=f"conges_{datetime.now().strftime('%Y%m%d')}",
+            delimiter=',',
+            bom=False
         )
         return exporter.export()
 
@@ -0,0 +1,18 @@
+"""
+Requêtes critiques des notifications (voir apps.core.query_plans).
+"""
+from apps.core.query_plans import register_hot_query
+
+from .models import Notification
+
+register_hot_query(
+    'notifications.list',
+    lambda ctx: Notification.objects.filter(recipient=ctx.user).order_by('-created_at', '-id')[:50],
+    label='Liste paginée des notifications',
+)
+
+register_hot_query(
+    'notifications.unread',
+    lambda ctx: Notification.objects.filter(recipient=ctx.user, read=False).order_by('-created_at'),
+    label='Notifications non lues',
+)
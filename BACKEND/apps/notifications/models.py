@@ -19,6 +19,11 @@ class Notification(BaseModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id']),
+            # Notifications non lues d'un utilisateur
+            models.Index(fields=['recipient', 'read', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.recipient}"
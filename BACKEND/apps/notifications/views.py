@@ -2,12 +2,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from apps.core.pagination import KeysetPagination
+from apps.core.query_budget import QueryBudgetMixin
 from .models import Notification
 from .serializers import NotificationSerializer
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    list_query_budget = 2
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
@@ -0,0 +1,251 @@
+"""
+Rendu en masse et stockage des fiches de paie.
+
+Les fiches sont rendues par lots dans un pool de processus (taille fixée par
+PAYSLIP_RENDER_WORKERS) et restituées sous forme d'octets bruts, dans l'ordre
+où elles sont terminées.
+
+Chaque fiche rendue est conservée dans ``Payroll.pdf_file`` avec la valeur
+de ``updated_at`` de la paie au moment du rendu (``pdf_version``) : tous les
+téléchargements (fiche seule, archive ZIP) servent ce fichier, et seule une
+paie modifiée depuis est rendue à nouveau. La clôture d'une période
+(``generate_payslips_task``) produit toutes les fiches d'un mois à l'avance.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, connections
+from django.db.models import F, Q
+
+from .models import Payroll
+
+logger = logging.getLogger(__name__)
+
+# Nombre de fiches rendues par tâche envoyée à un worker
+DEFAULT_CHUNK_SIZE = 10
+
+
+def build_payslip_exporter(payroll, user=None):
+    """Construit l'exporter PDF d'une fiche de paie."""
+    from apps.core.utils.advanced_exporters import WeasyPrintPDFExporter
+
+    context = {
+        'employee': payroll.employee,
+        'month': payroll.month,
+        'year': payroll.year,
+        'basic_salary': payroll.basic_salary,
+        'bonus': payroll.bonus,
+        'deductions': payroll.deductions,
+        'net_salary': payroll.net_salary,
+        'gross_salary': payroll.basic_salary + payroll.bonus,
+        'payment_date': payroll.payment_date,
+        'overtime_hours': getattr(payroll, 'overtime_hours', 0),
+        'overtime_amount': getattr(payroll, 'overtime_amount', 0),
+        'social_contributions': getattr(payroll, 'social_contributions', 0),
+        'tax_amount': getattr(payroll, 'tax_amount', 0),
+    }
+
+    return WeasyPrintPDFExporter(
+        data=[],
+        filename=f"fiche_paie_{payroll.employee.user.last_name}_{payroll.month}_{payroll.year}",
+        template_name='exports/pdf/payslip.html',
+        title=f"Bulletin de Paie - {payroll.month}/{payroll.year}",
+        document_id=str(payroll.id),
+        document_type='payslip',
+        company=payroll.company,
+        user=user,
+        context=context
+    )
+
+
+def payslip_archive_name(payroll):
+    """Chemin de la fiche de paie dans l'archive ZIP."""
+    user = payroll.employee.user
+    return f"fiches_paie/{user.last_name}_{user.first_name}/fiche_paie_{payroll.month}_{payroll.year}.pdf"
+
+
+def render_payslip_chunk(payroll_ids, user_id=None):
+    """
+    Rend un lot de fiches de paie.
+
+    Fonction de module (sérialisable) exécutée dans les workers du pool.
+
+    Returns:
+        Liste de tuples (payroll_id, nom dans l'archive, contenu PDF)
+    """
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    payrolls = Payroll.objects.filter(pk__in=payroll_ids).select_related(
+        'company', 'employee__user'
+    )
+    return [
+        (str(payroll.id), payslip_archive_name(payroll), build_payslip_exporter(payroll, user).render())
+        for payroll in payrolls
+    ]
+
+
+def _init_worker():
+    """Initialise un worker : Django prêt, aucune connexion héritée du parent."""
+    import django
+    django.setup()
+    for conn in connections.all():
+        conn.close()
+
+
+def get_worker_count(workers=None):
+    """Nombre de workers effectif (1 = rendu dans le processus courant)."""
+    if workers is None:
+        workers = getattr(settings, 'PAYSLIP_RENDER_WORKERS', 1)
+    workers = max(1, int(workers))
+    # Un processus démon (worker Celery prefork) ne peut pas créer d'enfants,
+    # et une transaction ouverte ne survivrait pas à la fermeture des connexions.
+    if workers > 1 and (multiprocessing.current_process().daemon or connection.in_atomic_block):
+        return 1
+    return workers
+
+
+def iter_rendered_payslips(payroll_ids, user=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Rend les fiches de paie et les restitue au fil de l'eau.
+
+    Args:
+        payroll_ids: Identifiants des fiches à rendre
+        user: Utilisateur à l'origine de l'export (métadonnées PDF)
+        workers: Taille du pool (défaut : PAYSLIP_RENDER_WORKERS)
+        chunk_size: Nombre de fiches par tâche
+
+    Yields:
+        Tuples (payroll_id, nom dans l'archive, contenu PDF), dans l'ordre
+        d'achèvement.
+    """
+    payroll_ids = [str(pk) for pk in payroll_ids]
+    chunks = [payroll_ids[i:i + chunk_size] for i in range(0, len(payroll_ids), chunk_size)]
+    user_id = user.pk if user else None
+    workers = get_worker_count(workers)
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from render_payslip_chunk(chunk, user_id)
+        return
+
+    # Les workers ouvrent leurs propres connexions : ne rien partager au fork
+    connections.close_all()
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_worker,
+    ) as executor:
+        pending_chunks = iter(chunks)
+        in_flight = set()
+        # Nombre de lots en vol borné pour limiter la mémoire
+        for chunk in pending_chunks:
+            in_flight.add(executor.submit(render_payslip_chunk, chunk, user_id))
+            if len(in_flight) >= workers * 2:
+                break
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                next_chunk = next(pending_chunks, None)
+                if next_chunk is not None:
+                    in_flight.add(executor.submit(render_payslip_chunk, next_chunk, user_id))
+
+
+def stale_payslips(queryset):
+    """Paies sans fiche stockée ou modifiées depuis le rendu de leur fiche."""
+    return queryset.filter(
+        Q(pdf_file='') | Q(pdf_file__isnull=True) | Q(pdf_version__isnull=True)
+        | ~Q(pdf_version=F('updated_at'))
+    )
+
+
+def store_payslip(payroll_id, version, content, previous=None):
+    """
+    Enregistre une fiche rendue dans ``Payroll.pdf_file``.
+
+    La paie n'est mise à jour (sans toucher à ``updated_at``) que si elle n'a
+    pas changé depuis ``version``, valeur de ``updated_at`` lue avant le rendu.
+
+    Args:
+        previous: Nom du fichier précédent, supprimé une fois remplacé
+
+    Returns:
+        Nom du fichier stocké, ou None si la paie a été modifiée entre-temps.
+    """
+    field = Payroll._meta.get_field('pdf_file')
+    name = field.storage.save(
+        field.generate_filename(None, f"payslip_{payroll_id}.pdf"), ContentFile(content)
+    )
+    updated = Payroll.objects.filter(pk=payroll_id, updated_at=version).update(
+        pdf_file=name, pdf_version=version
+    )
+    if not updated:
+        field.storage.delete(name)
+        return None
+    if previous and previous != name:
+        field.storage.delete(previous)
+    return name
+
+
+def ensure_payslip(payroll):
+    """Garantit que ``payroll.pdf_file`` est à jour, en rendant la fiche si besoin."""
+    while not payroll.has_current_pdf:
+        content = build_payslip_exporter(payroll).render()
+        name = store_payslip(payroll.pk, payroll.updated_at, content, payroll.pdf_file.name)
+        if name is None:
+            # Paie modifiée pendant le rendu : recommencer sur son nouvel état
+            payroll.refresh_from_db()
+            continue
+        payroll.pdf_file.name = name
+        payroll.pdf_version = payroll.updated_at
+    return payroll
+
+
+def payslip_etag(payroll):
+    """ETag de la fiche stockée d'une paie (change avec updated_at)."""
+    return f'"payslip-{payroll.pk}-{payroll.updated_at.timestamp():.6f}"'
+
+
+def generate_payslips(queryset, workers=None, force=False):
+    """
+    Rend et stocke les fiches absentes ou périmées d'un ensemble de paies.
+
+    Args:
+        queryset: Paies concernées
+        workers: Taille du pool (défaut : PAYSLIP_RENDER_WORKERS)
+        force: Rendre aussi les fiches à jour
+
+    Returns:
+        Nombre de fiches stockées
+    """
+    if not force:
+        queryset = stale_payslips(queryset)
+    snapshot = {
+        str(pk): (version, previous)
+        for pk, version, previous in queryset.values_list('id', 'updated_at', 'pdf_file')
+    }
+    stored = 0
+    for payroll_id, _, content in iter_rendered_payslips(list(snapshot), workers=workers):
+        version, previous = snapshot[payroll_id]
+        if store_payslip(payroll_id, version, content, previous):
+            stored += 1
+    return stored
+
+
+def iter_stored_payslips(queryset, workers=None):
+    """
+    Entrées d'archive ZIP des fiches stockées d'un ensemble de paies.
+
+    Les fiches absentes ou périmées sont d'abord rendues et stockées ; chaque
+    fichier est ensuite lu depuis le stockage pendant l'écriture de l'archive.
+    """
+    generate_payslips(queryset, workers=workers)
+    for payroll in queryset.select_related('employee__user').iterator():
+        with payroll.pdf_file.open('rb') as stream:
+            yield {'name': payslip_archive_name(payroll), 'content': stream, 'type': 'payslip'}
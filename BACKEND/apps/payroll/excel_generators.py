@@ -1,90 +1,28 @@
 """
 Générateur Excel pour les rapports de paie.
 """
-import io
-from datetime import datetime
-from django.http import HttpResponse
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.formatting.rule import ColorScaleRule, DataBarRule
+from openpyxl.formatting.rule import DataBarRule
+
+from apps.core.utils.excel import PALETTE, ExcelReport
 
 
 class PayrollExcelGenerator:
     def __init__(self, company):
         self.company = company
-        
-        # Palette de couleurs épurée
-        self.color_primary = '2563EB'
-        self.color_success = '10B981'
-        self.color_warning = 'F59E0B'
-        self.color_danger = 'EF4444'
-        self.color_text = '1F2937'
-        self.color_border = 'E5E7EB'
-        self.color_bg_light = 'F9FAFB'
-        
-        # Styles
-        self.header_font = Font(bold=True, color='FFFFFF', size=11)
-        self.header_fill = PatternFill(start_color=self.color_primary, end_color=self.color_primary, fill_type='solid')
-        self.center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        self.border_thin = Border(
-            left=Side(style='thin', color=self.color_border),
-            right=Side(style='thin', color=self.color_border),
-            top=Side(style='thin', color=self.color_border),
-            bottom=Side(style='thin', color=self.color_border)
-        )
-
-    def _create_workbook(self, title):
-        """Crée un classeur avec en-tête épuré."""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Rapport Paie"
-        
-        # Titre
-        ws.merge_cells('A1:H1')
-        cell = ws['A1']
-        cell.value = title
-        cell.font = Font(size=16, bold=True, color=self.color_primary)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Info entreprise
-        ws.merge_cells('A2:H2')
-        cell = ws['A2']
-        cell.value = self.company.name
-        cell.font = Font(size=11, color='666666')
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        ws.row_dimensions[3].height = 5
-        
-        return wb, ws
-
-    def _style_header(self, cell):
-        cell.font = self.header_font
-        cell.fill = self.header_fill
-        cell.alignment = self.center_alignment
-        cell.border = self.border_thin
 
-    def _style_cell(self, cell, center=True, bg_color=None):
-        if center:
-            cell.alignment = self.center_alignment
-        else:
-            cell.alignment = Alignment(horizontal='left', vertical='center')
-        cell.border = self.border_thin
-        if bg_color:
-            cell.fill = PatternFill(start_color=bg_color, end_color=bg_color, fill_type='solid')
+        # Palette de couleurs épurée
+        self.color_primary = PALETTE['primary']
+        self.color_success = PALETTE['success']
+        self.color_warning = PALETTE['warning']
+        self.color_danger = PALETTE['danger']
+        self.color_neutral = PALETTE['neutral']
 
-    def _auto_adjust_columns(self, ws):
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 3, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+    def _create_report(self, title):
+        """Crée un classeur en flux avec en-tête épuré."""
+        report = ExcelReport()
+        ws = report.add_sheet("Rapport Paie", width=8)
+        ws.title_block(title, self.company.name)
+        return report, ws
 
     def generate_monthly_payroll_report(self, data, filename):
         """
@@ -107,17 +45,11 @@ class PayrollExcelGenerator:
                 ]
             }
         """
-        wb, ws = self._create_workbook(f"Rapport de Paie - {data.get('month')}")
-        
-        current_row = 4
-        
+        report, ws = self._create_report(f"Rapport de Paie - {data.get('month')}")
+
         # === 1. KPIs Globaux ===
-        ws.merge_cells(f'A{current_row}:H{current_row}')
-        cell = ws[f'A{current_row}']
-        cell.value = "📊 VUE D'ENSEMBLE"
-        cell.font = Font(size=12, bold=True, color=self.color_primary)
-        current_row += 1
-        
+        ws.section("📊 VUE D'ENSEMBLE")
+
         payrolls = data.get('payrolls', [])
         total_basic = sum(p.get('basic_salary', 0) for p in payrolls)
         total_bonuses = sum(p.get('bonuses', 0) for p in payrolls)
@@ -125,154 +57,52 @@ class PayrollExcelGenerator:
         total_net = sum(p.get('net_salary', 0) for p in payrolls)
         total_paid = sum(p.get('net_salary', 0) for p in payrolls if p.get('is_paid'))
         total_pending = total_net - total_paid
-        
+
         kpis = [
             ('Total Brut', f"{total_basic + total_bonuses:,.0f} FCFA", self.color_primary),
             ('Total Déductions', f"{total_deductions:,.0f} FCFA", self.color_warning),
             ('Total Net', f"{total_net:,.0f} FCFA", self.color_success),
             ('Payé', f"{total_paid:,.0f} FCFA", self.color_success),
-            ('En attente', f"{total_pending:,.0f} FCFA", self.color_danger if total_pending > 0 else '6B7280'),
+            ('En attente', f"{total_pending:,.0f} FCFA", self.color_danger if total_pending > 0 else self.color_neutral),
         ]
-        
-        col = 1
-        for label, value, color in kpis[:4]:  # Limiter à 4 pour tenir sur la largeur
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = label
-            cell.font = Font(size=9, color='666666')
-            cell.alignment = self.center_alignment
-            
-            cell = ws.cell(row=current_row + 1, column=col)
-            cell.value = value
-            cell.font = Font(size=14, bold=True, color=color)
-            cell.alignment = self.center_alignment
-            
-            col += 2
-        
-        current_row += 4
-        
+        ws.kpis(kpis[:4], size=14, gap=2)  # Limiter à 4 pour tenir sur la largeur
+
         # === 2. Tableau Détaillé ===
-        ws.merge_cells(f'A{current_row}:H{current_row}')
-        cell = ws[f'A{current_row}']
-        cell.value = "📋 DÉTAIL PAR EMPLOYÉ"
-        cell.font = Font(size=12, bold=True, color=self.color_primary)
-        current_row += 1
-        
+        ws.section("📋 DÉTAIL PAR EMPLOYÉ")
         headers = ['Employé', 'Département', 'Salaire Base', 'Primes', 'Déductions', 'Net', 'Statut', 'Date Paiement']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = header
-            self._style_header(cell)
-        
-        header_row = current_row
-        current_row += 1
-        
-        for payroll in payrolls:
-            row_data = [
-                payroll.get('employee_name', ''),
-                payroll.get('department', '-'),
-                payroll.get('basic_salary', 0),
-                payroll.get('bonuses', 0),
-                payroll.get('deductions', 0),
-                payroll.get('net_salary', 0),
-                'Payé' if payroll.get('is_paid') else 'En attente',
-                payroll.get('payment_date', '-')
-            ]
-            
-            for col, val in enumerate(row_data, 1):
-                cell = ws.cell(row=current_row, column=col)
-                cell.value = val
-                
-                # Formatage numérique pour montants
-                if col >= 3 and col <= 6 and isinstance(val, (int, float)):
-                    cell.number_format = '#,##0'
-                
-                # Style
-                if col <= 2:
-                    self._style_cell(cell, center=False)
-                else:
-                    self._style_cell(cell, center=True)
-                
-                # Couleur pour statut
-                if col == 7:
-                    if val == 'Payé':
-                        cell.font = Font(bold=True, color=self.color_success)
-                    else:
-                        cell.font = Font(bold=True, color=self.color_warning)
-                
-                # Lignes alternées
-                if current_row % 2 == 0:
-                    self._style_cell(cell, center=(col > 2), bg_color=self.color_bg_light)
-            
-            current_row += 1
-        
+        paid_styles = ['cell', 'cell'] + ['amount'] * 4 + ['status_success', 'cell_center']
+        pending_styles = paid_styles[:6] + ['status_warning', 'cell_center']
+        header_row, first_row, last_row = ws.table(
+            headers,
+            (
+                [
+                    payroll.get('employee_name', ''),
+                    payroll.get('department', '-'),
+                    payroll.get('basic_salary', 0),
+                    payroll.get('bonuses', 0),
+                    payroll.get('deductions', 0),
+                    payroll.get('net_salary', 0),
+                    'Payé' if payroll.get('is_paid') else 'En attente',
+                    payroll.get('payment_date', '-')
+                ]
+                for payroll in payrolls
+            ),
+            lambda row: paid_styles if row[6] == 'Payé' else pending_styles,
+        )
+
         # === 3. Ligne de Total ===
-        total_row_data = [
-            'TOTAL',
-            '',
-            total_basic,
-            total_bonuses,
-            total_deductions,
-            total_net,
-            '',
-            ''
-        ]
-        
-        for col, val in enumerate(total_row_data, 1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = val
-            cell.font = Font(bold=True, size=11)
-            cell.fill = PatternFill(start_color=self.color_bg_light, end_color=self.color_bg_light, fill_type='solid')
-            cell.border = Border(
-                top=Side(style='medium', color=self.color_primary),
-                bottom=Side(style='medium', color=self.color_primary),
-                left=Side(style='thin', color=self.color_border),
-                right=Side(style='thin', color=self.color_border)
-            )
-            
-            if col >= 3 and col <= 6 and isinstance(val, (int, float)):
-                cell.number_format = '#,##0'
-                cell.alignment = self.center_alignment
-            elif col == 1:
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-        
+        ws.totals_row(first_row, last_row, sum_columns=range(3, 7))
+
         # === 4. Formatage Conditionnel ===
-        if current_row > header_row + 1:
+        if last_row >= first_row:
             # Barres de données pour salaire net
-            net_col = get_column_letter(6)
-            ws.conditional_formatting.add(
-                f'{net_col}{header_row + 1}:{net_col}{current_row - 1}',
-                DataBarRule(
-                    start_type='min',
-                    end_type='max',
-                    color=self.color_success,
-                    showValue=True
-                )
+            ws.conditional_format(
+                f'F{first_row}:F{last_row}',
+                DataBarRule(start_type='min', end_type='max', color=self.color_success, showValue=True)
             )
-        
-        # === 5. Figer et Filtres ===
-        ws.freeze_panes = ws[f'A{header_row + 1}']
-        ws.auto_filter.ref = f'A{header_row}:H{current_row - 1}'
-        self._auto_adjust_columns(ws)
-        
-        # === 6. Note de bas ===
-        current_row += 2
-        ws.merge_cells(f'A{current_row}:H{current_row}')
-        cell = ws[f'A{current_row}']
-        cell.value = f"Nombre d'employés : {len(payrolls)} • Total à payer : {total_net:,.0f} FCFA"
-        cell.font = Font(size=9, italic=True, color='666666')
-        cell.alignment = Alignment(horizontal='center')
-        
-        return self._save_response(wb, filename)
 
-    def _save_response(self, wb, filename):
-        """Sauvegarde et retourne le fichier Excel."""
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-        return response
+        # === 5. Note de bas ===
+        ws.spacer()
+        ws.note(f"Nombre d'employés : {len(payrolls)} • Total à payer : {total_net:,.0f} FCFA")
+
+        return report.response(filename)
@@ -0,0 +1,33 @@
+"""
+Exports de la paie exécutables en tâche de fond (voir apps.core.export_jobs).
+"""
+from apps.core.export_jobs import register_export
+
+register_export(
+    'payroll.bulk_payslips',
+    view='apps.payroll.views.PayrollViewSet',
+    action='export_bulk_payslips',
+    module='payroll',
+    label='Fiches de paie groupées (ZIP)',
+    export_type='zip',
+    required_params=('month', 'year'),
+)
+
+register_export(
+    'payroll.journal',
+    view='apps.payroll.views.PayrollViewSet',
+    action='export_payroll_journal_advanced',
+    module='payroll',
+    label='Journal de paie',
+    format_param='format',
+    required_params=('month', 'year'),
+)
+
+register_export(
+    'payroll.book',
+    view='apps.payroll.views.PayrollViewSet',
+    action='export_book',
+    module='payroll',
+    label='Livre de paie',
+    export_type='excel',
+)
@@ -0,0 +1,104 @@
+"""
+Génération en masse des paies d'un mois.
+
+Une paie est créée pour chaque employé actif de l'entreprise à partir de son
+salaire de base et des montants fournis, en quelques requêtes
+``bulk_create`` : le salaire net, calculé d'ordinaire par ``Payroll.save``,
+est calculé avant l'insertion. Les fiches PDF sont produites ensuite, par
+lot, lors de la clôture de la période (``generate_payslips_task``).
+"""
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+
+from apps.core.utils.stats_cache import invalidate_company_stats
+from apps.employees.models import Employee
+
+from .models import Payroll
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Montants modifiables employé par employé
+AMOUNT_FIELDS = ('basic_salary', 'bonus', 'deductions')
+
+
+def generate_month_payrolls(company, month, year, overrides=None, update_existing=False,
+                            batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Crée les paies d'un mois pour tous les employés actifs d'une entreprise.
+
+    Args:
+        company: Entreprise
+        month: Mois (1-12)
+        year: Année
+        overrides: ID d'employé -> montants ({'basic_salary', 'bonus',
+            'deductions'}) remplaçant les valeurs par défaut (salaire de
+            base de l'employé, aucune prime ni déduction)
+        update_existing: Recalculer les paies déjà présentes dont les
+            montants diffèrent (elles sont conservées telles quelles sinon) ;
+            une paie déjà payée n'est jamais modifiée
+        batch_size: Nombre de lignes par requête d'insertion
+
+    Returns:
+        {'employees': n, 'created': n, 'updated': n, 'skipped': n}
+    """
+    overrides = {str(employee_id): values for employee_id, values in (overrides or {}).items()}
+    employees = Employee.objects.filter(
+        company=company, user__is_active=True
+    ).values_list('id', 'base_salary')
+
+    with transaction.atomic():
+        existing_payrolls = Payroll.objects.filter(company=company, month=month, year=year)
+        if update_existing:
+            # Une paie marquée payée pendant la génération n'est pas réécrite
+            existing_payrolls = existing_payrolls.select_for_update()
+        existing = {
+            str(employee_id): (is_paid, amounts)
+            for employee_id, is_paid, *amounts in existing_payrolls.values_list(
+                'employee_id', 'is_paid', *AMOUNT_FIELDS
+            )
+        }
+
+        payrolls = []
+        created = updated = skipped = 0
+        for employee_id, base_salary in employees.iterator(chunk_size=batch_size):
+            key = str(employee_id)
+            amounts = {'basic_salary': base_salary, 'bonus': Decimal(0), 'deductions': Decimal(0)}
+            amounts.update(overrides.get(key, {}))
+
+            current = existing.get(key)
+            if current is not None:
+                is_paid, current_amounts = current
+                if (not update_existing or is_paid
+                        or current_amounts == [amounts[field] for field in AMOUNT_FIELDS]):
+                    skipped += 1
+                    continue
+                updated += 1
+            else:
+                created += 1
+
+            payroll = Payroll(company=company, employee_id=employee_id, month=month, year=year, **amounts)
+            payroll.compute_net_salary()
+            payrolls.append(payroll)
+
+        if update_existing:
+            conflict_options = {
+                'update_conflicts': True,
+                'unique_fields': ['employee', 'month', 'year'],
+                'update_fields': [*AMOUNT_FIELDS, 'net_salary', 'updated_at'],
+            }
+        else:
+            # Paie créée entre-temps pour le même (employee, month, year) : conservée
+            conflict_options = {'ignore_conflicts': True}
+        Payroll.objects.bulk_create(payrolls, batch_size=batch_size, **conflict_options)
+        if payrolls:
+            # Après validation : la génération peut s'exécuter dans une transaction
+            transaction.on_commit(partial(invalidate_company_stats, company.pk))
+
+    return {
+        'employees': created + updated + skipped,
+        'created': created,
+        'updated': updated,
+        'skipped': skipped,
+    }
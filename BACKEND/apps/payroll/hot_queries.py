@@ -0,0 +1,16 @@
+"""
+Requêtes critiques de la paie (voir apps.core.query_plans).
+"""
+from django.db.models import Count, Sum
+
+from apps.core.query_plans import register_hot_query
+
+from .models import Payroll
+
+register_hot_query(
+    'payroll.month',
+    lambda ctx: Payroll.objects.filter(
+        company=ctx.company, year=ctx.today.year, month=ctx.today.month,
+    ).values('company').annotate(count=Count('id'), mass=Sum('net_salary')),
+    label='Masse salariale du mois',
+)
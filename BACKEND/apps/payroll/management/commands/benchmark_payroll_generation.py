@@ -0,0 +1,65 @@
+"""
+Mesure la création des paies d'un mois : ligne par ligne (Payroll.save)
+contre génération en masse (bulk_create).
+
+Les employés sont créés dans une entreprise synthétique et toutes les
+écritures sont annulées en fin de mesure.
+
+Exemple :
+    python manage.py benchmark_payroll_generation --employees 5000
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.company.models import Company
+from apps.core.benchmarking import create_employees, rolled_back
+from apps.employees.models import Employee
+from apps.payroll.generation import generate_month_payrolls
+from apps.payroll.models import Payroll
+
+
+def create_one_by_one(company, month, year):
+    """Ancien chemin : une requête INSERT par paie via Payroll.save."""
+    employees = Employee.objects.filter(company=company, user__is_active=True)
+    for employee_id, base_salary in employees.values_list('id', 'base_salary'):
+        Payroll.objects.create(
+            company=company, employee_id=employee_id, month=month, year=year,
+            basic_salary=base_salary,
+        )
+
+
+class Command(BaseCommand):
+    help = "Benchmark de la génération des paies d'un mois (lignes/seconde)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = options['employees']
+        self.stdout.write(f"{count} employé(s)")
+        self.stdout.write(f"{'méthode':>14} {'durée (s)':>10} {'lignes/s':>10}")
+
+        with rolled_back():
+            company = Company.objects.create(
+                name="Benchmark paie", email=f"bench-{uuid.uuid4().hex[:8]}@example.com"
+            )
+            create_employees(company, count, options['batch_size'])
+
+            variants = (
+                ('ligne à ligne', lambda: create_one_by_one(company, 1, 2000)),
+                ('bulk_create', lambda: generate_month_payrolls(
+                    company, 2, 2000, batch_size=options['batch_size']
+                )),
+                ('relance', lambda: generate_month_payrolls(
+                    company, 2, 2000, overrides={}, update_existing=True,
+                    batch_size=options['batch_size']
+                )),
+            )
+            for label, run in variants:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label:>14} {elapsed:>10.3f} {count / elapsed:>10.0f}")
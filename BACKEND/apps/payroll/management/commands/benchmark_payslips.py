@@ -0,0 +1,59 @@
+"""
+Mesure le débit du rendu en masse des fiches de paie selon le nombre de workers.
+
+Exemple :
+    python manage.py benchmark_payslips --company <uuid> --month 1 --year 2024 --workers 1,2,4
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payroll.bulk import iter_rendered_payslips
+from apps.payroll.models import Payroll
+
+
+class Command(BaseCommand):
+    help = "Benchmark du rendu des fiches de paie (fiches/seconde par nombre de workers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', help="ID de l'entreprise (défaut : toutes)")
+        parser.add_argument('--month', type=int)
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--workers', default='1,2,4', help="Tailles de pool à comparer, ex. 1,2,4")
+        parser.add_argument('--limit', type=int, default=200, help="Nombre max de fiches rendues")
+        parser.add_argument('--chunk-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        payrolls = Payroll.objects.all()
+        if options['company']:
+            payrolls = payrolls.filter(company_id=options['company'])
+        if options['month']:
+            payrolls = payrolls.filter(month=options['month'])
+        if options['year']:
+            payrolls = payrolls.filter(year=options['year'])
+
+        payroll_ids = list(payrolls.values_list('id', flat=True)[:options['limit']])
+        if not payroll_ids:
+            raise CommandError("Aucune fiche de paie à rendre pour ces critères")
+
+        try:
+            worker_counts = [int(w) for w in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError("--workers doit être une liste d'entiers, ex. 1,2,4")
+
+        self.stdout.write(f"{len(payroll_ids)} fiche(s) de paie")
+        self.stdout.write(f"{'workers':>8} {'durée (s)':>10} {'fiches/s':>10} {'Mo':>8}")
+
+        for workers in worker_counts:
+            start = time.perf_counter()
+            count = 0
+            total_bytes = 0
+            for _, _, content in iter_rendered_payslips(
+                payroll_ids, workers=workers, chunk_size=options['chunk_size']
+            ):
+                count += 1
+                total_bytes += len(content)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{workers:>8} {elapsed:>10.2f} {count / elapsed:>10.1f} {total_bytes / 1048576:>8.1f}"
+            )
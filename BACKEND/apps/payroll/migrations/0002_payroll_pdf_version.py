@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payroll',
+            name='pdf_version',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0003_companybranding'),
+        ('employees', '0002_alter_employee_date_hired'),
+        ('payroll', '0002_payroll_pdf_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['company', 'year', 'month'], name='payroll_pay_company_37b2e1_idx'),
+        ),
+    ]
@@ -13,15 +13,31 @@ class Payroll(BaseModel):
     deductions = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     net_salary = models.DecimalField(max_digits=10, decimal_places=2)
     pdf_file = models.FileField(upload_to='payroll_pdfs/', blank=True, null=True)
+    # updated_at de la paie au moment du rendu de pdf_file (fiche à jour si égal)
+    pdf_version = models.DateTimeField(null=True, blank=True, editable=False)
     is_paid = models.BooleanField(default=False)
     payment_date = models.DateField(null=True, blank=True)
 
     class Meta:
         unique_together = ('employee', 'month', 'year')
+        indexes = [
+            # Paies d'une période (génération, masse salariale, journal)
+            models.Index(fields=['company', 'year', 'month']),
+        ]
 
-    def save(self, *args, **kwargs):
+    def compute_net_salary(self):
+        """Net = salaire de base + primes - déductions."""
         self.net_salary = self.basic_salary + self.bonus - self.deductions
+        return self.net_salary
+
+    def save(self, *args, **kwargs):
+        self.compute_net_salary()
         super().save(*args, **kwargs)
 
+    @property
+    def has_current_pdf(self):
+        """La fiche stockée correspond-elle à l'état actuel de la paie ?"""
+        return bool(self.pdf_file) and self.pdf_version == self.updated_at
+
     def __str__(self):
         return f"{self.employee} - {self.month}/{self.year}"
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from apps.employees.models import Employee
+
 from .models import Payroll
 
 class PayrollSerializer(serializers.ModelSerializer):
@@ -13,3 +15,38 @@ class PayrollSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         validated_data['company'] = request.user.company
         return super().create(validated_data)
+
+
+class PayrollOverrideSerializer(serializers.Serializer):
+    """Montants d'un employé remplaçant les valeurs par défaut"""
+    employee = serializers.UUIDField()
+    basic_salary = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    bonus = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    deductions = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+
+
+class PayrollBulkGenerateSerializer(serializers.Serializer):
+    """Génération des paies d'un mois pour tous les employés actifs"""
+    month = serializers.IntegerField(min_value=1, max_value=12)
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    overrides = PayrollOverrideSerializer(many=True, required=False, default=list)
+    update_existing = serializers.BooleanField(required=False, default=False)
+    generate_pdf = serializers.BooleanField(required=False, default=False)
+
+    def validate_overrides(self, overrides):
+        company = self.context['request'].user.company
+        mapping = {}
+        for override in overrides:
+            employee_id = str(override.pop('employee'))
+            if employee_id in mapping:
+                raise serializers.ValidationError(f"Employé en double : {employee_id}")
+            mapping[employee_id] = override
+        known = {
+            str(pk) for pk in Employee.objects.filter(
+                company=company, id__in=list(mapping)
+            ).values_list('id', flat=True)
+        }
+        unknown = sorted(set(mapping) - known)
+        if unknown:
+            raise serializers.ValidationError(f"Employés inconnus : {', '.join(unknown)}")
+        return mapping
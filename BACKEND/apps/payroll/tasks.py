@@ -0,0 +1,20 @@
+"""
+Tâches Celery du module paie.
+"""
+import logging
+
+from celery import shared_task
+
+from .bulk import generate_payslips
+from .models import Payroll
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def generate_payslips_task(company_id, month, year, force=False):
+    """Génère et stocke les fiches de paie d'une période (clôture)."""
+    payrolls = Payroll.objects.filter(company_id=company_id, month=month, year=year)
+    stored = generate_payslips(payrolls, force=force)
+    logger.info("Clôture %s/%s : %s fiche(s) de paie générée(s)", month, year, stored)
+    return stored
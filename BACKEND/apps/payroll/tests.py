@@ -1,3 +1,414 @@
-from django.test import TestCase
+from datetime import date
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.company.models import Company, CompanyBranding
+from apps.core.export_models import ExportLog
+from apps.core.utils import document_cache
+from apps.core.utils.document_cache import DocumentCache
+from apps.employees.models import Employee
+from apps.payroll.bulk import (
+    generate_payslips, get_worker_count, iter_rendered_payslips, stale_payslips
+)
+from apps.payroll.models import Payroll
+from apps.payroll.tasks import generate_payslips_task
+
+User = get_user_model()
+
+
+def use_temporary_storage(test):
+    """Fichiers (MEDIA_ROOT, cache de documents) écrits dans un répertoire temporaire."""
+    tmpdir = tempfile.TemporaryDirectory()
+    test.addCleanup(tmpdir.cleanup)
+    settings_override = override_settings(MEDIA_ROOT=tmpdir.name, DOCUMENT_CACHE_DIR=tmpdir.name + '/cache')
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    # Singleton reconstruit sur le répertoire temporaire
+    document_cache._document_cache = None
+    test.addCleanup(setattr, document_cache, '_document_cache', None)
+    return tmpdir.name
+
+
+class BulkPayslipTests(TestCase):
+    def setUp(self):
+        use_temporary_storage(self)
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        for i in range(3):
+            employee = Employee.objects.create(
+                user=User.objects.create_user(
+                    username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+                    company=self.company, first_name=f"Prenom{i}", last_name=f"Nom{i}"
+                ),
+                company=self.company,
+                position="Agent",
+                date_hired=date(2020, 1, 1),
+                base_salary=200000,
+            )
+            Payroll.objects.create(
+                company=self.company, employee=employee, month=3, year=2024,
+                basic_salary=200000, bonus=10000, deductions=5000
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def test_iter_rendered_payslips_returns_raw_bytes(self):
+        payroll_ids = Payroll.objects.values_list('id', flat=True)
+        rendered = list(iter_rendered_payslips(payroll_ids, user=self.user, workers=1, chunk_size=2))
+        self.assertEqual(len(rendered), 3)
+        for _, name, content in rendered:
+            self.assertTrue(name.startswith('fiches_paie/'))
+            self.assertTrue(content.startswith(b'%PDF'))
+
+    def test_pool_disabled_inside_transaction(self):
+        # TestCase ouvre une transaction : le rendu reste dans le processus
+        self.assertEqual(get_worker_count(4), 1)
+
+    def test_bulk_payslips_zip(self):
+        response = self.client.get(
+            '/api/payroll/export/bulk-payslips/', {'month': 3, 'year': 2024}
+        )
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        names = archive.namelist()
+        self.assertEqual(len(names), 4)
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(manifest['file_count'], 3)
+        self.assertEqual(manifest['payroll_count'], 3)
+
+
+class PayrollJournalTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        for i, (basic, paid) in enumerate(((200000, True), (300000, False))):
+            employee = Employee.objects.create(
+                user=User.objects.create_user(
+                    username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+                    company=self.company, first_name=f"Prenom{i}", last_name=f"Nom{i}"
+                ),
+                company=self.company,
+                position="Agent",
+                date_hired=date(2020, 1, 1),
+                base_salary=basic,
+            )
+            Payroll.objects.create(
+                company=self.company, employee=employee, month=3, year=2024,
+                basic_salary=basic, bonus=10000, deductions=5000, is_paid=paid
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def test_journal_pdf_from_report_frame(self):
+        response = self.client.get('/api/payroll/export/journal-advanced/', {'month': 3, 'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_journal_summary_in_one_query(self):
+        from apps.core.utils.reports import ReportFrame
+
+        payrolls = Payroll.objects.filter(company=self.company).order_by('employee__user__last_name')
+        with self.assertNumQueries(1):
+            frame = ReportFrame.from_queryset(
+                payrolls, {'net_salary': 'net_salary', 'bonus': 'bonus'}, decimals=['net_salary', 'bonus']
+            )
+        summary = frame.summary(['net_salary', 'bonus'])
+        self.assertEqual(summary['net_salary'], {'sum': 510000.0, 'min': 205000.0, 'max': 305000.0, 'mean': 255000.0})
+        self.assertEqual(summary['bonus']['sum'], 20000.0)
+
+    def test_journal_empty_period(self):
+        response = self.client.get('/api/payroll/export/journal-advanced/', {'month': 4, 'year': 2024})
+        self.assertEqual(response.status_code, 404)
+
+
+class DocumentCacheTests(TestCase):
+    def setUp(self):
+        self.root = use_temporary_storage(self) + '/cache'
+
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        employee = Employee.objects.create(
+            user=User.objects.create_user(
+                username="emp", email="emp@test.com", password="password",
+                company=self.company, first_name="Prenom", last_name="Nom"
+            ),
+            company=self.company,
+            position="Agent",
+            date_hired=date(2020, 1, 1),
+            base_salary=200000,
+        )
+        self.payroll = Payroll.objects.create(
+            company=self.company, employee=employee, month=3, year=2024,
+            basic_salary=200000, bonus=10000, deductions=5000
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/payroll/{self.payroll.id}/export/salary-certificate/'
+
+    def test_repeat_download_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        content = b''.join(first.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+
+        with mock.patch('apps.core.utils.advanced_exporters.WeasyPrintPDFExporter.render') as render:
+            second = self.client.get(self.url)
+        render.assert_not_called()
+        self.assertEqual(b''.join(second.streaming_content), content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_key_changes_with_payroll_and_branding(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.payroll.bonus = 20000
+        self.payroll.save()
+        updated = self.client.get(self.url)['ETag']
+        self.assertNotEqual(updated, etag)
+
+        CompanyBranding.objects.create(company=self.company, primary_color='#000000')
+        self.assertNotEqual(self.client.get(self.url)['ETag'], updated)
+
+    def test_download_survives_unavailable_metrics_cache(self):
+        with mock.patch.object(document_cache, 'metrics_cache') as metrics_cache:
+            metrics_cache.incr.side_effect = ConnectionError
+            metrics_cache.get_many.side_effect = ConnectionError
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            self.assertEqual(document_cache.get_document_cache().stats()['hits'], 0)
+
+    def test_evict_by_size_keeps_recent_entries(self):
+        cache = DocumentCache(root=self.root, max_bytes=250, max_age=3600)
+        now = time.time()
+        for i, key in enumerate(('a' * 64, 'b' * 64, 'c' * 64)):
+            path = cache.put(key, b'x' * 100)
+            os.utime(path, (now - 100 + i, now - 100 + i))
+
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.open('a' * 64))
+        stream = cache.open('c' * 64)
+        self.assertIsNotNone(stream)
+        stream.close()
+
+
+class StoredPayslipTests(TestCase):
+    def setUp(self):
+        use_temporary_storage(self)
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        self.payrolls = []
+        for i in range(2):
+            employee = Employee.objects.create(
+                user=User.objects.create_user(
+                    username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+                    company=self.company, first_name=f"Prenom{i}", last_name=f"Nom{i}"
+                ),
+                company=self.company,
+                position="Agent",
+                date_hired=date(2020, 1, 1),
+                base_salary=200000,
+            )
+            self.payrolls.append(Payroll.objects.create(
+                company=self.company, employee=employee, month=3, year=2024,
+                basic_salary=200000, bonus=10000, deductions=5000
+            ))
+        self.client.force_authenticate(user=self.user)
+
+    def test_close_period_stores_payslips(self):
+        with mock.patch('apps.payroll.views.generate_payslips_task.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/api/payroll/close-period/', {'month': 3, 'year': 2024}, format='json'
+                )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['pending_count'], 2)
+        args = apply_async.call_args.kwargs['args']
+        self.assertEqual(args[1:], [3, 2024, False])
+
+        self.assertEqual(generate_payslips_task(*args), 2)
+        for payroll in Payroll.objects.all():
+            self.assertTrue(payroll.has_current_pdf)
+            with payroll.pdf_file.open('rb') as stream:
+                self.assertTrue(stream.read().startswith(b'%PDF'))
+
+        # Période déjà clôturée : rien à régénérer
+        self.assertEqual(generate_payslips_task(*args), 0)
+
+    def test_only_modified_payrolls_are_rendered_again(self):
+        generate_payslips(Payroll.objects.all(), workers=1)
+        modified = Payroll.objects.get(pk=self.payrolls[0].pk)
+        old_name = modified.pdf_file.name
+        modified.bonus = 20000
+        modified.save()
+        self.assertFalse(modified.has_current_pdf)
+
+        self.assertEqual(list(stale_payslips(Payroll.objects.all())), [modified])
+        self.assertEqual(generate_payslips(Payroll.objects.all(), workers=1), 1)
+        modified.refresh_from_db()
+        self.assertTrue(modified.has_current_pdf)
+        # L'ancienne fiche est supprimée du stockage
+        self.assertNotEqual(modified.pdf_file.name, old_name)
+        self.assertFalse(modified.pdf_file.storage.exists(old_name))
+
+    def test_downloads_serve_stored_file(self):
+        generate_payslips(Payroll.objects.all(), workers=1)
+        payroll = Payroll.objects.get(pk=self.payrolls[0].pk)
+        with payroll.pdf_file.open('rb') as stream:
+            stored = stream.read()
+
+        with mock.patch('apps.core.utils.advanced_exporters.WeasyPrintPDFExporter.render') as render:
+            single = self.client.get(f'/api/payroll/{payroll.id}/export/payslip-advanced/')
+            self.assertEqual(b''.join(single.streaming_content), stored)
+            self.assertEqual(
+                self.client.get(
+                    f'/api/payroll/{payroll.id}/export/payslip-advanced/',
+                    HTTP_IF_NONE_MATCH=single['ETag'],
+                ).status_code,
+                304
+            )
+            # Revalidation 304 : aucun fichier servi, pas de nouvel export journalisé
+            self.assertEqual(
+                ExportLog.objects.filter(document_name__startswith="Fiche de paie").count(), 1
+            )
+
+            response = self.client.get(
+                '/api/payroll/export/bulk-payslips/', {'month': 3, 'year': 2024}
+            )
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        render.assert_not_called()
+        self.assertIn(stored, [archive.read(name) for name in archive.namelist()])
+
+    def test_payslip_rendered_on_first_download(self):
+        response = self.client.get(f'/api/payroll/{self.payrolls[0].id}/export/payslip-advanced/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertTrue(Payroll.objects.get(pk=self.payrolls[0].pk).has_current_pdf)
+
+
+class BulkPayrollGenerationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(name="Test Company")
+        self.user = User.objects.create_user(
+            username="rh", email="rh@test.com", password="password",
+            company=self.company, role='rh'
+        )
+        self.employees = []
+        for i in range(3):
+            self.employees.append(Employee.objects.create(
+                user=User.objects.create_user(
+                    username=f"emp{i}", email=f"emp{i}@test.com", password="password",
+                    company=self.company, first_name=f"Prenom{i}", last_name=f"Nom{i}",
+                    is_active=i < 2,
+                ),
+                company=self.company,
+                position="Agent",
+                date_hired=date(2020, 1, 1),
+                base_salary=100000 * (i + 1),
+            ))
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/payroll/bulk-generate/'
+
+    def test_creates_payrolls_for_active_employees(self):
+        response = self.client.post(self.url, {
+            'month': 4, 'year': 2024,
+            'overrides': [{'employee': str(self.employees[1].id), 'bonus': '5000', 'deductions': '2000'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertIsNone(response.data['task_id'])
+
+        payrolls = {p.employee_id: p for p in Payroll.objects.filter(month=4, year=2024)}
+        self.assertEqual(set(payrolls), {self.employees[0].id, self.employees[1].id})
+        self.assertEqual(payrolls[self.employees[0].id].net_salary, 100000)
+        self.assertEqual(payrolls[self.employees[1].id].net_salary, 203000)
+
+    def test_stats_invalidated_after_commit(self):
+        with mock.patch('apps.payroll.generation.invalidate_company_stats') as invalidate:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post(self.url, {'month': 4, 'year': 2024}, format='json')
+            invalidate.assert_not_called()
+            for callback in callbacks:
+                callback()
+        invalidate.assert_called_once_with(self.company.pk)
+
+    def test_existing_payrolls_skipped_or_updated(self):
+        Payroll.objects.create(
+            company=self.company, employee=self.employees[0], month=4, year=2024,
+            basic_salary=90000,
+        )
+        response = self.client.post(self.url, {'month': 4, 'year': 2024}, format='json')
+        self.assertEqual((response.data['created'], response.data['skipped']), (1, 1))
+        self.assertEqual(Payroll.objects.get(employee=self.employees[0]).net_salary, 90000)
+
+        response = self.client.post(self.url, {
+            'month': 4, 'year': 2024, 'update_existing': True,
+        }, format='json')
+        self.assertEqual((response.data['updated'], response.data['skipped']), (1, 1))
+        self.assertEqual(Payroll.objects.get(employee=self.employees[0]).net_salary, 100000)
+        self.assertEqual(Payroll.objects.filter(month=4, year=2024).count(), 2)
+
+    def test_paid_payroll_left_unchanged(self):
+        paid = Payroll.objects.create(
+            company=self.company, employee=self.employees[0], month=4, year=2024,
+            basic_salary=90000, is_paid=True,
+        )
+        response = self.client.post(self.url, {
+            'month': 4, 'year': 2024, 'update_existing': True,
+            'overrides': [{'employee': str(self.employees[0].id), 'bonus': '5000'}],
+        }, format='json')
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['skipped']), (1, 0, 1))
+        paid.refresh_from_db()
+        self.assertEqual((paid.basic_salary, paid.bonus, paid.net_salary), (90000, 0, 90000))
+
+    def test_generate_pdf_schedules_period_close(self):
+        with mock.patch('apps.payroll.views.generate_payslips_task.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, {
+                    'month': 4, 'year': 2024, 'generate_pdf': True,
+                }, format='json')
+        self.assertIsNotNone(response.data['task_id'])
+        self.assertEqual(apply_async.call_args.kwargs['args'][1:], [4, 2024, False])
+
+    def test_unknown_override_employee_rejected(self):
+        other = Company.objects.create(name="Other", email="other@test.com")
+        stranger = Employee.objects.create(
+            user=User.objects.create_user(
+                username="x", email="x@test.com", password="password", company=other
+            ),
+            company=other,
+            position="Agent",
+        )
+        response = self.client.post(self.url, {
+            'month': 4, 'year': 2024,
+            'overrides': [{'employee': str(stranger.id), 'bonus': '1'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payroll.objects.exists())
@@ -1,6 +1,5 @@
 from io import BytesIO
 from django.template.loader import get_template
-from xhtml2pdf import pisa
 from django.core.files.base import ContentFile
 import logging
 
@@ -20,6 +19,8 @@ def generate_pdf(template_src, context_dict):
     Raises:
         Exception: Si la génération du PDF échoue
     """
+    from xhtml2pdf import pisa
+    
     try:
         template = get_template(template_src)
         html = template.render(context_dict)
@@ -2,49 +2,61 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.http import HttpResponse
-from django.utils import timezone
+from django.db import transaction
 from datetime import date
 import io
+import uuid
 
 from .models import Payroll
-from .serializers import PayrollSerializer
+from .serializers import PayrollBulkGenerateSerializer, PayrollSerializer
 from .utils import generate_pdf
+from .bulk import ensure_payslip, iter_stored_payslips, payslip_etag, stale_payslips
+from .generation import generate_month_payrolls
+from .tasks import generate_payslips_task
 from apps.accounts.permissions import IsCompanyMember, IsRH
 from apps.core.utils.advanced_exporters import (
     WeasyPrintPDFExporter,
     AdvancedExcelExporter,
+    UTF8CSVExporter,
     ZIPExporter
 )
+from apps.core.utils.document_cache import (
+    USER_FIELDS, file_response, model_state, not_modified, serve_document
+)
+from apps.core.utils.reports import ReportFrame
 from apps.core.export_models import ExportLog
+from apps.core.query_budget import QueryBudgetMixin
+
+# Colonnes du journal de paie exporté (colonne du frame -> en-tête)
+JOURNAL_COLUMNS = {
+    'matricule': 'Matricule',
+    'last_name': 'Nom',
+    'first_name': 'Prénom',
+    'position': 'Poste',
+    'basic_salary': 'Salaire Base',
+    'bonus': 'Primes',
+    'gross': 'Brut',
+    'deductions': 'Déductions',
+    'net_salary': 'Net à Payer',
+    'status': 'Statut',
+}
 
-class PayrollViewSet(viewsets.ModelViewSet):
+
+class PayrollViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = PayrollSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember, IsRH]
     filter_backends = [filters.SearchFilter]
     search_fields = ['employee__user__first_name', 'employee__user__last_name', 'month', 'year']
+    list_query_budget = 2
 
     def get_queryset(self):
-        return Payroll.objects.filter(company=self.request.user.company)
+        return Payroll.objects.filter(company=self.request.user.company).select_related('employee__user')
 
     def perform_create(self, serializer):
         # Auto-calculate net salary (handled in model save)
-        payroll = serializer.save(company=self.request.user.company)
-        
-        # Generate PDF
-        context = {
-            'company': payroll.company,
-            'employee': payroll.employee,
-            'month': payroll.month,
-            'year': payroll.year,
-            'basic_salary': payroll.basic_salary,
-            'bonus': payroll.bonus,
-            'deductions': payroll.deductions,
-            'net_salary': payroll.net_salary,
-        }
-        pdf_content = generate_pdf('payroll/payslip.html', context)
-        if pdf_content:
-            filename = f"payslip_{payroll.employee.id}_{payroll.month}_{payroll.year}.pdf"
-            payroll.pdf_file.save(filename, pdf_content)
+        # La fiche PDF est produite à la clôture de la période ou au premier
+        # téléchargement (voir bulk.ensure_payslip)
+        serializer.save(company=self.request.user.company)
 
     def perform_update(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -66,12 +78,106 @@ class PayrollViewSet(viewsets.ModelViewSet):
             'payment_number': f"REC-{payroll.id}",
             'current_date': date.today(),
         }
-        pdf_content = generate_pdf('payroll/payment_receipt.html', context)
-        if pdf_content:
-            response = HttpResponse(pdf_content.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="recu_{payroll.employee.user.last_name}_{payroll.month}_{payroll.year}.pdf"'
-            return response
-        return Response({'error': 'Erreur lors de la génération du PDF'}, status=500)
+
+        def render():
+            pdf_content = generate_pdf('payroll/payment_receipt.html', context)
+            if pdf_content:
+                return pdf_content.read()
+            return Response({'error': 'Erreur lors de la génération du PDF'}, status=500)
+
+        return serve_document(
+            request,
+            'payment_receipt',
+            {
+                'payroll': model_state(payroll),
+                'employee': model_state(payroll.employee),
+                'user': model_state(payroll.employee.user, USER_FIELDS),
+                'issued': context['current_date'],
+            },
+            render=render,
+            filename=f"recu_{payroll.employee.user.last_name}_{payroll.month}_{payroll.year}.pdf",
+            company=payroll.company,
+        )
+
+    @action(detail=False, methods=['post'], url_path='close-period')
+    def close_period(self, request):
+        """
+        Clôturer une période : génère en tâche de fond les fiches de paie
+        absentes ou périmées du mois et les stocke dans pdf_file.
+        
+        Body:
+            - month: Mois (1-12)
+            - year: Année
+            - force: Régénérer aussi les fiches à jour (optionnel)
+        """
+        try:
+            month = int(request.data.get('month'))
+            year = int(request.data.get('year'))
+        except (TypeError, ValueError):
+            return Response({'error': 'Mois et année requis'}, status=400)
+        force = str(request.data.get('force', '')).lower() in ('1', 'true', 'yes')
+        
+        payrolls = self.get_queryset().filter(month=month, year=year)
+        payroll_count = payrolls.count()
+        if not payroll_count:
+            return Response({'error': 'Aucune fiche de paie pour cette période'}, status=404)
+        
+        pending_count = payroll_count if force else stale_payslips(payrolls).count()
+        task_id = self._schedule_payslips(month, year, force) if pending_count else None
+        
+        return Response({
+            'task_id': task_id,
+            'month': month,
+            'year': year,
+            'payroll_count': payroll_count,
+            'pending_count': pending_count,
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-generate')
+    def bulk_generate(self, request):
+        """
+        Générer les paies du mois pour tous les employés actifs.
+        
+        Body:
+            - month: Mois (1-12)
+            - year: Année
+            - overrides: [{employee, basic_salary, bonus, deductions}] (optionnel)
+            - update_existing: Recalculer les paies existantes (optionnel)
+            - generate_pdf: Clôturer ensuite la période (fiches PDF en tâche de fond)
+        """
+        serializer = PayrollBulkGenerateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        with transaction.atomic():
+            result = generate_month_payrolls(
+                request.user.company,
+                data['month'],
+                data['year'],
+                overrides=data['overrides'],
+                update_existing=data['update_existing'],
+            )
+            task_id = None
+            if data['generate_pdf'] and (result['created'] or result['updated']):
+                task_id = self._schedule_payslips(data['month'], data['year'])
+        
+        return Response({
+            **result,
+            'month': data['month'],
+            'year': data['year'],
+            'task_id': task_id,
+        }, status=status.HTTP_201_CREATED)
+
+    def _schedule_payslips(self, month, year, force=False):
+        """Lance la génération des fiches de la période après la transaction."""
+        task_id = str(uuid.uuid4())
+        company_id = str(self.request.user.company.id)
+        transaction.on_commit(
+            lambda: generate_payslips_task.apply_async(
+                args=[company_id, month, year, force], task_id=task_id
+            )
+        )
+        return task_id
 
     @action(detail=False, methods=['get'], url_path='export/book')
     def export_book(self, request):
@@ -163,60 +269,35 @@ class PayrollViewSet(viewsets.ModelViewSet):
         """
         payroll = self.get_object()
         
-        # Préparer le contexte
-        context = {
-            'employee': payroll.employee,
-            'month': payroll.month,
-            'year': payroll.year,
-            'basic_salary': payroll.basic_salary,
-            'bonus': payroll.bonus,
-            'deductions': payroll.deductions,
-            'net_salary': payroll.net_salary,
-            'gross_salary': payroll.basic_salary + payroll.bonus,
-            'payment_date': payroll.payment_date,
-            'overtime_hours': getattr(payroll, 'overtime_hours', 0),
-            'overtime_amount': getattr(payroll, 'overtime_amount', 0),
-            'social_contributions': getattr(payroll, 'social_contributions', 0),
-            'tax_amount': getattr(payroll, 'tax_amount', 0),
-        }
-        
-        # Créer l'exporter
-        exporter = WeasyPrintPDFExporter(
-            data=[],
-            filename=f"fiche_paie_{payroll.employee.user.last_name}_{payroll.month}_{payroll.year}",
-            template_name='exports/pdf/payslip.html',
-            title=f"Bulletin de Paie - {payroll.month}/{payroll.year}",
-            document_id=str(payroll.id),
-            document_type='payslip',
-            company=request.user.company,
-            user=request.user,
-            context=context
-        )
+        # Fiche stockée à la clôture, rendue seulement si la paie a changé depuis
+        response = not_modified(request, payslip_etag(payroll))
+        if response is not None:
+            return response
         
-        # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        # Logger l'export (pas pour une revalidation 304 : aucun fichier servi)
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='payroll',
             document_name=f"Fiche de paie {payroll.employee.user.get_full_name()}",
-            parameters={'payroll_id': str(payroll.id), 'month': payroll.month, 'year': payroll.year},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'payroll_id': str(payroll.id), 'month': payroll.month, 'year': payroll.year}
+        )
+        ensure_payslip(payroll)
+        return file_response(
+            payroll.pdf_file.open('rb'),
+            payslip_etag(payroll),
+            filename=f"fiche_paie_{payroll.employee.user.last_name}_{payroll.month}_{payroll.year}.pdf",
         )
-        
-        return exporter.export()
     
     @action(detail=False, methods=['get'], url_path='export/journal-advanced')
     def export_payroll_journal_advanced(self, request):
         """
-        Exporter le journal de paie avec le format avancé (PDF ou Excel).
+        Exporter le journal de paie avec le format avancé (PDF, Excel ou CSV).
         
         Query params:
             - month: Mois (1-12)
             - year: Année
-            - format: pdf ou excel (défaut: pdf)
+            - format: pdf, excel ou csv (défaut: pdf)
         """
         month = request.query_params.get('month')
         year = request.query_params.get('year')
@@ -225,13 +306,24 @@ class PayrollViewSet(viewsets.ModelViewSet):
         if not month or not year:
             return Response({'error': 'Mois et année requis'}, status=400)
         
-        # Récupérer les données
+        # Une seule requête : les colonnes du journal chargées dans un DataFrame
         payrolls = self.get_queryset().filter(
             month=month,
             year=year
-        ).select_related('employee__user').order_by('employee__user__last_name')
-        
-        if not payrolls.exists():
+        ).order_by('employee__user__last_name')
+        frame = ReportFrame.from_queryset(payrolls, {
+            'employee_id': 'employee_id',
+            'last_name': 'employee__user__last_name',
+            'first_name': 'employee__user__first_name',
+            'position': 'employee__position',
+            'basic_salary': 'basic_salary',
+            'bonus': 'bonus',
+            'deductions': 'deductions',
+            'net_salary': 'net_salary',
+            'is_paid': 'is_paid',
+        }, decimals=['basic_salary', 'bonus', 'deductions', 'net_salary'])
+        
+        if not len(frame):
             return Response({'error': 'Aucune donnée pour cette période'}, status=404)
         
         # Noms des mois
@@ -241,87 +333,63 @@ class PayrollViewSet(viewsets.ModelViewSet):
             '9': 'Septembre', '10': 'Octobre', '11': 'Novembre', '12': 'Décembre'
         }
         month_name = months.get(str(int(month)), month)
-        
-        if export_format == 'excel':
-            # Export Excel avec formatage avancé
-            data = []
-            total_gross = 0
-            total_bonus = 0
-            total_deductions = 0
-            total_net = 0
-            
-            for p in payrolls:
-                gross = float(p.basic_salary) + float(p.bonus)
-                total_gross += gross
-                total_bonus += float(p.bonus)
-                total_deductions += float(p.deductions)
-                total_net += float(p.net_salary)
-                
-                data.append({
-                    'Matricule': str(p.employee.id)[:8],
-                    'Nom': p.employee.user.last_name,
-                    'Prénom': p.employee.user.first_name,
-                    'Poste': p.employee.position,
-                    'Salaire Base': float(p.basic_salary),
-                    'Primes': float(p.bonus),
-                    'Brut': gross,
-                    'Déductions': float(p.deductions),
-                    'Net à Payer': float(p.net_salary),
-                    'Statut': 'Payé' if p.is_paid else 'En attente'
-                })
-            
-            exporter = AdvancedExcelExporter(
-                data=data,
-                filename=f"journal_paie_{month_name}_{year}",
-                sheet_name=f"Paie {month_name} {year}",
-                company=request.user.company,
-                user=request.user,
-                include_formulas=True
-            )
+        filename = f"journal_paie_{month_name}_{year}"
+        
+        # Colonnes calculées et récapitulatif (totaux, min, max, moyenne) en un passage
+        frame['gross'] = frame['basic_salary'] + frame['bonus']
+        frame['matricule'] = frame['employee_id'].astype(str).str[:8]
+        frame['employee_name'] = (frame['first_name'] + ' ' + frame['last_name']).str.strip()
+        frame.map_values('is_paid', {True: 'Payé', False: 'En attente'}, target='status')
+        summary = frame.summary(['gross', 'bonus', 'deductions', 'net_salary'])
+        
+        if export_format in ('excel', 'csv'):
+            data = frame.records(JOURNAL_COLUMNS)
+            if export_format == 'csv':
+                exporter = UTF8CSVExporter(data=data, filename=filename)
+            else:
+                # Export Excel avec formatage avancé
+                exporter = AdvancedExcelExporter(
+                    data=data,
+                    filename=filename,
+                    sheet_name=f"Paie {month_name} {year}",
+                    company=request.user.company,
+                    user=request.user,
+                    include_formulas=True
+                )
         else:
             # Export PDF
-            payrolls_list = list(payrolls)
-            total_gross = sum(float(p.basic_salary) + float(p.bonus) for p in payrolls_list)
-            total_bonus = sum(float(p.bonus) for p in payrolls_list)
-            total_deductions = sum(float(p.deductions) for p in payrolls_list)
-            total_net = sum(float(p.net_salary) for p in payrolls_list)
-            
             context = {
                 'month_name': month_name,
                 'year': year,
-                'payrolls': payrolls_list,
-                'employees_count': len(payrolls_list),
-                'total_gross': total_gross,
-                'total_bonus': total_bonus,
-                'total_deductions': total_deductions,
-                'total_net': total_net,
-                'average_salary': total_net / len(payrolls_list) if payrolls_list else 0,
-                'min_salary': min(float(p.net_salary) for p in payrolls_list) if payrolls_list else 0,
-                'max_salary': max(float(p.net_salary) for p in payrolls_list) if payrolls_list else 0,
+                'payrolls': frame.records(),
+                'employees_count': len(frame),
+                'total_gross': summary['gross']['sum'],
+                'total_bonus': summary['bonus']['sum'],
+                'total_deductions': summary['deductions']['sum'],
+                'total_net': summary['net_salary']['sum'],
+                'average_salary': summary['net_salary']['mean'],
+                'min_salary': summary['net_salary']['min'],
+                'max_salary': summary['net_salary']['max'],
             }
             
             exporter = WeasyPrintPDFExporter(
                 data=[],
-                filename=f"journal_paie_{month_name}_{year}",
+                filename=filename,
                 template_name='exports/pdf/payroll_journal.html',
                 title=f"Journal de Paie - {month_name} {year}",
-                subtitle=f"{len(payrolls_list)} employé(s)",
+                subtitle=f"{len(frame)} employé(s)",
                 company=request.user.company,
                 user=request.user,
                 context=context
             )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type=export_format,
             module='payroll',
             document_name=f"Journal de paie {month_name} {year}",
-            parameters={'month': month, 'year': year, 'format': export_format},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'month': month, 'year': year, 'format': export_format}
         )
         
         return exporter.export()
@@ -347,52 +415,14 @@ class PayrollViewSet(viewsets.ModelViewSet):
             year=year
         ).select_related('employee__user').order_by('employee__user__last_name')
         
-        if not payrolls.exists():
+        payroll_count = payrolls.count()
+        if not payroll_count:
             return Response({'error': 'Aucune fiche de paie pour cette période'}, status=404)
         
-        # Générer un PDF pour chaque employé
-        files = []
-        for payroll in payrolls:
-            context = {
-                'employee': payroll.employee,
-                'month': payroll.month,
-                'year': payroll.year,
-                'basic_salary': payroll.basic_salary,
-                'bonus': payroll.bonus,
-                'deductions': payroll.deductions,
-                'net_salary': payroll.net_salary,
-                'gross_salary': payroll.basic_salary + payroll.bonus,
-                'payment_date': payroll.payment_date,
-            }
-            
-            # Générer le PDF individuel
-            exporter = WeasyPrintPDFExporter(
-                data=[],
-                filename=f"temp_{payroll.id}",
-                template_name='exports/pdf/payslip.html',
-                title=f"Bulletin de Paie - {month}/{year}",
-                document_id=str(payroll.id),
-                document_type='payslip',
-                company=request.user.company,
-                user=request.user,
-                context=context
-            )
-            
-            # Récupérer le contenu du PDF
-            pdf_response = exporter.export()
-            pdf_content = pdf_response.content
-            
-            # Ajouter au ZIP
-            employee_name = f"{payroll.employee.user.last_name}_{payroll.employee.user.first_name}"
-            filename = f"fiches_paie/{employee_name}/fiche_paie_{month}_{year}.pdf"
-            
-            files.append({
-                'name': filename,
-                'content': pdf_content,
-                'type': 'payslip'
-            })
+        # Fiches stockées à la clôture ; les fiches absentes ou périmées sont
+        # rendues en parallèle (PAYSLIP_RENDER_WORKERS) avant l'archivage
+        files = iter_stored_payslips(payrolls)
         
-        # Créer le ZIP
         zip_exporter = ZIPExporter(
             files=files,
             filename=f"fiches_paie_{month}_{year}",
@@ -401,7 +431,7 @@ class PayrollViewSet(viewsets.ModelViewSet):
             metadata={
                 'month': month,
                 'year': year,
-                'payroll_count': len(files)
+                'payroll_count': payroll_count
             },
             structure={
                 'type': 'bulk_payslips',
@@ -410,15 +440,11 @@ class PayrollViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='zip',
             module='payroll',
-            document_name=f"Fiches de paie groupées {month}/{year}",
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            document_name=f"Fiches de paie groupées {month}/{year}"
         )
         
         return zip_exporter.export()
@@ -473,19 +499,32 @@ class PayrollViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='payroll',
             document_name=f"Certificat de salaire {payroll.employee.user.get_full_name()}",
-            parameters={'payroll_id': str(payroll.id), 'period': period_type},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'payroll_id': str(payroll.id), 'period': period_type}
         )
         
-        return exporter.export()
+        cache_data = {
+            'payroll': model_state(payroll),
+            'employee': model_state(payroll.employee),
+            'user': model_state(payroll.employee.user, USER_FIELDS),
+            'period': period_type,
+            'annual': context.get('annual_data'),
+            # Date d'émission imprimée (« Fait le ») et auteur de l'export
+            'issued': date.today(),
+            'exported_by': request.user.pk,
+        }
+        return serve_document(
+            request,
+            'salary_certificate',
+            cache_data,
+            render=exporter.render,
+            filename=f"{exporter.filename}.pdf",
+            company=request.user.company,
+        )
     
     @action(detail=True, methods=['get'], url_path='export/cnss-certificate')
     def export_cnss_certificate(self, request, pk=None):
@@ -559,16 +598,12 @@ class PayrollViewSet(viewsets.ModelViewSet):
         )
         
         # Logger l'export
-        ExportLog.objects.create(
-            company=request.user.company,
-            user=request.user,
+        ExportLog.objects.log_export(
+            request,
             export_type='pdf',
             module='payroll',
             document_name=f"Certificat CNSS {payroll.employee.user.get_full_name()}",
-            parameters={'payroll_id': str(payroll.id)},
-            status='completed',
-            started_at=timezone.now(),
-            completed_at=timezone.now()
+            parameters={'payroll_id': str(payroll.id)}
         )
         
         return exporter.export()
\ No newline at end of file
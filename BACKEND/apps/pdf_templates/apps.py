@@ -5,3 +5,6 @@ class PdfTemplatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.pdf_templates'
     verbose_name = 'Templates PDF'
+
+    def ready(self):
+        from . import signals  # noqa: F401
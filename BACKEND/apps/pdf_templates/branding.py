@@ -0,0 +1,155 @@
+"""
+Cache de la charte graphique PDF par entreprise.
+
+Les réglages PDF, les couleurs converties, la feuille de styles et le logo
+décodé sont construits une fois par entreprise et partagés par tous les
+générateurs ReportLab du processus (``ProcessCache``). Modifier les
+réglages PDF ou un template invalide la charte de l'entreprise (voir
+signals.py) ; un logo remplacé dans un autre processus n'apparaît qu'après
+PDF_BRANDING_CACHE_TTL secondes.
+"""
+import logging
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+
+from apps.core.utils.process_cache import ProcessCache
+
+from .models import CompanyPDFSettings, PDFTemplate
+
+logger = logging.getLogger(__name__)
+
+# Boîte dans laquelle le logo est inscrit (proportions conservées)
+LOGO_MAX_WIDTH = 3 * cm
+LOGO_MAX_HEIGHT = 2 * cm
+
+_MISSING = object()
+
+
+def hex_to_color(hex_color):
+    """Convertit une couleur hex (#RRGGBB) en objet Color ReportLab."""
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16) / 255.0
+    g = int(hex_color[2:4], 16) / 255.0
+    b = int(hex_color[4:6], 16) / 255.0
+    return colors.Color(r, g, b)
+
+
+def build_stylesheet(pdf_settings, primary_color):
+    """Feuille de styles de base enrichie des styles de l'entreprise."""
+    styles = getSampleStyleSheet()
+
+    # Style pour le titre principal
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=primary_color,
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        fontName=pdf_settings.font_family + '-Bold'
+    ))
+
+    # Style pour les sous-titres
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=primary_color,
+        spaceAfter=10,
+        fontName=pdf_settings.font_family + '-Bold'
+    ))
+
+    # Style pour le texte normal
+    styles.add(ParagraphStyle(
+        name='CustomBody',
+        parent=styles['BodyText'],
+        fontSize=10,
+        fontName=pdf_settings.font_family,
+        alignment=TA_JUSTIFY,
+        spaceAfter=6
+    ))
+
+    # Style pour le footer
+    styles.add(ParagraphStyle(
+        name='CustomFooter',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=TA_CENTER,
+        fontName=pdf_settings.font_family
+    ))
+
+    return styles
+
+
+class CompanyBranding:
+    """
+    Charte graphique PDF d'une entreprise, prête à l'emploi.
+
+    Partagée entre générateurs et threads : les attributs (y compris la
+    feuille de styles) doivent être traités en lecture seule.
+    """
+
+    def __init__(self, pdf_settings):
+        self.pdf_settings = pdf_settings
+        self.primary_color = hex_to_color(pdf_settings.primary_color)
+        self.secondary_color = hex_to_color(pdf_settings.secondary_color)
+        self.styles = build_stylesheet(pdf_settings, self.primary_color)
+        self.logo, self.logo_size = self._load_logo(pdf_settings)
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_logo(pdf_settings):
+        """Décode le logo une fois et calcule sa taille dans la boîte d'en-tête."""
+        if not pdf_settings.logo:
+            return None, None
+        try:
+            logo = ImageReader(pdf_settings.logo.path)
+            width, height = logo.getSize()
+        except Exception as exc:
+            logger.warning("Logo PDF illisible pour %s : %s", pdf_settings.company_id, exc)
+            return None, None
+        scale = min(LOGO_MAX_WIDTH / width, LOGO_MAX_HEIGHT / height)
+        return logo, (width * scale, height * scale)
+
+    def get_template(self, template_type):
+        """Template par défaut actif pour ce type de document (ou None)."""
+        template = self._templates.get(template_type, _MISSING)
+        if template is _MISSING:
+            template = PDFTemplate.objects.filter(
+                company_id=self.pdf_settings.company_id,
+                template_type=template_type,
+                is_active=True,
+                is_default=True
+            ).first()
+            with self._lock:
+                self._templates[template_type] = template
+        return template
+
+
+_cache = ProcessCache('PDF_BRANDING_CACHE_TTL')
+
+
+def _load_branding(company):
+    pdf_settings, _ = CompanyPDFSettings.objects.get_or_create(company=company)
+    return CompanyBranding(pdf_settings)
+
+
+def get_company_branding(company):
+    """
+    Charte graphique de l'entreprise, depuis le cache du processus.
+
+    Les réglages PDF par défaut sont créés s'ils n'existent pas encore.
+    """
+    return _cache.get(company.pk, lambda: _load_branding(company))
+
+
+def invalidate_company_branding(company_id=None):
+    """Invalide la charte d'une entreprise (ou de toutes si company_id est None)."""
+    _cache.invalidate(company_id)
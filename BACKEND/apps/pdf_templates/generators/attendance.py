@@ -1,14 +1,14 @@
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import cm
 from .base import BaseReportLabGenerator
 
 class AttendanceGenerator(BaseReportLabGenerator):
     def __init__(self, company, *args, **kwargs):
         super().__init__(company, *args, **kwargs)
-        self.styles = getSampleStyleSheet()
+        self.styles = self.get_styles()
         
         # Styles personnalisés épurés
         self.h2_style = ParagraphStyle(
@@ -177,7 +177,28 @@ class AttendanceGenerator(BaseReportLabGenerator):
             
             elements.append(Spacer(1, 0.6*cm))
         
-        # === 3. Tableau par Employé (Épuré) ===
+        # === 3. Synthèse par Département ===
+        if data.get('department_stats'):
+            elements.append(self.create_section_header("🏢 Performance par Département"))
+            elements.append(Spacer(1, 0.3*cm))
+            
+            dept_data = [['Département', 'Employés', 'Présent', 'Retard', 'Absent', 'Excusé', 'Taux']]
+            for dept in data['department_stats']:
+                dept_data.append([
+                    dept['department'],
+                    str(dept['employees']),
+                    str(dept['present']),
+                    str(dept['late']),
+                    str(dept['absent']),
+                    str(dept['excused']),
+                    f"{dept['attendance_rate']:.1f}%"
+                ])
+            
+            dept_widths = [4.5*cm, 2*cm, 2*cm, 2*cm, 2*cm, 2*cm, 2.5*cm]
+            elements.append(self.create_clean_table(dept_data, dept_widths, has_header=True, zebra=True))
+            elements.append(Spacer(1, 0.6*cm))
+        
+        # === 4. Tableau par Employé (Épuré) ===
         elements.append(self.create_section_header("📋 Performance par Employé"))
         elements.append(Spacer(1, 0.3*cm))
         
@@ -3,22 +3,19 @@ Générateur de base pour tous les PDF ReportLab.
 """
 import io
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 from django.http import HttpResponse
-from django.conf import settings
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm, mm
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph,
-    Spacer, PageBreak, Image, Frame, PageTemplate
-)
-from reportlab.pdfgen import canvas
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 
-from ..models import CompanyPDFSettings, PDFTemplate
+from ..branding import get_company_branding, hex_to_color
+
+# Nom du Form XObject portant l'habillage fixe des pages
+PAGE_CHROME_FORM = 'PageChrome'
 
 
 class BaseReportLabGenerator:
@@ -32,6 +29,9 @@ class BaseReportLabGenerator:
     - Génération PDF
     """
     
+    # Compiler l'en-tête/pied de page fixe en Form XObject réutilisé par page
+    compile_page_chrome = True
+    
     def __init__(self, company, template_type=None, template_config=None):
         """
         Initialise le générateur.
@@ -44,25 +44,12 @@ class BaseReportLabGenerator:
         self.company = company
         self.template_type = template_type
         
-        # Charger les settings PDF de l'entreprise
-        try:
-            self.pdf_settings = CompanyPDFSettings.objects.get(company=company)
-        except CompanyPDFSettings.DoesNotExist:
-            # Créer des settings par défaut
-            self.pdf_settings = CompanyPDFSettings.objects.create(company=company)
+        # Charte de l'entreprise (réglages, couleurs, styles, logo) mise en cache
+        self.branding = get_company_branding(company)
+        self.pdf_settings = self.branding.pdf_settings
         
         # Charger le template si spécifié
-        self.template = None
-        if template_type:
-            try:
-                self.template = PDFTemplate.objects.filter(
-                    company=company,
-                    template_type=template_type,
-                    is_active=True,
-                    is_default=True
-                ).first()
-            except PDFTemplate.DoesNotExist:
-                pass
+        self.template = self.branding.get_template(template_type) if template_type else None
         
         # Configuration
         self.config = template_config or (self.template.config if self.template else {})
@@ -77,8 +64,8 @@ class BaseReportLabGenerator:
         self.margin_bottom = self.config.get('margin_bottom', 2.5 * cm)
         
         # Palette de couleurs épurée et professionnelle
-        self.primary_color = self._hex_to_color(self.pdf_settings.primary_color)
-        self.secondary_color = self._hex_to_color(self.pdf_settings.secondary_color)
+        self.primary_color = self.branding.primary_color
+        self.secondary_color = self.branding.secondary_color
         
         # Couleurs système (minimalistes)
         self.color_success = colors.Color(0.06, 0.72, 0.51)  # #10B981 Vert
@@ -90,60 +77,15 @@ class BaseReportLabGenerator:
     
     def _hex_to_color(self, hex_color):
         """Convertit une couleur hex en objet Color ReportLab."""
-        hex_color = hex_color.lstrip('#')
-        r = int(hex_color[0:2], 16) / 255.0
-        g = int(hex_color[2:4], 16) / 255.0
-        b = int(hex_color[4:6], 16) / 255.0
-        return colors.Color(r, g, b)
+        return hex_to_color(hex_color)
     
     def get_styles(self):
         """
         Retourne les styles personnalisés pour le PDF.
+
+        La feuille est partagée via le cache de charte : ne pas la modifier.
         """
-        styles = getSampleStyleSheet()
-        
-        # Style pour le titre principal
-        styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=self.primary_color,
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName=self.pdf_settings.font_family + '-Bold'
-        ))
-        
-        # Style pour les sous-titres
-        styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=self.primary_color,
-            spaceAfter=10,
-            fontName=self.pdf_settings.font_family + '-Bold'
-        ))
-        
-        # Style pour le texte normal
-        styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=styles['BodyText'],
-            fontSize=10,
-            fontName=self.pdf_settings.font_family,
-            alignment=TA_JUSTIFY,
-            spaceAfter=6
-        ))
-        
-        # Style pour le footer
-        styles.add(ParagraphStyle(
-            name='CustomFooter',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_CENTER,
-            fontName=self.pdf_settings.font_family
-        ))
-        
-        return styles
+        return self.branding.styles
     
     def add_header(self, canvas, doc):
         """
@@ -152,13 +94,16 @@ class BaseReportLabGenerator:
         canvas.saveState()
         
         # Logo (si disponible)
-        if self.pdf_settings.logo:
-            try:
-                logo_path = self.pdf_settings.logo.path
-                logo = Image(logo_path, width=3*cm, height=2*cm, kind='proportional')
-                logo.drawOn(canvas, self.margin_left, self.page_height - self.margin_top + 0.5*cm)
-            except:
-                pass
+        if self.branding.logo is not None:
+            logo_width, logo_height = self.branding.logo_size
+            canvas.drawImage(
+                self.branding.logo,
+                self.margin_left,
+                self.page_height - self.margin_top + 0.5*cm,
+                width=logo_width,
+                height=logo_height,
+                mask='auto'
+            )
         
         # Informations entreprise (à droite)
         canvas.setFont(self.pdf_settings.font_family + '-Bold', 12)
@@ -200,6 +145,13 @@ class BaseReportLabGenerator:
         """
         Ajoute le pied de page avec numéro de page et texte personnalisé.
         """
+        self.add_footer_static(canvas, doc)
+        self.add_page_stamp(canvas, doc)
+    
+    def add_footer_static(self, canvas, doc):
+        """
+        Partie fixe du pied de page (ligne de séparation et texte personnalisé).
+        """
         canvas.saveState()
         
         # Ligne de séparation
@@ -213,16 +165,25 @@ class BaseReportLabGenerator:
         )
         
         # Texte du footer personnalisé
-        canvas.setFont(self.pdf_settings.font_family, 8)
-        canvas.setFillColor(colors.grey)
-        
         if self.pdf_settings.footer_text:
+            canvas.setFont(self.pdf_settings.font_family, 8)
+            canvas.setFillColor(colors.grey)
             canvas.drawCentredString(
                 self.page_width / 2,
                 self.margin_bottom + 0.6*cm,
                 self.pdf_settings.footer_text
             )
         
+        canvas.restoreState()
+    
+    def add_page_stamp(self, canvas, doc):
+        """
+        Partie variable du pied de page : numéro de page et date de génération.
+        """
+        canvas.saveState()
+        canvas.setFont(self.pdf_settings.font_family, 8)
+        canvas.setFillColor(colors.grey)
+        
         # Numéro de page
         page_num = f"Page {doc.page}"
         canvas.drawRightString(
@@ -231,8 +192,9 @@ class BaseReportLabGenerator:
             page_num
         )
         
-        # Date de génération
-        date_str = f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
+        # Date de génération (figée pour tout le document)
+        generated_at = getattr(doc, 'generated_at', None) or datetime.now()
+        date_str = f"Généré le {generated_at.strftime('%d/%m/%Y à %H:%M')}"
         canvas.drawString(
             self.margin_left,
             self.margin_bottom + 0.3*cm,
@@ -284,6 +246,7 @@ class BaseReportLabGenerator:
             bottomMargin=self.margin_bottom + 1*cm,  # Espace pour footer
             title=filename
         )
+        doc.generated_at = datetime.now()
         
         # Générer le PDF avec header et footer
         doc.build(
@@ -304,9 +267,26 @@ class BaseReportLabGenerator:
         return response
     
     def add_header_footer(self, canvas, doc):
-        """Combine header et footer."""
-        self.add_header(canvas, doc)
-        self.add_footer(canvas, doc)
+        """
+        Combine header et footer.
+        
+        L'habillage fixe (logo, coordonnées, lignes, texte de pied de page)
+        est compilé une seule fois par document en Form XObject PDF puis
+        référencé sur chaque page ; seuls le numéro de page et la date sont
+        dessinés page par page.
+        """
+        if not self.compile_page_chrome:
+            self.add_header(canvas, doc)
+            self.add_footer(canvas, doc)
+            return
+        
+        if not canvas.hasForm(PAGE_CHROME_FORM):
+            canvas.beginForm(PAGE_CHROME_FORM)
+            self.add_header(canvas, doc)
+            self.add_footer_static(canvas, doc)
+            canvas.endForm()
+        canvas.doForm(PAGE_CHROME_FORM)
+        self.add_page_stamp(canvas, doc)
     
     def create_kpi_card(self, title, value, subtitle=None, color=None):
         """
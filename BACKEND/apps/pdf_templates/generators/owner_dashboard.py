@@ -49,7 +49,8 @@ class OwnerDashboardGenerator(BaseReportLabGenerator):
                 'alerts': [
                     'Taux d\'absence élevé dans le département Marketing',
                     '5 demandes de congés en attente depuis plus de 7 jours',
-                ]
+                ],
+                'headcount': headcount_series(...)  # optionnel
             }
         """
         self.filename = filename
@@ -117,6 +118,17 @@ class OwnerDashboardGenerator(BaseReportLabGenerator):
         ]))
         elements.append(kpi_table)
         elements.append(Spacer(1, 0.8*cm))
+
+        # Évolution de l'effectif (voir apps.employees.headcount)
+        headcount = data.get('headcount')
+        if headcount:
+            table_data = [['Période', 'Effectif', 'Embauches']]
+            table_data.extend(
+                [point['label'], str(point['headcount']), str(point['hires'])]
+                for point in headcount
+            )
+            elements.append(self.create_clean_table(table_data, col_widths=[6*cm, 6*cm, 6*cm]))
+            elements.append(Spacer(1, 0.8*cm))
         
         # === 2. KPIs Financiers ===
         elements.append(self.create_section_header("💰 Finances"))
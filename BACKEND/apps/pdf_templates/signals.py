@@ -0,0 +1,14 @@
+"""
+Invalidation du cache de charte PDF à chaque modification des réglages.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .branding import invalidate_company_branding
+from .models import CompanyPDFSettings, PDFTemplate
+
+
+@receiver([post_save, post_delete], sender=CompanyPDFSettings)
+@receiver([post_save, post_delete], sender=PDFTemplate)
+def invalidate_branding_cache(sender, instance, **kwargs):
+    invalidate_company_branding(instance.company_id)
@@ -0,0 +1,68 @@
+from django.test import TestCase
+
+from apps.company.models import Company
+from apps.pdf_templates.branding import invalidate_company_branding
+from apps.pdf_templates.generators.attendance import AttendanceGenerator
+from apps.pdf_templates.generators.payslip import PayslipGenerator
+from apps.pdf_templates.models import CompanyPDFSettings, PDFTemplate
+
+
+class BrandingCacheTests(TestCase):
+    def setUp(self):
+        invalidate_company_branding()
+        self.company = Company.objects.create(name="Test Company")
+
+    def tearDown(self):
+        invalidate_company_branding()
+
+    def test_branding_shared_between_generators(self):
+        first = PayslipGenerator(self.company)
+        with self.assertNumQueries(0):
+            second = PayslipGenerator(self.company)
+            attendance = AttendanceGenerator(self.company)
+        self.assertIs(first.get_styles(), second.get_styles())
+        self.assertIs(attendance.styles, first.get_styles())
+
+    def test_settings_save_invalidates(self):
+        PayslipGenerator(self.company)
+        pdf_settings = CompanyPDFSettings.objects.get(company=self.company)
+        pdf_settings.primary_color = '#FF0000'
+        pdf_settings.save()
+        self.assertEqual(PayslipGenerator(self.company).primary_color.red, 1.0)
+
+    def test_template_save_invalidates(self):
+        self.assertEqual(PayslipGenerator(self.company).margin_left, 56.69291338582677)
+        PDFTemplate.objects.create(
+            company=self.company, template_type='payslip', name='Paie',
+            config={'margin_left': 20}, is_active=True, is_default=True
+        )
+        self.assertEqual(PayslipGenerator(self.company).margin_left, 20)
+
+
+class PageChromeTests(TestCase):
+    def setUp(self):
+        invalidate_company_branding()
+        self.company = Company.objects.create(name="Test Company")
+
+    def tearDown(self):
+        invalidate_company_branding()
+
+    def _render(self, compiled):
+        generator = AttendanceGenerator(self.company)
+        generator.compile_page_chrome = compiled
+        rows = [{
+            'employee_name': f"Employé {i}", 'department': 'RH',
+            'present': 20, 'late': 1, 'absent': 1, 'attendance_rate': 95.0,
+        } for i in range(150)]
+        return generator.generate_monthly_advanced_report(
+            {'month': 'Janvier', 'employee_stats': rows}, 'rapport'
+        ).content
+
+    def test_header_footer_compiled_once_per_document(self):
+        content = self._render(compiled=True)
+        self.assertGreater(content.count(b'/Type /Page\n'), 1)
+        self.assertEqual(content.count(b'/Subtype /Form'), 1)
+
+    def test_per_page_drawing_still_available(self):
+        content = self._render(compiled=False)
+        self.assertEqual(content.count(b'/Subtype /Form'), 0)
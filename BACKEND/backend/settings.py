@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -59,8 +60,8 @@ MIDDLEWARE = [
     # Multi-tenant middlewares
     'apps.core.middleware.TenantMiddleware',
     'apps.core.middleware.CompanyIsolationMiddleware',
-    # Maintenance mode - DÉSACTIVÉ (cause des boucles infinies)
-    # 'apps.accounts.middleware.MaintenanceModeMiddleware',
+    # Mode maintenance (après TenantMiddleware : owner reconnu par les claims JWT)
+    'apps.accounts.middleware.MaintenanceModeMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -137,7 +138,7 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
@@ -145,14 +146,33 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Contrôle du budget de requêtes SQL des listes (voir apps.core.query_budget) :
+# '' (désactivé), 'warn' ou 'raise'. Par défaut 'warn' en DEBUG.
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='warn' if DEBUG else '') or None
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
+    # Claims d'entreprise (company_id, role, plan, company_active, is_owner)
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.tokens.TenantTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.tokens.TenantTokenRefreshSerializer',
 }
 
+# Cache des entreprises par processus pour la résolution du tenant :
+# nombre d'entrées et durée de vie (secondes)
+TENANT_CACHE_SIZE = config('TENANT_CACHE_SIZE', default=256, cast=int)
+TENANT_CACHE_TTL = config('TENANT_CACHE_TTL', default=60, cast=int)
+
+# Configuration plateforme : intervalle (secondes) entre deux vérifications de
+# sa version dans le cache partagé, durée maximale (secondes) avant relecture
+# même sans changement de version, et durée de cache HTTP de sa lecture publique
+PLATFORM_CONFIG_CHECK_INTERVAL = config('PLATFORM_CONFIG_CHECK_INTERVAL', default=5, cast=int)
+PLATFORM_CONFIG_RELOAD_INTERVAL = config('PLATFORM_CONFIG_RELOAD_INTERVAL', default=60, cast=int)
+PLATFORM_CONFIG_MAX_AGE = config('PLATFORM_CONFIG_MAX_AGE', default=30, cast=int)
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True  # For development
 CORS_EXPOSE_HEADERS = ['Content-Disposition']
@@ -205,6 +225,54 @@ CELERY_RESULT_EXPIRES = 86400
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes max par tâche
 
+# Tâches planifiées (Celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-exports': {
+        'task': 'apps.core.tasks.purge_expired_exports_task',
+        'schedule': 60 * 60,  # toutes les heures
+    },
+    'evict-document-cache': {
+        'task': 'apps.core.tasks.evict_document_cache_task',
+        'schedule': 60 * 60,  # toutes les heures
+    },
+    'materialize-absences': {
+        'task': 'apps.attendance.tasks.materialize_absences_task',
+        'schedule': crontab(hour=1, minute=0),  # chaque nuit, pour la veille
+    },
+}
+
+# ============================================================================
+# CONFIGURATION CACHE
+# ============================================================================
+
+# Cache partagé entre les workers (statistiques du tableau de bord, version
+# de la configuration plateforme, compteurs du cache de documents) : Redis,
+# par défaut le même serveur que le broker Celery. La mémoire locale (propre
+# à chaque processus) n'est utilisée que si REDIS_CACHE_URL est explicitement
+# vide (développement avec un seul processus) et pour les tests (voir
+# TEST_RUNNER).
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default=CELERY_BROKER_URL)
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'grh',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Tests : cache en mémoire locale, jamais le Redis partagé
+TEST_RUNNER = 'backend.test_runner.LocalCacheTestRunner'
+
+# Durée de vie (secondes) des statistiques du tableau de bord en cache (0 = désactivé)
+STATS_CACHE_TTL = config('STATS_CACHE_TTL', default=60, cast=int)
+
 # ============================================================================
 # CONFIGURATION EXPORTS
 # ============================================================================
@@ -218,6 +286,25 @@ EXPORT_URL_EXPIRATION_HOURS = 24
 # Taille max des fichiers d'export (en MB)
 EXPORT_MAX_FILE_SIZE_MB = 100
 
+# Nombre de processus pour le rendu en masse des fiches de paie (1 = séquentiel)
+PAYSLIP_RENDER_WORKERS = config('PAYSLIP_RENDER_WORKERS', default=min(4, os.cpu_count() or 1), cast=int)
+
+# Durée de vie (secondes) du cache de charte PDF par entreprise et par processus
+PDF_BRANDING_CACHE_TTL = config('PDF_BRANDING_CACHE_TTL', default=300, cast=int)
+
+# Durée de vie (secondes) de l'index des horaires de travail par entreprise et par processus
+WORK_SCHEDULE_CACHE_TTL = config('WORK_SCHEDULE_CACHE_TTL', default=300, cast=int)
+
+# Moteur de rendu HTML -> PDF des exporters ('weasyprint', 'xhtml2pdf' ou 'reportlab')
+PDF_RENDER_BACKEND = config('PDF_RENDER_BACKEND', default='weasyprint')
+
+# Cache disque des documents générés (fiches de paie, attestations, certificats)
+DOCUMENT_CACHE_ENABLED = config('DOCUMENT_CACHE_ENABLED', default=True, cast=bool)
+DOCUMENT_CACHE_DIR = config('DOCUMENT_CACHE_DIR', default=str(EXPORT_STORAGE_PATH / 'cache'))
+# Taille totale max (octets) et durée max sans lecture (secondes) avant éviction
+DOCUMENT_CACHE_MAX_BYTES = config('DOCUMENT_CACHE_MAX_BYTES', default=500 * 1024 * 1024, cast=int)
+DOCUMENT_CACHE_MAX_AGE = config('DOCUMENT_CACHE_MAX_AGE', default=7 * 24 * 3600, cast=int)
+
 # Template de base pour les PDFs
 EXPORT_PDF_BASE_TEMPLATE = 'exports/pdf/base.html'
 
@@ -0,0 +1,27 @@
+"""
+Lanceur des tests : cache en mémoire locale.
+
+Les tests n'utilisent jamais le cache partagé (Redis) configuré par
+``REDIS_CACHE_URL`` : ses clés (préfixe ``grh``, versions des statistiques et
+de la configuration plateforme) seraient communes avec un serveur de
+développement ou de production.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class LocalCacheTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
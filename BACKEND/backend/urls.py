@@ -19,6 +19,7 @@ urlpatterns = [
     path('api/documents/', include('apps.documents.urls')),
     path('api/dashboard/', include('apps.dashboard.urls')),
     path('api/stats/', include('apps.core.urls')),  # Keep stats endpoint separate
+    path('api/exports/', include('apps.core.export_urls')),  # Asynchronous export jobs
     path('api/notifications/', include('apps.notifications.urls')),
     path('api/pdf/', include('apps.pdf_templates.urls')),
     path('api/billing/', include('billing.urls')),  # Payment & Subscription system
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_alter_payment_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_at', '-id'], name='billing_pay_created_813e07_idx'),
+        ),
+    ]
@@ -175,6 +175,9 @@ class Payment(models.Model):
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.subscription.company.name} - {self.amount} {self.currency} ({self.get_status_display()})"
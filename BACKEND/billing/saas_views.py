@@ -17,8 +17,9 @@ from billing.models import (
 )
 from billing.serializers import (
     SubscriptionPlanSerializer, SubscriptionSerializer,
-    PaymentSerializer, InvoiceSerializer, PromoCodeSerializer
+    InvoiceSerializer, PromoCodeSerializer, TransactionSerializer
 )
+from apps.core.pagination import KeysetPagination
 
 
 def is_saas_owner(user):
@@ -274,14 +275,11 @@ def get_all_transactions(request):
     if method_filter:
         payments = payments.filter(payment_method=method_filter)
     
-    data = []
-    for payment in payments:
-        serializer = PaymentSerializer(payment)
-        payment_data = serializer.data
-        payment_data['company_name'] = payment.subscription.company.name
-        data.append(payment_data)
-    
-    return Response(data)
+    # Pagination par clé sur (created_at, id) : pas d'OFFSET sur l'historique complet
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(payments, request)
+    serializer = TransactionSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 # ==================== ANALYTICS ====================
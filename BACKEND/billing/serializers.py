@@ -53,6 +53,14 @@ class PaymentSerializer(serializers.ModelSerializer):
         ]
 
 
+class TransactionSerializer(PaymentSerializer):
+    """Paiement avec le nom de l'entreprise (subscription__company à joindre)"""
+    company_name = serializers.CharField(source='subscription.company.name', read_only=True)
+
+    class Meta(PaymentSerializer.Meta):
+        fields = PaymentSerializer.Meta.fields + ['company_name']
+
+
 class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
@@ -29,8 +29,15 @@ const SaasBillingTransactions: React.FC = () => {
 
     const loadTransactions = async () => {
         try {
-            const response = await axiosClient.get('/api/billing/saas/transactions/');
-            setTransactions(response.data);
+            // Liste paginée par curseur : suivre les liens "next" jusqu'au bout
+            const all: Transaction[] = [];
+            let url: string | null = '/api/billing/saas/transactions/?page_size=1000';
+            while (url) {
+                const response: any = await axiosClient.get(url);
+                all.push(...response.data.results);
+                url = response.data.next;
+            }
+            setTransactions(all);
         } catch (error) {
             console.error('Erreur chargement transactions:', error);
             toast.error('Erreur de chargement');